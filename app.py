@@ -4,8 +4,10 @@ Provides interactive UI for goal setting, execution monitoring, and metrics trac
 """
 import gradio as gr
 import json
+import threading
+from contextlib import closing
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterator, List, Any, Optional
 import plotly.graph_objects as go
 import plotly.express as px
 from pathlib import Path
@@ -16,6 +18,12 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from src.agents import RetailMarketingAgent, GoalType, GoalStatus
 from src.config.settings import settings
+from src.utils.llm_helper import stream_prompt
+from src.utils.prompt_registry import registered_prompt
+from langchain_core.prompts import ChatPromptTemplate
+
+# Goals listed on the status tab; the counts above the list cover every goal
+STATUS_TAB_GOALS = 20
 
 
 class MarketingAgentUI:
@@ -27,6 +35,7 @@ class MarketingAgentUI:
         self.current_goal = None
         self.pending_campaign = None  # Store campaign content for approval
         self.campaign_content_draft = ""
+        self._generation_cancel: Optional[threading.Event] = None  # Set to abort a streaming generation
         
     def initialize_agent(
         self,
@@ -97,19 +106,10 @@ class MarketingAgentUI:
             self.execution_logs.append(error_msg)
             return error_msg, "\n".join(self.execution_logs[-10:])
     
-    def create_plan(self) -> tuple[str, str]:
-        """Create execution plan for the current goal"""
-        if not self.agent or not self.current_goal:
-            return "❌ Please set a goal first", ""
-        
-        try:
-            self.execution_logs.append(f"\n🎯 Creating execution plan...")
-            
-            subtasks = self.agent.plan(self.current_goal)
-            
-            self.execution_logs.append(f"✓ Plan created with {len(subtasks)} subtasks")
-            
-            plan_text = f"""✅ **Execution Plan Created**
+    def _plan_preview(self, subtasks: List[Dict[str, Any]], done: bool) -> str:
+        """Render the plan, complete or still streaming"""
+        header = "✅ **Execution Plan Created**" if done else "⏳ **Creating Execution Plan...**"
+        plan_text = f"""{header}
 
 **Goal:** {self.current_goal.description}
 **Total Subtasks:** {len(subtasks)}
@@ -117,18 +117,37 @@ class MarketingAgentUI:
 ---
 
 """
+        
+        for i, task in enumerate(subtasks, 1):
+            plan_text += f"**{i}. {task.get('name', 'Task')}**\n"
+            if task.get('description'):
+                plan_text += f"   {task['description'][:200]}...\n\n"
+        
+        return plan_text
+    
+    def create_plan(self) -> Iterator[tuple[str, str]]:
+        """Create execution plan for the current goal, showing subtasks as they are parsed"""
+        if not self.agent or not self.current_goal:
+            yield "❌ Please set a goal first", ""
+            return
+        
+        try:
+            self.execution_logs.append(f"\n🎯 Creating execution plan...")
             
-            for i, task in enumerate(subtasks, 1):
-                plan_text += f"**{i}. {task.get('name', 'Task')}**\n"
-                if task.get('description'):
-                    plan_text += f"   {task['description'][:200]}...\n\n"
+            subtasks = []
+            for subtask in self.agent.stream_plan(self.current_goal):
+                subtasks.append(subtask)
+                self.execution_logs.append(f"  • {subtask.get('name', 'Task')}")
+                yield self._plan_preview(subtasks, done=False), "\n".join(self.execution_logs[-10:])
             
-            return plan_text, "\n".join(self.execution_logs[-10:])
+            self.execution_logs.append(f"✓ Plan created with {len(subtasks)} subtasks")
+            
+            yield self._plan_preview(subtasks, done=True), "\n".join(self.execution_logs[-10:])
             
         except Exception as e:
             error_msg = f"❌ Error creating plan: {str(e)}"
             self.execution_logs.append(error_msg)
-            return error_msg, "\n".join(self.execution_logs[-10:])
+            yield error_msg, "\n".join(self.execution_logs[-10:])
     
     def execute_goal(self) -> tuple[str, str, str]:
         """Execute the current goal"""
@@ -215,12 +234,15 @@ class MarketingAgentUI:
             return "❌ Please initialize the agent first", None
         
         try:
-            report = self.agent.get_status_report()
+            report = self.agent.get_status_report(max_goals=STATUS_TAB_GOALS)
+            customer_stats = report['customer_stats']
+            customers = customer_stats['total_customers'] if customer_stats is not None else "not loaded"
             
             report_text = f"""📊 **Status Report**
 
 **Client:** {report['client_name']}
 **Store Type:** {report['store_type']}
+**Customers:** {customers}
 
 **Goals Summary:**
 - Total Goals: {report['total_goals']}
@@ -232,7 +254,10 @@ class MarketingAgentUI:
 """
             
             if report.get('goals'):
-                report_text += "### All Goals:\n\n"
+                if len(report['goals']) < report['total_goals']:
+                    report_text += f"### Latest {len(report['goals'])} Goals:\n\n"
+                else:
+                    report_text += "### All Goals:\n\n"
                 for goal in report['goals']:
                     report_text += f"**{goal['id']}**\n"
                     report_text += f"- Type: {goal['goal_type']}\n"
@@ -253,13 +278,12 @@ class MarketingAgentUI:
             return None
         
         try:
-            goals = self.agent.goals
-            
             # Count by status
-            status_counts = {}
-            for goal in goals:
-                status = goal.status.value
-                status_counts[status] = status_counts.get(status, 0) + 1
+            status_counts = {
+                status: count
+                for status, count in self.agent.goals.status_counts().items()
+                if count
+            }
             
             fig = go.Figure(data=[
                 go.Bar(
@@ -325,7 +349,8 @@ class MarketingAgentUI:
             response = ""
             
             if "status" in message.lower():
-                report = self.agent.get_status_report()
+                # Only the counts are needed
+                report = self.agent.get_status_report(max_goals=0)
                 response = f"Current status: {report['active_goals']} active goals, {report['completed_goals']} completed goals."
             elif "goal" in message.lower():
                 if self.current_goal:
@@ -343,30 +368,22 @@ class MarketingAgentUI:
             history.append((message, error_msg))
             return history
     
-    def generate_campaign_content(self) -> tuple[str, str]:
-        """Generate campaign content for approval"""
-        if not self.agent or not self.current_goal:
-            return "❌ Please set a goal first", ""
-        
-        try:
-            # Generate campaign content using the acquisition module
-            campaign_data = self.agent.acquisition_module.create_promotion_campaign(
-                target_audience="target customers",
-                campaign_type=self.current_goal.goal_type.value,
-                budget=5000.0,
-                duration_days=30,
-                store_context={
-                    "name": self.agent.client_name,
-                    "type": self.agent.store_type,
-                    "location": self.agent.location
-                }
-            )
-            
-            # Store for approval
-            self.pending_campaign = campaign_data
-            self.campaign_content_draft = campaign_data.get('campaign_plan', '')
-            
-            content_display = f"""## 📝 Generated Campaign Content
+    def _start_generation(self) -> threading.Event:
+        """Cancel any in-flight generation and return the cancel flag for a new one"""
+        if self._generation_cancel is not None:
+            self._generation_cancel.set()
+        self._generation_cancel = threading.Event()
+        return self._generation_cancel
+    
+    def cancel_generation(self) -> str:
+        """Abort the in-flight campaign generation or regeneration"""
+        if self._generation_cancel is not None:
+            self._generation_cancel.set()
+        return "⏹️ Generation cancelled"
+    
+    def _campaign_preview(self, campaign_data: Dict[str, Any], status: str) -> str:
+        """Render the campaign preview markdown"""
+        return f"""## 📝 Generated Campaign Content
 
 **Campaign Type:** {campaign_data.get('campaign_type', 'N/A')}
 **Budget:** ${campaign_data.get('budget', 0):,.2f}
@@ -376,58 +393,115 @@ class MarketingAgentUI:
 
 ### Campaign Plan:
 
-{self.campaign_content_draft}
+{campaign_data.get('campaign_plan', '')}
 
 ---
 
-**Status:** ⏳ Pending Approval
+**Status:** {status}
 
 You can:
 1. **Approve** to deploy as-is
 2. **Edit** the content below and regenerate
 3. **Request Changes** with specific instructions
 """
-            
-            return content_display, self.campaign_content_draft
-            
-        except Exception as e:
-            return f"❌ Error generating campaign: {str(e)}", ""
     
-    def regenerate_campaign_content(self, user_instructions: str, current_content: str) -> tuple[str, str]:
-        """Regenerate campaign content based on user feedback"""
-        if not self.agent:
-            return "❌ Please initialize the agent first", current_content
+    def generate_campaign_content(self) -> Iterator[tuple[str, str]]:
+        """Generate campaign content for approval, streaming tokens into the draft"""
+        if not self.agent or not self.current_goal:
+            yield "❌ Please set a goal first", ""
+            return
+        
+        cancel = self._start_generation()
         
         try:
-            from langchain_core.prompts import ChatPromptTemplate
+            # Stream campaign content from the acquisition module
+            stream = self.agent.acquisition_module.stream_promotion_campaign(
+                target_audience="target customers",
+                campaign_type=self.current_goal.goal_type.value,
+                budget=5000.0,
+                duration_days=30,
+                store_context={
+                    "name": self.agent.client_name,
+                    "type": self.agent.store_type,
+                    "location": self.agent.location
+                },
+                hedge=True
+            )
             
-            # Use LLM to revise the campaign based on user instructions
-            revision_prompt = ChatPromptTemplate.from_messages([
-                ("system", "You are an expert retail marketing content editor. Revise the marketing campaign based on user feedback."),
-                ("user", """Original Campaign Content:
+            campaign_data = None
+            with closing(stream):
+                for campaign_data in stream:
+                    if cancel.is_set():
+                        # Leaving the block closes the stream and aborts the request
+                        yield "⏹️ Generation cancelled", campaign_data['campaign_plan']
+                        return
+                    yield (
+                        self._campaign_preview(campaign_data, "✍️ Generating..."),
+                        campaign_data['campaign_plan']
+                    )
+            
+            # Store for approval
+            self.pending_campaign = campaign_data
+            self.campaign_content_draft = campaign_data.get('campaign_plan', '')
+            
+            yield self._campaign_preview(campaign_data, "⏳ Pending Approval"), self.campaign_content_draft
+            
+        except Exception as e:
+            yield f"❌ Error generating campaign: {str(e)}", ""
+    
+    @staticmethod
+    @registered_prompt("dashboard.regenerate_campaign_content")
+    def _revision_prompt() -> ChatPromptTemplate:
+        """Build the prompt for regenerate_campaign_content"""
+        return ChatPromptTemplate.from_messages([
+            ("system", "You are an expert retail marketing content editor. Revise the marketing campaign based on user feedback."),
+            ("user", """Original Campaign Content:
 {original_content}
 
 User Instructions for Changes:
 {user_instructions}
 
 Please revise the campaign content according to the user's instructions while maintaining professional marketing standards and the original campaign structure.""")
-            ])
-            
-            chain = revision_prompt | self.agent.llm
-            
-            response = chain.invoke({
+        ])
+    
+    def regenerate_campaign_content(self, user_instructions: str, current_content: str) -> Iterator[tuple[str, str]]:
+        """Regenerate campaign content based on user feedback, streaming tokens into the draft"""
+        if not self.agent:
+            yield "❌ Please initialize the agent first", current_content
+            return
+        
+        cancel = self._start_generation()
+        
+        try:
+            # Use LLM to revise the campaign based on user instructions
+            stream = stream_prompt(self._revision_prompt(), self.agent.llm, {
                 "original_content": current_content,
                 "user_instructions": user_instructions
-            })
-            
-            revised_content = response.content if hasattr(response, 'content') else str(response)
+            }, name="dashboard.regenerate_campaign_content", hedge=True)
+            
+            revised_content = ""
+            with closing(stream):
+                for chunk in stream:
+                    if cancel.is_set():
+                        # Keep the previous draft; leaving the block aborts the request
+                        yield "⏹️ Regeneration cancelled", current_content
+                        return
+                    revised_content += chunk
+                    yield self._revision_preview(user_instructions, revised_content, "✍️ Revising..."), revised_content
             
             # Update stored content
             self.campaign_content_draft = revised_content
             if self.pending_campaign:
                 self.pending_campaign['campaign_plan'] = revised_content
             
-            content_display = f"""## 📝 Revised Campaign Content
+            yield self._revision_preview(user_instructions, revised_content, "⏳ Pending Approval (Revised)"), revised_content
+            
+        except Exception as e:
+            yield f"❌ Error regenerating: {str(e)}", current_content
+    
+    def _revision_preview(self, user_instructions: str, revised_content: str, status: str) -> str:
+        """Render the revised campaign preview markdown"""
+        return f"""## 📝 Revised Campaign Content
 
 **Changes Applied:** {user_instructions[:100]}...
 
@@ -439,13 +513,8 @@ Please revise the campaign content according to the user's instructions while ma
 
 ---
 
-**Status:** ⏳ Pending Approval (Revised)
+**Status:** {status}
 """
-            
-            return content_display, revised_content
-            
-        except Exception as e:
-            return f"❌ Error regenerating: {str(e)}", current_content
     
     def approve_and_deploy_campaign(self, approved_content: str) -> str:
         """Approve and deploy the campaign with the approved content"""
@@ -779,24 +848,32 @@ Generate campaign content, review it, request changes, and approve before deploy
                             placeholder="E.g., 'Make it more exciting', 'Add a holiday theme', 'Focus more on discounts'",
                             lines=3
                         )
-                        regenerate_btn = gr.Button("🔄 Regenerate with Changes", variant="secondary")
+                        with gr.Row():
+                            regenerate_btn = gr.Button("🔄 Regenerate with Changes", variant="secondary")
+                            stop_btn = gr.Button("⏹️ Stop", variant="stop")
                     
                     with gr.Column():
                         approve_btn = gr.Button("✅ Approve & Deploy Campaign", variant="primary", size="lg")
                         approval_output = gr.Markdown()
                 
-                # Connect buttons
-                generate_content_btn.click(
+                # Connect buttons (generation handlers stream tokens as they arrive)
+                generate_event = generate_content_btn.click(
                     fn=ui.generate_campaign_content,
                     outputs=[campaign_preview, campaign_content_editor]
                 )
                 
-                regenerate_btn.click(
+                regenerate_event = regenerate_btn.click(
                     fn=ui.regenerate_campaign_content,
                     inputs=[change_instructions, campaign_content_editor],
                     outputs=[campaign_preview, campaign_content_editor]
                 )
                 
+                stop_btn.click(
+                    fn=ui.cancel_generation,
+                    outputs=approval_output,
+                    cancels=[generate_event, regenerate_event]
+                )
+                
                 approve_btn.click(
                     fn=ui.approve_and_deploy_campaign,
                     inputs=[campaign_content_editor],
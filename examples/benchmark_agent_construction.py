@@ -0,0 +1,89 @@
+"""
+Benchmark: Lazy vs Eager Agent Construction
+
+Constructs RetailMarketingAgent instances the way /api/initialize does, once
+with every subsystem prewarmed (the old eager behaviour) and once lazily, and
+reports construction time and retained memory per agent. It then runs a plan
+on a lazy agent to show which subsystems a planning-only tenant ends up
+building. Runs offline: no real LLM requests are made.
+"""
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Allow running from the repository root without installing the package
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("LLM_PROVIDER", "fake")
+os.environ.setdefault("FAKE_LLM_LATENCY_MS", "0")
+os.environ.setdefault("FAKE_LLM_TOKENS_PER_SECOND", "100000")
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+
+from src.agents import RetailMarketingAgent
+
+AGENTS = 50
+
+
+def build_agents(prewarm: bool):
+    agents = []
+    for i in range(AGENTS):
+        agent = RetailMarketingAgent(
+            client_name=f"Benchmark Store {i}",
+            store_type="grocery",
+            has_online_store=True,
+            location="Springfield"
+        )
+        if prewarm:
+            agent.prewarm()
+        agents.append(agent)
+    return agents
+
+
+def construct(prewarm: bool):
+    """Return (ms per agent, KiB retained per agent)"""
+    # Time and memory are measured in separate passes; tracing slows allocation down
+    gc.collect()
+    start = time.perf_counter()
+    build_agents(prewarm)
+    elapsed = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    agents = build_agents(prewarm)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del agents
+    return elapsed * 1000 / AGENTS, retained / 1024 / AGENTS
+
+
+def main():
+    print("=" * 60)
+    print("Agent Construction Benchmark")
+    print(f"{AGENTS} agents per mode")
+    print("=" * 60)
+
+    # Warm imports and the shared LLM client pool outside the measurement
+    RetailMarketingAgent(client_name="Warmup").prewarm()
+
+    eager_ms, eager_kib = construct(prewarm=True)
+    lazy_ms, lazy_kib = construct(prewarm=False)
+    print(f"eager (prewarm): {eager_ms:8.2f} ms/agent  {eager_kib:8.1f} KiB/agent")
+    print(f"lazy           : {lazy_ms:8.2f} ms/agent  {lazy_kib:8.1f} KiB/agent")
+    print(f"speedup {eager_ms / lazy_ms:.1f}x, {eager_kib - lazy_kib:.1f} KiB/agent saved until first use")
+
+    agent = RetailMarketingAgent(client_name="Planning Only", store_type="grocery")
+    goal = agent.set_goal("customer_acquisition", "200 new customers", "30 days")
+    agent.plan(goal)
+    built = [name for name, status in agent.subsystem_status().items() if status["built"]]
+    print(f"\nAfter plan(): built subsystems = {built or 'none'}")
+
+    print("\nBuild time per subsystem (prewarm):")
+    for name, ms in agent.prewarm().items():
+        print(f"   {name:20s} {ms:8.2f} ms")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark: Agent Snapshot and Restore
+
+Fills an agent's deployment service with SNAPSHOT_CUSTOMERS customers and
+SNAPSHOT_EMAILS emails (default 100k / 1M) and compares a plain pickle of
+the agent with AgentSnapshotter: a full snapshot, an incremental snapshot
+after a small campaign, and restoring the agent from the snapshot segments.
+Runs offline: no LLM requests are made.
+"""
+import gc
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Allow running from the repository root without installing the package
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("LLM_PROVIDER", "fake")
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+
+from src.agents import RetailMarketingAgent, AgentSnapshotter
+from src.services.mock_customers import MockCustomerDatabase
+
+CUSTOMERS = int(os.environ.get("SNAPSHOT_CUSTOMERS", "100000"))
+EMAILS = int(os.environ.get("SNAPSHOT_EMAILS", "1000000"))
+INCREMENT = 1000
+
+
+def send_campaign(agent: RetailMarketingAgent, campaign_id: str, count: int):
+    """Email `count` customers, cycling through the customer database"""
+    service = agent.deployment_service
+    customers = service.customer_db.get_all_customers()
+    content = f"Hello from {agent.client_name}! " * 20
+    for i in range(count):
+        customer = customers[i % len(customers)]
+        service.email_service.send_email(
+            to_email=customer.email,
+            to_name=customer.name,
+            subject="This week's offers",
+            content=content,
+            campaign_id=campaign_id
+        )
+
+
+def build_agent() -> RetailMarketingAgent:
+    agent = RetailMarketingAgent(
+        client_name="Benchmark Store",
+        store_type="grocery",
+        has_online_store=True,
+        location="Springfield"
+    )
+    agent.deployment_service.customer_db = MockCustomerDatabase(num_customers=CUSTOMERS)
+    campaigns = 10
+    for c in range(campaigns):
+        send_campaign(agent, f"campaign_{c:02d}", EMAILS // campaigns)
+    return agent
+
+
+def timed(fn):
+    gc.collect()
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    print("=" * 60)
+    print("Agent Snapshot Benchmark")
+    print(f"{CUSTOMERS:,} customers, {EMAILS:,} emails")
+    print("=" * 60)
+
+    agent, seconds = timed(build_agent)
+    print(f"Built agent in {seconds:.1f}s")
+
+    directory = tempfile.mkdtemp(prefix="agent_snapshot_")
+    try:
+        blob, pickle_s = timed(lambda: pickle.dumps(agent, protocol=pickle.HIGHEST_PROTOCOL))
+        _, unpickle_s = timed(lambda: pickle.loads(blob))
+        pickle_mb = len(blob) / 1024 / 1024
+        del blob
+
+        snapshotter = AgentSnapshotter(directory)
+        full, full_s = timed(lambda: snapshotter.save(agent))
+
+        send_campaign(agent, "campaign_increment", INCREMENT)
+        incremental, incremental_s = timed(lambda: snapshotter.save(agent))
+
+        restored, restore_s = timed(lambda: AgentSnapshotter(directory).load())
+        emails = restored.deployment_service.email_service
+        assert len(emails.emails) == EMAILS + INCREMENT
+        assert len(restored.deployment_service.customer_db.customers) == CUSTOMERS
+        assert len(emails.campaigns["campaign_increment"]) == INCREMENT
+
+        print(f"{'':28s}{'seconds':>10s}{'MiB written':>14s}")
+        print(f"{'pickle.dumps(agent)':28s}{pickle_s:>10.2f}{pickle_mb:>14.1f}")
+        print(f"{'pickle.loads':28s}{unpickle_s:>10.2f}{'':>14s}")
+        print(f"{'full snapshot':28s}{full_s:>10.2f}{full['bytes_written'] / 1024 / 1024:>14.1f}")
+        print(
+            f"{f'incremental (+{INCREMENT} emails)':28s}{incremental_s:>10.2f}"
+            f"{incremental['bytes_written'] / 1024 / 1024:>14.1f}"
+        )
+        print(f"{'restore':28s}{restore_s:>10.2f}{'':>14s}")
+        print(
+            f"\nIncremental snapshot wrote {incremental['chunks_written']} chunks "
+            f"({incremental['records_written']:,} records), reused {incremental['chunks_reused']}"
+        )
+        print("=" * 60)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
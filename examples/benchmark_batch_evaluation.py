@@ -0,0 +1,85 @@
+"""
+Benchmark: Batch Evaluation vs Per-Goal Evaluation
+
+Executes the same set of goals twice through RetailMarketingAgent.execute,
+once evaluating every goal with its own LLM call and once with
+EVAL_BATCH_SIZE goals per call, and compares evaluation round-trips, prompt
+and completion tokens (from the LLM metrics) and time spent evaluating.
+Runs offline: no real LLM requests are made.
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+# Allow running from the repository root without installing the package
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("LLM_PROVIDER", "fake")
+os.environ.setdefault("FAKE_LLM_LATENCY_MS", "400")
+os.environ.setdefault("FAKE_LLM_TOKENS_PER_SECOND", "2000")
+os.environ.setdefault("FAKE_LLM_RESPONSE_TOKENS", "150")
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+# Keep the client-side rate limiter out of the measurement
+os.environ.setdefault("LLM_REQUESTS_PER_MINUTE", "100000")
+os.environ.setdefault("LLM_TOKENS_PER_MINUTE", "100000000")
+
+from src.agents import RetailMarketingAgent
+from src.config.settings import settings
+from src.utils.llm_metrics import get_llm_metrics
+
+GOALS = 12
+GOAL_TYPES = ["customer_acquisition", "digital_presence", "customer_retention", "seasonal_campaign"]
+
+
+def run(batch_size: int):
+    """Execute GOALS goals and return the evaluation call-site totals"""
+    settings.evaluation.batch_size = batch_size
+    metrics = get_llm_metrics()
+    metrics.reset()
+
+    agent = RetailMarketingAgent(
+        client_name="Benchmark Store",
+        store_type="grocery",
+        has_online_store=True,
+        location="Springfield"
+    )
+    for i in range(GOALS):
+        agent.set_goal(GOAL_TYPES[i % len(GOAL_TYPES)], f"target {i}", "30 days")
+
+    start = time.perf_counter()
+    agent.execute()
+    elapsed = time.perf_counter() - start
+
+    totals = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+    for name, site in metrics.get_stats()["by_call_site"].items():
+        if name in ("agent.evaluate", "agent.evaluate_batch"):
+            for key in totals:
+                totals[key] += site[key]
+    totals["seconds"] = elapsed
+    return totals
+
+
+def main():
+    batch_size = max(2, int(os.environ.get("EVAL_BATCH_SIZE", str(GOALS))))
+    print("=" * 60)
+    print("Batch Evaluation Benchmark")
+    print(f"{GOALS} goals, batch size {batch_size}")
+    print("=" * 60)
+
+    per_goal = run(1)
+    batched = run(batch_size)
+
+    print(f"{'':22s}{'per-goal':>12s}{'batched':>12s}")
+    for key, label in (
+        ("calls", "evaluation round-trips"),
+        ("prompt_tokens", "prompt tokens"),
+        ("completion_tokens", "completion tokens"),
+        ("seconds", "execute() seconds")
+    ):
+        fmt = "{:>12.2f}" if key == "seconds" else "{:>12d}"
+        print(f"{label:22s}" + fmt.format(per_goal[key]) + fmt.format(batched[key]))
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark: Hedged Requests vs Plain Requests for Interactive Calls
+
+Generates campaign plans through RetailMarketingAgent.generate_marketing_plan
+(the /api/generate-campaign path) and streams campaigns through
+stream_promotion_campaign (the dashboard path) against the fake LLM provider,
+where a small fraction of calls hits a slow upstream. Each path runs once with
+hedging off and once with it on, then p50/p99 latency (full response for
+invoke, first chunk for streams) and the extra load are reported.
+Runs offline: no real LLM requests are made.
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from pathlib import Path
+
+# Allow running from the repository root without installing the package
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("LLM_PROVIDER", "fake")
+os.environ.setdefault("FAKE_LLM_LATENCY_MS", "150")
+os.environ.setdefault("FAKE_LLM_TOKENS_PER_SECOND", "2000")
+os.environ.setdefault("FAKE_LLM_RESPONSE_TOKENS", "200")
+os.environ.setdefault("FAKE_LLM_SLOW_RATE", "0.03")
+os.environ.setdefault("FAKE_LLM_SLOW_MS", "3000")
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+# Keep the client-side rate limiter out of the measurement
+os.environ.setdefault("LLM_REQUESTS_PER_MINUTE", "100000")
+os.environ.setdefault("LLM_TOKENS_PER_MINUTE", "100000000")
+
+from src.agents import RetailMarketingAgent
+from src.config.settings import settings
+from src.utils.hedging import hedging_policy
+
+CALLS = 200
+CONCURRENCY = 8
+
+
+def run_invoke(agent: RetailMarketingAgent, label: str):
+    def one(i: int):
+        agent.generate_marketing_plan(f"{label} shoppers wave {i}", budget=5000, hedge=True)
+
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as pool:
+        list(pool.map(one, range(CALLS)))
+
+
+def run_stream(agent: RetailMarketingAgent, label: str):
+    def one(i: int):
+        stream = agent.acquisition_module.stream_promotion_campaign(
+            target_audience=f"{label} shoppers wave {i}",
+            campaign_type="acquisition",
+            budget=5000.0,
+            duration_days=30,
+            store_context={"name": agent.client_name, "type": agent.store_type, "location": agent.location},
+            hedge=True
+        )
+        with closing(stream):
+            for _ in stream:
+                pass
+
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as pool:
+        list(pool.map(one, range(CALLS)))
+
+
+def main():
+    print("=" * 60)
+    print("Hedged Requests Benchmark")
+    print(
+        f"fake LLM: {os.environ['FAKE_LLM_LATENCY_MS']}ms to first token, "
+        f"{float(os.environ['FAKE_LLM_SLOW_RATE']) * 100:g}% of calls "
+        f"+{os.environ['FAKE_LLM_SLOW_MS']}ms"
+    )
+    print("=" * 60)
+
+    agent = RetailMarketingAgent(
+        client_name="Benchmark Store",
+        store_type="grocery",
+        has_online_store=True,
+        location="Springfield"
+    )
+
+    for kind, run in (("invoke", run_invoke), ("stream", run_stream)):
+        for enabled in (False, True):
+            settings.hedging.enabled = enabled
+            start = time.perf_counter()
+            run(agent, f"{kind}-{'on' if enabled else 'off'}")
+            print(f"{kind:6s} hedging {'on ' if enabled else 'off'}: {CALLS} calls in {time.perf_counter() - start:.1f}s")
+
+    stats = hedging_policy.stats()
+    print("\nLatency (invoke: full response, stream: first chunk)")
+    for kind, modes in stats["latency"].items():
+        for mode, values in modes.items():
+            print(f"   {kind:6s} {mode:11s} p50 {values['p50_ms']:8.1f} ms   p99 {values['p99_ms']:8.1f} ms")
+    print(
+        f"\nHedges: {stats['hedges']} of {stats['requests']} hedged requests "
+        f"(extra load {stats['extra_load'] * 100:.1f}%, cap {stats['max_extra_load'] * 100:g}%), "
+        f"{stats['hedge_wins']} won, {stats['budget_denied']} denied by the budget"
+    )
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
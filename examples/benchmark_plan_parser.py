@@ -0,0 +1,110 @@
+"""
+Benchmark: Streaming Plan Parser vs Parsing the Full Response
+
+1. Parser cost: parses a very long generated plan with the original
+   RetailMarketingAgent._parse_plan and with IncrementalPlanParser fed in
+   token-sized chunks, and checks both produce the same subtasks.
+2. Time to first subtask: runs plan() and stream_plan() against the fake LLM
+   provider, which streams at a fixed tokens/sec rate.
+Runs offline: no real LLM requests are made.
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+# Allow running from the repository root without installing the package
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("LLM_PROVIDER", "fake")
+os.environ.setdefault("FAKE_LLM_LATENCY_MS", "200")
+os.environ.setdefault("FAKE_LLM_TOKENS_PER_SECOND", "400")
+os.environ.setdefault("FAKE_LLM_RESPONSE_TOKENS", "1200")
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+
+from src.agents import RetailMarketingAgent, IncrementalPlanParser
+from src.agents.base_agent import Goal, GoalType
+
+PLAN_ITEMS = 20000
+CHUNK_SIZE = 4  # roughly one token
+
+
+def long_plan(items: int) -> str:
+    """A numbered plan with multi-line descriptions"""
+    lines = []
+    for i in range(1, items + 1):
+        lines.append(f"{i}. Task: Launch promotion wave {i}")
+        lines.append("   - Target new customers within 5 miles of the store")
+        lines.append("   - Budget: $250, channels: email and Instagram")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def parser_benchmark(agent: RetailMarketingAgent):
+    text = long_plan(PLAN_ITEMS)
+    chunks = [text[i:i + CHUNK_SIZE] for i in range(0, len(text), CHUNK_SIZE)]
+    print(f"\n1. Parser cost ({PLAN_ITEMS} items, {len(text):,} chars, {len(chunks):,} chunks)")
+
+    start = time.perf_counter()
+    full = agent._parse_plan("".join(chunks))
+    full_s = time.perf_counter() - start
+
+    parser = IncrementalPlanParser()
+    incremental = []
+    first_at = None
+    start = time.perf_counter()
+    for chunk in chunks:
+        completed = parser.feed(chunk)
+        if completed and first_at is None:
+            first_at = time.perf_counter() - start
+        incremental.extend(completed)
+    incremental.extend(parser.close())
+    incremental_s = time.perf_counter() - start
+
+    print(f"   _parse_plan on full text:      {full_s * 1000:8.1f} ms")
+    print(f"   IncrementalPlanParser (total): {incremental_s * 1000:8.1f} ms")
+    print(f"   First subtask available after: {first_at * 1000:8.3f} ms of parsing")
+    print(f"   Identical output:              {full == incremental}")
+
+
+def streaming_benchmark(agent: RetailMarketingAgent):
+    print(
+        f"\n2. Time to first subtask (fake LLM: {os.environ['FAKE_LLM_RESPONSE_TOKENS']} tokens "
+        f"at {os.environ['FAKE_LLM_TOKENS_PER_SECOND']} tokens/s)"
+    )
+
+    goal = Goal(GoalType.CUSTOMER_ACQUISITION, "Attract new customers", "100 new customers", "30 days")
+    start = time.perf_counter()
+    subtasks = agent.plan(goal)
+    plan_s = time.perf_counter() - start
+    print(f"   plan():        {len(subtasks)} subtasks, first and last at {plan_s:.2f}s")
+
+    goal = Goal(GoalType.CUSTOMER_ACQUISITION, "Attract new customers", "100 new customers", "30 days")
+    start = time.perf_counter()
+    first_s = None
+    count = 0
+    for _ in agent.stream_plan(goal):
+        count += 1
+        if first_s is None:
+            first_s = time.perf_counter() - start
+    stream_s = time.perf_counter() - start
+    print(f"   stream_plan(): {count} subtasks, first at {first_s:.2f}s, last at {stream_s:.2f}s")
+
+
+def main():
+    print("=" * 60)
+    print("Streaming Plan Parser Benchmark")
+    print("=" * 60)
+
+    agent = RetailMarketingAgent(
+        client_name="Benchmark Store",
+        store_type="grocery",
+        has_online_store=True,
+        location="Springfield"
+    )
+    parser_benchmark(agent)
+    streaming_benchmark(agent)
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark: Prompt Registry vs Rebuilding Templates Per Call
+
+Compares building every module prompt with ChatPromptTemplate.from_messages on
+each request (the old behaviour) against fetching it from the shared registry.
+Runs offline: no LLM requests are made.
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+# Allow running from the repository root without installing the package
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("LLM_PROVIDER", "fake")
+
+from src.modules import (
+    CustomerAcquisitionModule,
+    CustomerRetentionModule,
+    DigitalMarketingModule,
+    InStoreMarketingModule
+)
+from src.analytics import CustomerAnalyticsModule
+from src.utils.prompt_registry import prompt_registry
+
+ITERATIONS = 2000
+
+
+def prompt_builders():
+    """Collect every registered prompt builder on the module classes"""
+    builders = []
+    for module_class in (
+        CustomerAcquisitionModule,
+        CustomerRetentionModule,
+        DigitalMarketingModule,
+        InStoreMarketingModule,
+        CustomerAnalyticsModule
+    ):
+        for attr in dir(module_class):
+            builder = getattr(module_class, attr)
+            if attr.endswith("_prompt") and hasattr(builder, "__wrapped__"):
+                builders.append(builder)
+    return builders
+
+
+def timed(label, fn, calls):
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn()
+    elapsed = time.perf_counter() - start
+    per_call_us = elapsed / (ITERATIONS * calls) * 1_000_000
+    print(f"  {label:<28} {elapsed:8.3f}s total   {per_call_us:8.2f} µs/prompt")
+    return elapsed
+
+
+def main():
+    print("=" * 60)
+    print("Prompt Registry Microbenchmark")
+    print("=" * 60)
+
+    builders = prompt_builders()
+    print(f"\n{len(builders)} module prompts, {ITERATIONS} iterations each\n")
+
+    def rebuild():
+        for builder in builders:
+            builder.__wrapped__()
+
+    def registry():
+        for builder in builders:
+            builder()
+
+    prompt_registry.precompile()
+    baseline = timed("Rebuild per call", rebuild, len(builders))
+    cached = timed("Shared registry", registry, len(builders))
+    print(f"\n  Speedup: {baseline / cached:.1f}x")
+    print(f"  Registry: {prompt_registry.stats()}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
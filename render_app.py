@@ -19,7 +19,16 @@ from flask_cors import CORS
 from dotenv import load_dotenv
 
 # Import your existing agent
-from src.agents import RetailMarketingAgent, GoalType, GoalStatus
+from src.agents import RetailMarketingAgent, GoalType, GoalStatus, get_agent_pool, get_agent_pool_stats
+from src.utils.llm_cache import get_llm_cache
+from src.utils.llm_metrics import get_llm_metrics
+from src.utils.single_flight import get_single_flight_stats
+from src.utils.rate_limiter import get_rate_limiter_stats
+from src.utils.semantic_cache import get_semantic_cache
+from src.utils.result_compactor import result_compactor
+from src.utils.llm_helper import get_routing_stats
+from src.utils.hedging import get_hedging_stats
+from src.utils.job_queue import JobQueueFull, get_job_queue, get_job_queue_stats
 
 # Load environment variables
 load_dotenv()
@@ -40,8 +49,12 @@ CORS(app, resources={
     }
 })
 
-# Store agents in memory (use database in production)
-agents_store = {}
+# Per-tenant agents: bounded in memory, evicted ones are snapshotted to disk
+# and loaded back on their next request
+agent_pool = get_agent_pool()
+
+# Warm the LLM response cache from disk at startup (no-op unless LLM_CACHE_ENABLED)
+get_llm_cache()
 
 
 # =========================
@@ -58,8 +71,10 @@ def root():
             "/api/generate-campaign",
             "/api/execute-campaign",
             "/api/campaign-status/<campaign_id>",
+            "/api/jobs/<job_id>",
             "/api/agents",
-            "/api/agents/<agent_id>"
+            "/api/agents/<agent_id>",
+            "/api/metrics"
         ]
     }), 200
 
@@ -84,24 +99,37 @@ def initialize_agent():
                 "error": f"Missing required fields: {required_fields}"
             }), 400
 
+        # Unique per call, so two agents for one store never share goal checkpoints
+        agent_id = f"agent_{data['client_name'].replace(' ', '_')}_{datetime.now().timestamp()}"
         agent = RetailMarketingAgent(
             client_name=data.get('client_name'),
             store_type=data.get('store_type'),
             has_online_store=data.get('has_online_store', False),
-            location=data.get('location')
+            location=data.get('location'),
+            agent_id=agent_id
         )
 
-        agent_id = f"agent_{data['client_name'].replace(' ', '_')}_{datetime.now().timestamp()}"
-        agents_store[agent_id] = agent
+        # Subsystems are built on first use unless the caller asks for them now
+        # ("prewarm": true for all of them, or a list of subsystem names)
+        prewarm = data.get('prewarm', False)
+        prewarmed = {}
+        if prewarm:
+            prewarmed = agent.prewarm(prewarm if isinstance(prewarm, list) else None)
+
+        agent_pool.add(agent_id, agent)
 
         logger.info(f"Initialized agent: {agent_id}")
 
         return jsonify({
             "agent_id": agent_id,
             "status": "initialized",
+            "prewarmed": prewarmed,
             "timestamp": datetime.now().isoformat()
         }), 201
 
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
     except Exception as e:
         logger.error(str(e))
         return jsonify({"error": str(e)}), 500
@@ -115,21 +143,39 @@ def generate_campaign():
         if 'agent_id' not in data:
             return jsonify({"error": "Missing agent_id"}), 400
 
-        agent = agents_store.get(data['agent_id'])
+        agent_id = data['agent_id']
+        agent = agent_pool.acquire(agent_id)
         if not agent:
             return jsonify({"error": "Agent not found"}), 404
 
-        campaign = agent.generate_marketing_plan(
-            goal=data.get('target', 'Increase sales'),
-            budget=data.get('budget', 5000),
-            goal_type=data.get('goal_type', 'customer_acquisition')
+        goal_type = data.get('goal_type', 'customer_acquisition')
+
+        def generate(progress):
+            progress("generating")
+            campaign = agent.generate_marketing_plan(
+                goal=data.get('target', 'Increase sales'),
+                budget=data.get('budget', 5000),
+                goal_type=goal_type,
+                hedge=True
+            )
+            progress("saving")
+            draft = agent.save_campaign_draft(campaign, goal_type=goal_type)
+            return {
+                "campaign_id": draft["id"],
+                "campaign_plan": campaign
+            }
+
+        job = _submit_leased(
+            agent_id,
+            "generate_campaign",
+            generate,
+            stages=["generating", "saving"],
+            metadata={"agent_id": agent_id}
         )
+        return _job_accepted(job)
 
-        return jsonify({
-            "campaign_id": f"campaign_{datetime.now().timestamp()}",
-            "campaign_plan": campaign
-        }), 201
-
+    except JobQueueFull as e:
+        return _queue_full(e)
     except Exception as e:
         logger.error(str(e))
         return jsonify({"error": str(e)}), 500
@@ -143,50 +189,123 @@ def execute_campaign():
         if 'agent_id' not in data or 'campaign_id' not in data:
             return jsonify({"error": "Missing agent_id or campaign_id"}), 400
 
-        agent = agents_store.get(data['agent_id'])
+        agent_id = data['agent_id']
+        agent = agent_pool.acquire(agent_id)
         if not agent:
             return jsonify({"error": "Agent not found"}), 404
 
-        result = agent.execute_campaign(campaign_id=data['campaign_id'])
-
-        return jsonify({
-            "campaign_id": data['campaign_id'],
-            "status": "executing",
-            "result": result
-        }), 200
+        campaign_id = data['campaign_id']
+        job = _submit_leased(
+            agent_id,
+            "execute_campaign",
+            lambda progress: agent.execute_campaign(campaign_id=campaign_id, progress=progress),
+            stages=list(agent.CAMPAIGN_EXECUTION_STAGES),
+            metadata={"agent_id": agent_id, "campaign_id": campaign_id}
+        )
+        return _job_accepted(job)
 
+    except JobQueueFull as e:
+        return _queue_full(e)
     except Exception as e:
         logger.error(str(e))
         return jsonify({"error": str(e)}), 500
 
 
+def _submit_leased(agent_id, kind, fn, stages, metadata):
+    """Queue a job for an acquired agent, releasing it back to the pool when the job ends"""
+    def run(progress):
+        try:
+            return fn(progress)
+        finally:
+            agent_pool.release(agent_id)
+
+    try:
+        return get_job_queue().submit(kind, run, stages=stages, metadata=metadata)
+    except Exception:
+        agent_pool.release(agent_id)
+        raise
+
+
+def _job_accepted(job):
+    """202 response pointing at the job's status URL"""
+    response = jsonify({
+        **job.to_dict(),
+        "status_url": f"/api/jobs/{job.id}"
+    })
+    response.headers['Location'] = f"/api/jobs/{job.id}"
+    return response, 202
+
+
+def _queue_full(error):
+    """503 response when the job queue is full"""
+    response = jsonify({"error": "Too many jobs queued, retry later", "detail": str(error)})
+    response.headers['Retry-After'] = "5"
+    return response, 503
+
+
 @app.route('/api/campaign-status/<campaign_id>', methods=['GET'])
 def get_campaign_status(campaign_id):
+    """Progress of a job, by job id or by the campaign id it executes"""
+    queue = get_job_queue()
+    job = queue.get(campaign_id) or queue.find(campaign_id=campaign_id)
+    if job is None:
+        return jsonify({"error": "No job found", "campaign_id": campaign_id}), 404
+
     return jsonify({
-        "campaign_id": campaign_id,
-        "status": "in_progress",
-        "progress": 65,
+        **job.to_dict(),
+        "status_url": f"/api/jobs/{job.id}",
         "updated_at": datetime.now().isoformat()
     }), 200
 
 
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Job status, with the result once it has finished"""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found or expired"}), 404
+    return jsonify(job.to_dict(include_result=job.finished)), 200
+
+
 @app.route('/api/agents', methods=['GET'])
 def list_agents():
+    agent_ids = agent_pool.ids()
     return jsonify({
-        "total": len(agents_store),
-        "agents": list(agents_store.keys())
+        "total": len(agent_ids),
+        "agents": agent_ids
     }), 200
 
 
 @app.route('/api/agents/<agent_id>', methods=['GET'])
 def get_agent_info(agent_id):
-    agent = agents_store.get(agent_id)
-    if not agent:
+    # Reported without loading a snapshotted agent back into memory
+    state = agent_pool.state(agent_id)
+    if state is None:
         return jsonify({"error": "Agent not found"}), 404
 
     return jsonify({
         "agent_id": agent_id,
-        "status": "active"
+        "status": state
+    }), 200
+
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    metrics = get_llm_metrics()
+    semantic_cache = get_semantic_cache()
+    limit = request.args.get('limit', 50, type=int)
+    return jsonify({
+        "llm": metrics.get_stats(),
+        "single_flight": get_single_flight_stats(),
+        "rate_limiter": get_rate_limiter_stats(),
+        "semantic_cache": semantic_cache.get_stats() if semantic_cache is not None else None,
+        "result_compaction": result_compactor.stats(),
+        "routing": get_routing_stats(),
+        "hedging": get_hedging_stats(),
+        "jobs": get_job_queue_stats(),
+        "agent_pool": get_agent_pool_stats(),
+        "recent_calls": metrics.get_recent(limit),
+        "timestamp": datetime.now().isoformat()
     }), 200
 
 
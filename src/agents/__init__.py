@@ -1,13 +1,26 @@
 """
 Agents package initialization
 """
-from .base_agent import BaseAgent, Goal, GoalType, GoalStatus
+from .base_agent import BaseAgent, Goal, GoalStore, GoalType, GoalStatus
 from .retail_marketing_agent import RetailMarketingAgent
+from .plan_parser import IncrementalPlanParser
+from .goal_scheduler import GoalScheduler
+from .goal_pipeline import GoalPipeline
+from .agent_snapshot import AgentSnapshotter
+from .agent_pool import AgentPool, get_agent_pool, get_agent_pool_stats
 
 __all__ = [
     "BaseAgent",
     "Goal",
+    "GoalStore",
     "GoalType",
     "GoalStatus",
-    "RetailMarketingAgent"
+    "RetailMarketingAgent",
+    "IncrementalPlanParser",
+    "GoalScheduler",
+    "GoalPipeline",
+    "AgentSnapshotter",
+    "AgentPool",
+    "get_agent_pool",
+    "get_agent_pool_stats"
 ]
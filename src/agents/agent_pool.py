@@ -0,0 +1,442 @@
+"""
+Agent pool
+Bounded in-memory set of per-tenant agents that snapshots evicted agents to disk
+"""
+import atexit
+import base64
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .base_agent import BaseAgent
+from .agent_snapshot import AgentSnapshotter, record_counts
+from ..config.settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+# Snapshot bytes assumed per record (and per goal) until a snapshot has been measured
+DEFAULT_RECORD_BYTES = 200
+# Snapshot bytes assumed for an agent with no records or goals
+DEFAULT_CORE_BYTES = 2048
+
+
+def _counts(agent: BaseAgent) -> Dict[str, int]:
+    """Records per bulk collection plus goals: what an agent's size grows with"""
+    counts = record_counts(agent)
+    counts["goals"] = len(agent.goals)
+    return counts
+
+
+class _PoolEntry:
+    """
+    An agent held in memory, with its leases and estimated size
+
+    ``base_size`` is the agent's exact snapshot size when its record counts
+    were ``base_counts``; ``size`` adds the records and goals gained since.
+    """
+
+    __slots__ = ("agent", "size", "base_size", "base_counts", "leases", "last_used")
+
+    def __init__(
+        self,
+        agent: BaseAgent,
+        base_size: int,
+        base_counts: Dict[str, int],
+        leases: int = 0
+    ):
+        self.agent = agent
+        self.size = base_size
+        self.base_size = base_size
+        self.base_counts = base_counts
+        self.leases = leases
+        self.last_used = time.monotonic()
+
+
+class AgentPool:
+    """
+    Per-tenant agents with a cap on how many stay in memory
+
+    Agents are kept in least-recently-used order. When the pool holds more
+    than ``max_agents`` agents, or their total size goes over
+    ``memory_budget_bytes``, the least recently used idle agents are
+    snapshotted (``AgentSnapshotter``) to a directory of their own under
+    ``snapshot_dir`` and dropped from memory; agents unused for
+    ``idle_ttl_seconds`` are snapshotted as well. Acquiring an evicted agent
+    loads its snapshot back, so callers never see the difference apart from
+    the load time. An agent's size is that of its snapshot: measured exactly
+    whenever it is snapshotted or loaded, and in between estimated from the
+    records and goals it gained, at the bytes per record of the latest
+    snapshots. Agents are only snapshotted (and so measured) when the
+    estimates put the pool over budget; one that turns out to fit is kept.
+
+    Callers hold an agent between ``acquire`` and ``release`` (or inside
+    ``lease``); leased agents are never evicted, so a background job can
+    keep using its agent while the pool is under pressure. Snapshots stay
+    on disk after rehydration, and the next eviction of the rehydrated agent
+    only writes what changed since, so agents also survive a restart as of
+    their last snapshot (``flush`` snapshots every idle agent, and runs at
+    exit for the shared pool).
+    """
+
+    def __init__(
+        self,
+        max_agents: int = 100,
+        memory_budget_bytes: int = 256 * 1024 * 1024,
+        idle_ttl_seconds: float = 1800.0,
+        snapshot_dir: str = "agent_snapshots",
+        snapshot_chunk_records: int = 16384,
+        snapshot_max_segments: int = 16
+    ):
+        self.max_agents = max(1, max_agents)
+        self.memory_budget_bytes = memory_budget_bytes
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.snapshot_dir = snapshot_dir
+        self.snapshot_chunk_records = snapshot_chunk_records
+        self.snapshot_max_segments = snapshot_max_segments
+        os.makedirs(snapshot_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._agents: "OrderedDict[str, _PoolEntry]" = OrderedDict()
+        self._snapshotters: Dict[str, AgentSnapshotter] = {}
+        # Agents being written to or read from disk; acquirers wait for the event
+        self._transit: Dict[str, threading.Event] = {}
+        self._snapshotted = set(self._scan_snapshots())
+        self.hits = 0
+        self.misses = 0
+        self.rehydrations = 0
+        self.rehydrate_ms = 0.0
+        self.evictions = {"idle": 0, "capacity": 0, "memory": 0}
+        self.snapshots = {"full": 0, "incremental": 0}
+        self.snapshot_bytes_written = 0
+        # Snapshot bytes per record of each collection, and per goal, from the latest snapshots
+        self._record_bytes: Dict[str, float] = {}
+
+    def _snapshotter(self, agent_id: str) -> AgentSnapshotter:
+        with self._lock:
+            snapshotter = self._snapshotters.get(agent_id)
+            if snapshotter is None:
+                name = base64.urlsafe_b64encode(agent_id.encode()).decode().rstrip("=")
+                snapshotter = self._snapshotters[agent_id] = AgentSnapshotter(
+                    os.path.join(self.snapshot_dir, name),
+                    chunk_records=self.snapshot_chunk_records,
+                    max_segments=self.snapshot_max_segments
+                )
+            return snapshotter
+
+    def _scan_snapshots(self) -> Iterator[str]:
+        """Agent ids of the snapshots already on disk"""
+        for name in os.listdir(self.snapshot_dir):
+            try:
+                agent_id = base64.urlsafe_b64decode(name + "=" * (-len(name) % 4)).decode()
+            except ValueError:
+                continue
+            if AgentSnapshotter(os.path.join(self.snapshot_dir, name)).exists():
+                yield agent_id
+
+    def _measured(self, agent: BaseAgent, snapshot: Dict[str, Any]) -> Tuple[int, Dict[str, int]]:
+        """
+        Exact size and counts of an agent just snapshotted or loaded (caller holds the lock)
+
+        Also updates the bytes per record and per goal used for estimates.
+        """
+        counts = dict(snapshot["records"])
+        counts["goals"] = len(agent.goals)
+        for name, records in snapshot["records"].items():
+            if records:
+                self._record_bytes[name] = snapshot["collection_bytes"][name] / records
+        if counts["goals"]:
+            self._record_bytes["goals"] = snapshot["core_bytes"] / counts["goals"]
+        return snapshot["live_bytes"], counts
+
+    def _estimate(self, entry: _PoolEntry) -> int:
+        """An entry's exact size plus what it gained since (caller holds the lock)"""
+        gained = sum(
+            (count - entry.base_counts.get(name, 0)) * self._record_bytes.get(name, DEFAULT_RECORD_BYTES)
+            for name, count in _counts(entry.agent).items()
+        )
+        return max(0, int(entry.base_size + gained))
+
+    def _save_snapshot(self, agent_id: str, entry: _PoolEntry) -> Dict[str, Any]:
+        """Snapshot an entry's agent and reset its size to the exact one"""
+        snapshotter = self._snapshotter(agent_id)
+        result = snapshotter.save(entry.agent)
+        snapshot = snapshotter.stats()
+        with self._lock:
+            self._snapshotted.add(agent_id)
+            self.snapshots["full" if result["full"] else "incremental"] += 1
+            self.snapshot_bytes_written += result["bytes_written"]
+            entry.base_size, entry.base_counts = self._measured(entry.agent, snapshot)
+            entry.size = entry.base_size
+        return result
+
+    def add(self, agent_id: str, agent: BaseAgent):
+        """Add a new agent, replacing any agent or snapshot with the same id"""
+        entry = _PoolEntry(agent, DEFAULT_CORE_BYTES, {})
+        with self._lock:
+            entry.size = self._estimate(entry)
+            self._agents[agent_id] = entry
+            stale = agent_id in self._snapshotted
+            self._snapshotted.discard(agent_id)
+        if stale:
+            self._snapshotter(agent_id).delete()
+        self.sweep()
+
+    def acquire(self, agent_id: str) -> Optional[BaseAgent]:
+        """
+        Get an agent and keep it in memory until ``release``
+
+        Loads the agent from its snapshot if it was evicted.
+
+        Returns:
+            The agent, or None if the pool has never held one with this id
+        """
+        while True:
+            with self._lock:
+                entry = self._agents.get(agent_id)
+                if entry is not None:
+                    entry.leases += 1
+                    entry.last_used = time.monotonic()
+                    self._agents.move_to_end(agent_id)
+                    self.hits += 1
+                    return entry.agent
+                event = self._transit.get(agent_id)
+                if event is None:
+                    if agent_id not in self._snapshotted:
+                        self.misses += 1
+                        return None
+                    event = self._transit[agent_id] = threading.Event()
+                    break
+            # Another thread is snapshotting or loading this agent
+            event.wait()
+
+        started = time.perf_counter()
+        snapshotter = self._snapshotter(agent_id)
+        try:
+            agent = snapshotter.load()
+            snapshot = snapshotter.stats()
+        except BaseException:
+            with self._lock:
+                del self._transit[agent_id]
+            event.set()
+            raise
+        with self._lock:
+            size, counts = self._measured(agent, snapshot)
+            self._agents[agent_id] = _PoolEntry(agent, size, counts, leases=1)
+            del self._transit[agent_id]
+            self.rehydrations += 1
+            self.rehydrate_ms += (time.perf_counter() - started) * 1000
+        event.set()
+        logger.info(f"Rehydrated agent {agent_id} from snapshot ({size} bytes)")
+        self.sweep()
+        return agent
+
+    def release(self, agent_id: str):
+        """Return a leased agent, updating its estimated size"""
+        with self._lock:
+            entry = self._agents.get(agent_id)
+            if entry is None:
+                return
+            entry.leases = max(0, entry.leases - 1)
+            entry.last_used = time.monotonic()
+            entry.size = self._estimate(entry)
+        self.sweep()
+
+    @contextmanager
+    def lease(self, agent_id: str) -> Iterator[BaseAgent]:
+        """
+        Hold an agent for the duration of a block
+
+        Raises:
+            KeyError: If the pool has never held an agent with this id
+        """
+        agent = self.acquire(agent_id)
+        if agent is None:
+            raise KeyError(agent_id)
+        try:
+            yield agent
+        finally:
+            self.release(agent_id)
+
+    def sweep(self) -> int:
+        """
+        Snapshot idle agents that are past the idle TTL or over the pool's limits
+
+        Agents over the agent cap or idle TTL are evicted outright. While the
+        estimated sizes are over the memory budget, the least recently used
+        idle agent is snapshotted, which measures it exactly; it is evicted
+        unless the pool fits the budget with its exact size.
+
+        Returns:
+            Number of agents evicted
+        """
+        now = time.monotonic()
+        victims = []
+        with self._lock:
+            count = len(self._agents)
+            for agent_id, entry in list(self._agents.items()):
+                if entry.leases:
+                    continue
+                if now - entry.last_used >= self.idle_ttl_seconds:
+                    reason = "idle"
+                elif count > self.max_agents:
+                    reason = "capacity"
+                else:
+                    continue
+                self._take(agent_id)
+                count -= 1
+                victims.append((agent_id, entry, reason))
+
+        evicted = sum(self._evict(agent_id, entry, reason) for agent_id, entry, reason in victims)
+        while True:
+            with self._lock:
+                if sum(entry.size for entry in self._agents.values()) <= self.memory_budget_bytes:
+                    break
+                candidate = next(
+                    ((agent_id, entry) for agent_id, entry in self._agents.items() if not entry.leases), None
+                )
+                if candidate is None:
+                    break
+                self._take(candidate[0])
+            if not self._evict(*candidate, "memory"):
+                break
+            evicted += 1
+        return evicted
+
+    def _take(self, agent_id: str) -> _PoolEntry:
+        """Move an agent out of memory into transit (caller holds the lock)"""
+        self._transit[agent_id] = threading.Event()
+        return self._agents.pop(agent_id)
+
+    def _restore(self, agent_id: str, entry: _PoolEntry):
+        """Put an agent taken for eviction back as least recently used (caller holds the lock)"""
+        self._agents[agent_id] = entry
+        self._agents.move_to_end(agent_id, last=False)
+        self._transit.pop(agent_id).set()
+
+    def _evict(self, agent_id: str, entry: _PoolEntry, reason: str) -> bool:
+        """Snapshot an agent taken out of memory; returns whether it stays evicted"""
+        try:
+            result = self._save_snapshot(agent_id, entry)
+        except Exception as e:
+            # Keep the agent rather than lose it
+            logger.error(f"Could not snapshot agent {agent_id}: {e}")
+            with self._lock:
+                self._restore(agent_id, entry)
+            return False
+        with self._lock:
+            others = sum(other.size for other in self._agents.values())
+            if reason == "memory" and others + entry.size <= self.memory_budget_bytes:
+                # Its estimate was too high; the snapshot still saves work on the next eviction
+                self._restore(agent_id, entry)
+                return False
+            self.evictions[reason] += 1
+            self._transit.pop(agent_id).set()
+        logger.info(
+            f"Evicted agent {agent_id} ({reason}, "
+            f"{'full' if result['full'] else 'incremental'} snapshot of {result['bytes_written']} bytes)"
+        )
+        return True
+
+    def flush(self) -> int:
+        """Write a snapshot of every idle agent, keeping them in memory; returns the count"""
+        with self._lock:
+            idle = [(agent_id, entry) for agent_id, entry in self._agents.items() if not entry.leases]
+        written = 0
+        for agent_id, entry in idle:
+            try:
+                self._save_snapshot(agent_id, entry)
+            except Exception as e:
+                logger.error(f"Could not snapshot agent {agent_id}: {e}")
+                continue
+            written += 1
+        return written
+
+    def remove(self, agent_id: str) -> bool:
+        """Forget an agent and delete its snapshot; returns whether it existed"""
+        with self._lock:
+            found = self._agents.pop(agent_id, None) is not None
+            snapshotted = agent_id in self._snapshotted
+            self._snapshotted.discard(agent_id)
+        if snapshotted:
+            self._snapshotter(agent_id).delete()
+        with self._lock:
+            self._snapshotters.pop(agent_id, None)
+        return found or snapshotted
+
+    def state(self, agent_id: str) -> Optional[str]:
+        """Where an agent is: "active" (in memory), "snapshotted" (on disk) or None if unknown"""
+        with self._lock:
+            if agent_id in self._agents:
+                return "active"
+            if agent_id in self._snapshotted or agent_id in self._transit:
+                return "snapshotted"
+        return None
+
+    def ids(self) -> List[str]:
+        """Ids of every agent, in memory or snapshotted"""
+        with self._lock:
+            return list(self._agents) + [i for i in self._snapshotted if i not in self._agents]
+
+    def __contains__(self, agent_id: object) -> bool:
+        return self.state(agent_id) is not None
+
+    def __len__(self) -> int:
+        return len(self.ids())
+
+    def stats(self) -> Dict[str, Any]:
+        """Get pool occupancy, eviction and rehydration counts"""
+        with self._lock:
+            in_memory = len(self._agents)
+            memory_bytes = sum(entry.size for entry in self._agents.values())
+            return {
+                "max_agents": self.max_agents,
+                "memory_budget_bytes": self.memory_budget_bytes,
+                "idle_ttl_seconds": self.idle_ttl_seconds,
+                "in_memory": in_memory,
+                "leased": sum(1 for entry in self._agents.values() if entry.leases),
+                "snapshotted": len(self._snapshotted - set(self._agents)),
+                "memory_bytes": memory_bytes,
+                "occupancy": round(in_memory / self.max_agents, 3),
+                "memory_utilization": round(memory_bytes / self.memory_budget_bytes, 3)
+                if self.memory_budget_bytes else None,
+                "hits": self.hits,
+                "misses": self.misses,
+                "rehydrations": self.rehydrations,
+                "avg_rehydrate_ms": round(self.rehydrate_ms / self.rehydrations, 2)
+                if self.rehydrations else None,
+                "evictions": dict(self.evictions),
+                "snapshots": dict(self.snapshots),
+                "snapshot_bytes_written": self.snapshot_bytes_written
+            }
+
+
+_agent_pool: Optional[AgentPool] = None
+_agent_pool_lock = threading.Lock()
+
+
+def get_agent_pool() -> AgentPool:
+    """Get the shared agent pool, creating it from settings on first use"""
+    global _agent_pool
+    if _agent_pool is None:
+        with _agent_pool_lock:
+            if _agent_pool is None:
+                config = settings.agent_pool
+                _agent_pool = AgentPool(
+                    max_agents=config.max_agents,
+                    memory_budget_bytes=config.memory_budget_bytes,
+                    idle_ttl_seconds=config.idle_ttl_seconds,
+                    snapshot_dir=config.snapshot_dir,
+                    snapshot_chunk_records=config.snapshot_chunk_records,
+                    snapshot_max_segments=config.snapshot_max_segments
+                )
+                atexit.register(_agent_pool.flush)
+    return _agent_pool
+
+
+def get_agent_pool_stats() -> Dict[str, Any]:
+    """Get agent pool occupancy and eviction counts"""
+    return get_agent_pool().stats()
@@ -0,0 +1,398 @@
+"""
+Agent snapshots
+Incremental binary snapshot and restore of a RetailMarketingAgent's full state
+"""
+import dataclasses
+import gc
+import io
+import itertools
+import operator
+import os
+import pickle
+import shutil
+import struct
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .retail_marketing_agent import RetailMarketingAgent
+from ..services.mock_customers import MockCustomer
+from ..services.mock_email import MockEmail
+from ..services.mock_social import MockSocialPost, MockSocialComment
+
+
+# Bulk collections of the deployment service, written in chunks of records:
+# name -> (attribute path from the service, record class, values are lists of records)
+COLLECTIONS: Dict[str, Tuple[Tuple[str, ...], type, bool]] = {
+    "customers": (("customer_db", "customers"), MockCustomer, False),
+    "emails": (("email_service", "emails"), MockEmail, False),
+    "posts": (("social_service", "posts"), MockSocialPost, False),
+    "comments": (("social_service", "comments"), MockSocialComment, True)
+}
+
+# Indexes not written at all but rebuilt from a collection on restore:
+# name -> (attribute path from the service, collection, record field the index is keyed by)
+INDEXES: Dict[str, Tuple[Tuple[str, ...], str, str]] = {
+    "email_campaigns": (("email_service", "campaigns"), "emails", "campaign_id"),
+    "post_campaigns": (("social_service", "campaigns"), "posts", "campaign_id")
+}
+
+FORMAT_VERSION = 1
+
+# Segment file: magic, header length, buffer count, buffer lengths, header pickle, buffers
+_MAGIC = b"RMASNAP\x01"
+_PREFIX = struct.Struct("<8sQI")
+
+
+def _resolve(service: Any, path: Tuple[str, ...]) -> Any:
+    for name in path:
+        service = getattr(service, name)
+    return service
+
+
+def record_counts(agent: RetailMarketingAgent) -> Dict[str, int]:
+    """Records in each bulk collection, without building the deployment service"""
+    service = agent.built_subsystem("deployment_service")
+    if service is None:
+        return {}
+    return {name: len(_resolve(service, path)) for name, (path, _, _) in COLLECTIONS.items()}
+
+
+def _fields(record_class: type) -> Tuple[str, ...]:
+    return tuple(f.name for f in dataclasses.fields(record_class))
+
+
+@contextmanager
+def _gc_paused() -> Iterator[None]:
+    """Hold off cyclic garbage collection, which a million new records would trigger over and over"""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _builder(record_class: type, fields: Tuple[str, ...]) -> Callable[[List[tuple]], List[Any]]:
+    """Turns rows written with ``fields`` into records of the current record class"""
+    if tuple(fields) == _fields(record_class):
+        return lambda rows: list(itertools.starmap(record_class, rows))
+    # Written by a version of the record class with other fields
+    return lambda rows: [record_class(**dict(zip(fields, row))) for row in rows]
+
+
+class _CorePickler(pickle.Pickler):
+    """Pickles the agent with its bulk collections replaced by their names"""
+
+    def __init__(self, file: io.BytesIO, external: Dict[int, str]):
+        super().__init__(file, protocol=5)
+        self._external = external
+
+    def persistent_id(self, obj: Any) -> Optional[str]:
+        return self._external.get(id(obj))
+
+
+class _CoreUnpickler(pickle.Unpickler):
+    """Unpickles the agent, putting back restored collections and rebuilt indexes"""
+
+    def __init__(self, file: io.BytesIO, collections: Dict[str, Dict[str, Any]]):
+        super().__init__(file)
+        self._collections = collections
+
+    def persistent_load(self, pid: str) -> Any:
+        if pid in self._collections:
+            return self._collections[pid]
+        if pid not in INDEXES:
+            raise pickle.UnpicklingError(f"Unknown snapshot collection: {pid}")
+        _, source, field = INDEXES[pid]
+        index: Dict[str, List[str]] = {}
+        for key, record in self._collections[source].items():
+            index.setdefault(getattr(record, field), []).append(key)
+        return index
+
+
+class AgentSnapshotter:
+    """
+    Incremental snapshots of one agent in a directory
+
+    A snapshot is a pickle protocol 5 stream whose large parts travel as
+    out-of-band buffers: the customers, emails, posts and comments of the
+    deployment service are cut into chunks of ``chunk_records`` records,
+    each pickled as rows of field values (no per-record field names or
+    class references), and the rest of the agent (goals, memory, campaigns)
+    is pickled as a small "core" that refers to those collections by name.
+    Campaign-to-email and campaign-to-post indexes are rebuilt on restore.
+
+    Each ``save`` writes one segment file holding the new chunks, the core
+    and a manifest of every chunk of the snapshot, possibly in earlier
+    segments. Mock records are never changed after they are created, so
+    when the same agent object is saved again only chunks with records added
+    since are written; a collection whose full chunks no longer end on
+    the same keys (records removed) is written again from that point. A
+    full snapshot is written for a different agent object, with
+    ``full=True``, or once earlier segments hold more superseded bytes than
+    live ones or there are more than ``max_segments`` of them; segments the
+    latest manifest no longer refers to are deleted. Records changed in
+    place outside the services need ``full=True`` to be picked up.
+    """
+
+    def __init__(self, directory: str, chunk_records: int = 16384, max_segments: int = 16):
+        self.directory = directory
+        self.chunk_records = max(1, chunk_records)
+        self.max_segments = max(1, max_segments)
+        self._lock = threading.Lock()
+        self._manifest: Optional[Dict[str, Any]] = None
+        # Agent the latest manifest describes, if this process saved or loaded it
+        self._base: Optional[weakref.ref] = None
+
+    def _segment_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"{generation:010d}.seg")
+
+    def _generations(self) -> List[int]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            int(name[:-4]) for name in os.listdir(self.directory)
+            if name.endswith(".seg") and name[:-4].isdigit()
+        )
+
+    def exists(self) -> bool:
+        return bool(self._generations())
+
+    def _write_segment(self, generation: int, payload: Dict[str, Any]) -> int:
+        buffers: List[pickle.PickleBuffer] = []
+        header = pickle.dumps(payload, protocol=5, buffer_callback=buffers.append)
+        raw = [buffer.raw() for buffer in buffers]
+        path = self._segment_path(generation)
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(_PREFIX.pack(_MAGIC, len(header), len(raw)))
+            f.write(struct.pack(f"<{len(raw)}Q", *(view.nbytes for view in raw)))
+            f.write(header)
+            for view in raw:
+                f.write(view)
+        os.replace(tmp, path)
+        return os.path.getsize(path)
+
+    def _read_segment(self, generation: int, header_only: bool = False) -> Dict[str, Any]:
+        with open(self._segment_path(generation), "rb") as f:
+            magic, header_size, count = _PREFIX.unpack(f.read(_PREFIX.size))
+            if magic != _MAGIC:
+                raise ValueError(f"Not an agent snapshot segment: {self._segment_path(generation)}")
+            sizes = struct.unpack(f"<{count}Q", f.read(8 * count))
+            header = f.read(header_size)
+            if header_only:
+                # Out-of-band buffers are not needed to read the manifest
+                return pickle.loads(header, buffers=[b""] * count)
+            data = memoryview(f.read())
+        buffers, offset = [], 0
+        for size in sizes:
+            buffers.append(data[offset:offset + size])
+            offset += size
+        return pickle.loads(header, buffers=buffers)
+
+    def _latest_manifest(self) -> Optional[Dict[str, Any]]:
+        if self._manifest is None:
+            generations = self._generations()
+            if generations:
+                self._manifest = self._read_segment(generations[-1], header_only=True)["manifest"]
+        return self._manifest
+
+    def _needs_compaction(self, manifest: Dict[str, Any]) -> bool:
+        """Whether the segments hold more superseded bytes than live ones, are too many, or are gone"""
+        refs = [manifest["core"]] + [chunk for chunks in manifest["collections"].values() for chunk in chunks]
+        segments = {ref[0] for ref in refs}
+        if len(segments) > self.max_segments:
+            return True
+        live = sum(ref[2] for ref in refs)
+        try:
+            on_disk = sum(os.path.getsize(self._segment_path(g)) for g in segments)
+        except OSError:
+            # Removed behind our back; nothing on disk can be reused
+            return True
+        return on_disk - live > live
+
+    def _write_collection(
+        self,
+        records: Dict[str, Any],
+        record_class: type,
+        grouped: bool,
+        previous: List[List[Any]],
+        put
+    ) -> Tuple[List[List[Any]], int]:
+        """Chunk a collection, reusing previous full chunks that still match; returns (chunks, records written)"""
+        keys = list(records)
+        values = list(records.values())
+        chunks, start = [], 0
+        for chunk in previous:
+            count, last_key = chunk[3], chunk[4]
+            end = start + count
+            if end > len(keys) or keys[end - 1] != last_key:
+                break
+            if count < self.chunk_records and end < len(keys):
+                # Partial chunk that has since gained records; write it again with them
+                break
+            chunks.append(chunk)
+            start = end
+        fields = _fields(record_class)
+        row = operator.attrgetter(*fields)
+        for i in range(start, len(keys), self.chunk_records):
+            chunk_keys = keys[i:i + self.chunk_records]
+            chunk_values = values[i:i + self.chunk_records]
+            if grouped:
+                rows = [[row(record) for record in group] for group in chunk_values]
+            else:
+                rows = list(map(row, chunk_values))
+            data = pickle.dumps((fields, chunk_keys, rows), protocol=5)
+            chunks.append(put(data) + [len(chunk_keys), chunk_keys[-1]])
+        return chunks, len(keys) - start
+
+    def save(self, agent: RetailMarketingAgent, full: bool = False) -> Dict[str, Any]:
+        """
+        Write a snapshot of the agent
+
+        The agent must not be changed by other threads while it is saved.
+
+        Args:
+            agent: Agent to snapshot
+            full: Write every chunk even if an earlier snapshot of this agent has it
+
+        Returns:
+            Generation written, whether it was full, bytes, chunks and records
+            written, chunks reused from earlier segments and seconds taken
+        """
+        started = time.perf_counter()
+        with self._lock, _gc_paused():
+            os.makedirs(self.directory, exist_ok=True)
+            previous = self._latest_manifest()
+            if (
+                previous is None
+                or self._base is None
+                or self._base() is not agent
+                or self._needs_compaction(previous)
+            ):
+                full = True
+            generations = self._generations()
+            generation = (generations[-1] if generations else 0) + 1
+            buffers: List[pickle.PickleBuffer] = []
+
+            def put(data: bytes) -> List[Any]:
+                buffers.append(pickle.PickleBuffer(data))
+                return [generation, len(buffers) - 1, len(data)]
+
+            collections: Dict[str, List[List[Any]]] = {}
+            external: Dict[int, str] = {}
+            records_written = 0
+            service = agent.built_subsystem("deployment_service")
+            if service is not None:
+                for name, (path, record_class, grouped) in COLLECTIONS.items():
+                    records = _resolve(service, path)
+                    external[id(records)] = name
+                    earlier = [] if full else previous["collections"].get(name, [])
+                    collections[name], written = self._write_collection(
+                        records, record_class, grouped, earlier, put
+                    )
+                    records_written += written
+                for name, (path, _, _) in INDEXES.items():
+                    external[id(_resolve(service, path))] = name
+            chunks_written = len(buffers)
+
+            core = io.BytesIO()
+            _CorePickler(core, external).dump(agent)
+            manifest = {"core": put(core.getvalue()), "collections": collections}
+            size = self._write_segment(generation, {
+                "format": FORMAT_VERSION,
+                "generation": generation,
+                "created_at": datetime.now().isoformat(),
+                "full": full,
+                "manifest": manifest,
+                "buffers": buffers
+            })
+
+            self._manifest = manifest
+            self._base = weakref.ref(agent)
+            live = {generation} | {chunk[0] for chunks in collections.values() for chunk in chunks}
+            for old in generations:
+                if old not in live:
+                    os.remove(self._segment_path(old))
+            return {
+                "generation": generation,
+                "full": full,
+                "bytes_written": size,
+                "chunks_written": chunks_written,
+                "chunks_reused": sum(len(chunks) for chunks in collections.values()) - chunks_written,
+                "records_written": records_written,
+                "seconds": round(time.perf_counter() - started, 4)
+            }
+
+    def load(self) -> RetailMarketingAgent:
+        """
+        Restore the agent from the latest snapshot
+
+        Raises:
+            FileNotFoundError: If the directory holds no snapshot
+        """
+        with self._lock, _gc_paused():
+            generations = self._generations()
+            if not generations:
+                raise FileNotFoundError(f"No agent snapshot in {self.directory}")
+            latest = self._read_segment(generations[-1])
+            if latest["format"] != FORMAT_VERSION:
+                raise ValueError(f"Unsupported agent snapshot format: {latest['format']}")
+            manifest = latest["manifest"]
+            segments = {generations[-1]: latest["buffers"]}
+            for chunks in manifest["collections"].values():
+                for generation, *_ in chunks:
+                    if generation not in segments:
+                        segments[generation] = self._read_segment(generation)["buffers"]
+
+            collections: Dict[str, Dict[str, Any]] = {}
+            for name, chunks in manifest["collections"].items():
+                _, record_class, grouped = COLLECTIONS[name]
+                records: Dict[str, Any] = {}
+                for generation, index, *_ in chunks:
+                    fields, keys, rows = pickle.loads(segments[generation][index])
+                    build = _builder(record_class, fields)
+                    if grouped:
+                        records.update(zip(keys, map(build, rows)))
+                    else:
+                        records.update(zip(keys, build(rows)))
+                collections[name] = records
+
+            generation, index, _ = manifest["core"]
+            agent = _CoreUnpickler(io.BytesIO(segments[generation][index]), collections).load()
+            self._manifest = manifest
+            self._base = weakref.ref(agent)
+            return agent
+
+    def delete(self):
+        """Remove every snapshot of the agent"""
+        with self._lock:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self._manifest = None
+            self._base = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the segments on disk and the bytes the latest snapshot refers to, in total and per part"""
+        with self._lock:
+            generations = self._generations()
+            manifest = self._latest_manifest() or {"core": [None, None, 0], "collections": {}}
+            collection_bytes = {
+                name: sum(chunk[2] for chunk in chunks) for name, chunks in manifest["collections"].items()
+            }
+            return {
+                "directory": self.directory,
+                "generation": generations[-1] if generations else None,
+                "segments": len(generations),
+                "disk_bytes": sum(os.path.getsize(self._segment_path(g)) for g in generations),
+                "live_bytes": manifest["core"][2] + sum(collection_bytes.values()),
+                "core_bytes": manifest["core"][2],
+                "collection_bytes": collection_bytes,
+                "records": {
+                    name: sum(chunk[3] for chunk in chunks) for name, chunks in manifest["collections"].items()
+                }
+            }
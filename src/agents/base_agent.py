@@ -1,11 +1,16 @@
 """
 Base Agent class for all marketing agents
 """
+import asyncio
+import threading
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any, Optional
+from types import MappingProxyType
+from typing import Dict, Iterator, List, Any, Mapping, Optional, Union
 from datetime import datetime
 from enum import Enum
 
+from ..utils.tiered_memory import TieredMemory, create_agent_memory
+
 
 class GoalType(Enum):
     """Types of marketing goals"""
@@ -37,7 +42,8 @@ class Goal:
         target: str,
         timeframe: str,
         metrics: Optional[Dict[str, Any]] = None,
-        priority: int = 1
+        priority: int = 1,
+        depends_on: Optional[List[str]] = None
     ):
         self.id = self._generate_id()
         self.goal_type = goal_type
@@ -45,13 +51,67 @@ class Goal:
         self.target = target
         self.timeframe = timeframe
         self.metrics = metrics or {}
-        self.priority = priority
+        self._priority = priority
+        # IDs of goals that must complete before this one runs
+        self.depends_on: List[str] = list(depends_on or [])
         self.status = GoalStatus.PENDING
         self.created_at = datetime.now()
         self.started_at: Optional[datetime] = None
         self.completed_at: Optional[datetime] = None
-        self.results: Dict[str, Any] = {}
+        self._results: Optional[Dict[str, Any]] = {}
         self.subtasks: List[Dict[str, Any]] = []
+        # Store indexing this goal, told about status changes
+        self._store: Optional["GoalStore"] = None
+        # Agent memory holding the results once they are archived
+        self._memory: Optional[TieredMemory] = None
+    
+    @property
+    def priority(self) -> int:
+        """Scheduling priority, higher first; setting it updates the store's priority index"""
+        return self._priority
+    
+    @priority.setter
+    def priority(self, value: int):
+        self._priority = value
+        if self._store is not None:
+            self._store._priority_changed(self)
+    
+    @property
+    def results(self) -> Mapping[str, Any]:
+        """
+        Execution and evaluation results, read back from agent memory once archived
+        
+        Archived results are read-only (a copy may have been spilled to disk);
+        use add_result to change them.
+        """
+        if self._results is not None:
+            return self._results
+        return MappingProxyType(self._memory.get(self._results_key, {}))
+    
+    @results.setter
+    def results(self, value: Dict[str, Any]):
+        if self._memory is not None:
+            self._memory.delete(self._results_key)
+            self._memory = None
+        self._results = value
+    
+    @property
+    def _results_key(self) -> str:
+        return f"goal_results:{self.id}"
+    
+    def _peek_results(self) -> Dict[str, Any]:
+        """Copy of the results that leaves archived ones where they are in agent memory"""
+        if self._results is not None:
+            return dict(self._results)
+        return dict(self._memory.peek(self._results_key, {}))
+    
+    def archive_results(self, memory: TieredMemory):
+        """Move the results into agent memory, where they are spilled to disk when cold"""
+        if self._results is None:
+            return
+        memory.set(self._results_key, self._results)
+        self._memory = memory
+        self._results = None
     
     def _generate_id(self) -> str:
         """Generate unique goal ID"""
@@ -68,10 +128,17 @@ class Goal:
             self.started_at = datetime.now()
         elif status == GoalStatus.COMPLETED:
             self.completed_at = datetime.now()
+        if self._store is not None:
+            self._store._status_changed(self)
     
     def add_result(self, key: str, value: Any):
         """Add a result to the goal"""
-        self.results[key] = value
+        if self._results is not None:
+            self._results[key] = value
+            return
+        results = dict(self._memory.get(self._results_key, {}))
+        results[key] = value
+        self._memory.set(self._results_key, results)
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert goal to dictionary"""
@@ -83,13 +150,167 @@ class Goal:
             "timeframe": self.timeframe,
             "metrics": self.metrics,
             "priority": self.priority,
+            "depends_on": self.depends_on,
             "status": self.status.value,
             "created_at": self.created_at.isoformat(),
             "started_at": self.started_at.isoformat() if self.started_at else None,
             "completed_at": self.completed_at.isoformat() if self.completed_at else None,
-            "results": self.results,
+            "results": self._peek_results(),
             "subtasks": self.subtasks
         }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Goal":
+        """Rebuild a goal from to_dict output, keeping its id, status and results"""
+        goal = cls(
+            goal_type=GoalType(data["goal_type"]),
+            description=data["description"],
+            target=data["target"],
+            timeframe=data["timeframe"],
+            metrics=data.get("metrics"),
+            priority=data.get("priority", 1),
+            depends_on=data.get("depends_on")
+        )
+        goal.id = data["id"]
+        goal.status = GoalStatus(data["status"])
+        goal.created_at = datetime.fromisoformat(data["created_at"])
+        if data.get("started_at"):
+            goal.started_at = datetime.fromisoformat(data["started_at"])
+        if data.get("completed_at"):
+            goal.completed_at = datetime.fromisoformat(data["completed_at"])
+        goal.results = data.get("results", {})
+        goal.subtasks = data.get("subtasks", [])
+        return goal
+
+
+class GoalStore:
+    """
+    Agent goals indexed by id, status, type and priority
+
+    Iterates, indexes and has a length like the list of goals it replaces,
+    in the order goals were added. Status and priority lookups and counts
+    come from indexes that ``Goal.update_status`` and the ``Goal.priority``
+    setter keep current, so they cost the
+    size of the answer (or O(1) for counts) instead of a scan of every goal
+    the agent has ever had.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._ordered: List[Goal] = []
+        self._by_id: Dict[str, Goal] = {}
+        self._seq: Dict[str, int] = {}
+        self._status_of: Dict[str, GoalStatus] = {}
+        self._by_status: Dict[GoalStatus, Dict[str, Goal]] = {status: {} for status in GoalStatus}
+        self._by_type: Dict[GoalType, Dict[str, Goal]] = {goal_type: {} for goal_type in GoalType}
+        self._priority_of: Dict[str, int] = {}
+        self._by_priority: Dict[int, Dict[str, Goal]] = {}
+
+    def add(self, goal: Goal):
+        """Add a goal and start tracking its status"""
+        with self._lock:
+            if goal.id in self._by_id:
+                raise ValueError(f"Goal {goal.id} is already in the store")
+            self._seq[goal.id] = len(self._ordered)
+            self._ordered.append(goal)
+            self._by_id[goal.id] = goal
+            self._status_of[goal.id] = goal.status
+            self._by_status[goal.status][goal.id] = goal
+            self._by_type[goal.goal_type][goal.id] = goal
+            self._priority_of[goal.id] = goal.priority
+            self._by_priority.setdefault(goal.priority, {})[goal.id] = goal
+            goal._store = self
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    def _status_changed(self, goal: Goal):
+        """Move a goal to the index of its current status"""
+        with self._lock:
+            previous = self._status_of.get(goal.id)
+            if previous is None or previous == goal.status:
+                return
+            del self._by_status[previous][goal.id]
+            self._by_status[goal.status][goal.id] = goal
+            self._status_of[goal.id] = goal.status
+
+    def _priority_changed(self, goal: Goal):
+        """Move a goal to the index of its current priority"""
+        with self._lock:
+            previous = self._priority_of.get(goal.id)
+            if previous is None or previous == goal.priority:
+                return
+            del self._by_priority[previous][goal.id]
+            if not self._by_priority[previous]:
+                del self._by_priority[previous]
+            self._by_priority.setdefault(goal.priority, {})[goal.id] = goal
+            self._priority_of[goal.id] = goal.priority
+
+    def _in_order(self, goals: List[Goal]) -> List[Goal]:
+        return sorted(goals, key=lambda g: self._seq[g.id])
+
+    def get(self, goal_id: str) -> Optional[Goal]:
+        """Get a goal by id"""
+        return self._by_id.get(goal_id)
+
+    def by_status(self, *statuses: GoalStatus) -> List[Goal]:
+        """Goals in any of the given statuses, in the order they were added"""
+        with self._lock:
+            goals = [g for status in statuses for g in self._by_status[status].values()]
+        return self._in_order(goals)
+
+    def by_type(self, goal_type: GoalType) -> List[Goal]:
+        """Goals of a type, in the order they were added"""
+        with self._lock:
+            return list(self._by_type[goal_type].values())
+
+    def by_priority(self, min_priority: int) -> List[Goal]:
+        """Goals with at least the given priority, highest first, then in the order added"""
+        with self._lock:
+            goals = [
+                g for priority in sorted(self._by_priority, reverse=True) if priority >= min_priority
+                for g in self._by_priority[priority].values()
+            ]
+        return sorted(goals, key=lambda g: (-g.priority, self._seq[g.id]))
+
+    def count(self, *statuses: GoalStatus) -> int:
+        """Number of goals in any of the given statuses, or of all goals"""
+        if not statuses:
+            return len(self._ordered)
+        with self._lock:
+            return sum(len(self._by_status[status]) for status in statuses)
+
+    def status_counts(self) -> Dict[str, int]:
+        """Number of goals in each status"""
+        with self._lock:
+            return {status.value: len(goals) for status, goals in self._by_status.items()}
+
+    def type_counts(self) -> Dict[str, int]:
+        """Number of goals of each type"""
+        with self._lock:
+            return {goal_type.value: len(goals) for goal_type, goals in self._by_type.items()}
+
+    def recent(self, limit: int) -> List[Goal]:
+        """The most recently added goals, oldest first"""
+        return self._ordered[-limit:] if limit > 0 else []
+
+    def __len__(self) -> int:
+        return len(self._ordered)
+
+    def __iter__(self) -> Iterator[Goal]:
+        return iter(list(self._ordered))
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Goal, List[Goal]]:
+        return self._ordered[index]
+
+    def __contains__(self, goal: object) -> bool:
+        return isinstance(goal, Goal) and self._by_id.get(goal.id) is goal
 
 
 class BaseAgent(ABC):
@@ -98,8 +319,9 @@ class BaseAgent(ABC):
     def __init__(self, name: str, description: str):
         self.name = name
         self.description = description
-        self.goals: List[Goal] = []
-        self.memory: Dict[str, Any] = {}
+        self.goals = GoalStore()
+        # Byte-budgeted: least recently used entries spill to a compressed local store
+        self.memory: TieredMemory = create_agent_memory()
     
     @abstractmethod
     def plan(self, goal: Goal) -> List[Dict[str, Any]]:
@@ -123,17 +345,46 @@ class BaseAgent(ABC):
         """
         pass
     
+    async def aplan(self, goal: Goal) -> List[Dict[str, Any]]:
+        """
+        Async version of plan
+        Runs the synchronous implementation in a worker thread unless overridden
+        """
+        return await asyncio.to_thread(self.plan, goal)
+    
+    async def aexecute(self, goal: Goal) -> Dict[str, Any]:
+        """
+        Async version of execute
+        Runs the synchronous implementation in a worker thread unless overridden
+        """
+        return await asyncio.to_thread(self.execute, goal)
+    
+    async def aevaluate(self, goal: Goal, results: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Async version of evaluate
+        Runs the synchronous implementation in a worker thread unless overridden
+        """
+        return await asyncio.to_thread(self.evaluate, goal, results)
+    
     def add_goal(self, goal: Goal):
         """Add a goal to the agent"""
-        self.goals.append(goal)
+        self.goals.add(goal)
+    
+    def archive_goal_results(self, goal: Goal):
+        """Hand a finished goal's results to agent memory so they stop pinning RAM"""
+        goal.archive_results(self.memory)
+    
+    def get_goal(self, goal_id: str) -> Optional[Goal]:
+        """Get a goal by id"""
+        return self.goals.get(goal_id)
     
     def get_active_goals(self) -> List[Goal]:
         """Get all active goals"""
-        return [g for g in self.goals if g.status in [GoalStatus.PENDING, GoalStatus.IN_PROGRESS]]
+        return self.goals.by_status(GoalStatus.PENDING, GoalStatus.IN_PROGRESS)
     
     def get_completed_goals(self) -> List[Goal]:
         """Get all completed goals"""
-        return [g for g in self.goals if g.status == GoalStatus.COMPLETED]
+        return self.goals.by_status(GoalStatus.COMPLETED)
     
     def store_memory(self, key: str, value: Any):
         """Store information in agent memory"""
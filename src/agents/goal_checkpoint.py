@@ -0,0 +1,152 @@
+"""
+Goal checkpoints
+Persists goal state after each stage so an interrupted run can resume
+"""
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .base_agent import Goal
+from ..config.settings import settings
+
+
+# Checkpointed stages in run order; a goal at a stage has completed it
+STAGES = ("created", "planned", "executed", "evaluated")
+
+
+class GoalCheckpointStore:
+    """
+    SQLite store of goal snapshots, one row per goal
+
+    Each row holds the goal (``Goal.to_dict``: status, subtasks and the
+    execution results) and the last stage it completed, keyed by an owner
+    (the agent's ``agent_id``) and the goal id. Writes replace the row, so
+    the store always holds the latest completed stage of each goal. A goal
+    that reaches the last stage has nothing left to resume, so its row is
+    deleted instead; the store only ever holds unfinished goals.
+    """
+
+    def __init__(self, path: str = "goal_checkpoints.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS goal_checkpoints (
+                owner TEXT NOT NULL,
+                goal_id TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                goal TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (owner, goal_id)
+            )"""
+        )
+        # Rows written before finished goals were pruned
+        self._conn.execute("DELETE FROM goal_checkpoints WHERE stage = ?", (STAGES[-1],))
+        self._conn.commit()
+        self.writes = 0
+        self.pruned = 0
+
+    def save(self, owner: str, goal: Goal, stage: str):
+        """
+        Record that a goal completed a stage
+
+        Completing the last stage deletes the goal's row.
+
+        Args:
+            owner: Agent the goal belongs to
+            goal: Goal in its state after the stage
+            stage: One of STAGES
+        """
+        if stage not in STAGES:
+            raise ValueError(f"Unknown checkpoint stage: {stage}")
+        if stage == STAGES[-1]:
+            with self._lock:
+                self._conn.execute(
+                    "DELETE FROM goal_checkpoints WHERE owner = ? AND goal_id = ?", (owner, goal.id)
+                )
+                self._conn.commit()
+                self.pruned += 1
+            return
+        payload = json.dumps(goal.to_dict(), default=str)
+        with self._lock:
+            self._conn.execute(
+                """INSERT OR REPLACE INTO goal_checkpoints
+                   (owner, goal_id, stage, goal, created_at, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                (owner, goal.id, stage, payload, goal.created_at.isoformat(), time.time())
+            )
+            self._conn.commit()
+            self.writes += 1
+
+    def load(self, owner: str, unfinished_only: bool = False) -> List[Tuple[Goal, str]]:
+        """
+        Load an owner's goals with the last stage each completed
+
+        Args:
+            owner: Agent the goals belong to
+            unfinished_only: Skip goals that were already evaluated (only
+                stores that were never opened by this version still have them)
+
+        Returns:
+            (goal, stage) pairs in the order the goals were created
+        """
+        query = "SELECT goal, stage FROM goal_checkpoints WHERE owner = ?"
+        if unfinished_only:
+            query += " AND stage != 'evaluated'"
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY created_at", (owner,)).fetchall()
+        return [(Goal.from_dict(json.loads(goal)), stage) for goal, stage in rows]
+
+    def delete(self, owner: str, goal_id: Optional[str] = None) -> int:
+        """Forget one goal, or every goal of an owner; returns the rows removed"""
+        with self._lock:
+            if goal_id is None:
+                cursor = self._conn.execute("DELETE FROM goal_checkpoints WHERE owner = ?", (owner,))
+            else:
+                cursor = self._conn.execute(
+                    "DELETE FROM goal_checkpoints WHERE owner = ? AND goal_id = ?", (owner, goal_id)
+                )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def stats(self, owner: Optional[str] = None) -> Dict[str, Any]:
+        """Get unfinished checkpointed goals per stage, for one owner or the whole store"""
+        query = "SELECT stage, COUNT(*) FROM goal_checkpoints"
+        params: Tuple[Any, ...] = ()
+        if owner is not None:
+            query += " WHERE owner = ?"
+            params = (owner,)
+        with self._lock:
+            counts = dict(self._conn.execute(query + " GROUP BY stage", params).fetchall())
+            writes = self.writes
+            pruned = self.pruned
+        return {
+            "path": self.path,
+            "writes": writes,
+            "pruned": pruned,
+            "goals_by_stage": {stage: counts.get(stage, 0) for stage in STAGES[:-1]}
+        }
+
+
+_store: Optional[GoalCheckpointStore] = None
+_store_lock = threading.Lock()
+
+
+def get_checkpoint_store() -> Optional[GoalCheckpointStore]:
+    """
+    Get the process-wide checkpoint store
+
+    Returns:
+        The shared store, or None when checkpointing is disabled in settings
+    """
+    global _store
+    if not settings.checkpoint.enabled:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = GoalCheckpointStore(path=settings.checkpoint.path)
+    return _store
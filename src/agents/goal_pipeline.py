@@ -0,0 +1,191 @@
+"""
+Goal pipeline
+Runs goals through plan, execute and evaluate stages that overlap across goals
+"""
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+
+# Marks the end of the input on a stage queue
+_END = object()
+
+
+class _Work:
+    """One item moving through the pipeline"""
+
+    __slots__ = ("index", "item", "value", "error")
+
+    def __init__(self, index: int, item: Any):
+        self.index = index
+        self.item = item
+        self.value = item
+        self.error: Optional[Exception] = None
+
+
+class _StageStats:
+    """Time a stage spent working, waiting for input and waiting on its output queue"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.processed = 0
+        self.failed = 0
+        self.busy_s = 0.0
+        self.starved_s = 0.0
+        self.blocked_s = 0.0
+        self.max_queue_depth = 0
+
+    def to_dict(self, wall_s: float) -> Dict[str, Any]:
+        return {
+            "processed": self.processed,
+            "failed": self.failed,
+            "busy_ms": round(self.busy_s * 1000, 2),
+            "starved_ms": round(self.starved_s * 1000, 2),
+            "blocked_ms": round(self.blocked_s * 1000, 2),
+            "occupancy": round(self.busy_s / wall_s, 4) if wall_s else 0.0,
+            "max_queue_depth": self.max_queue_depth
+        }
+
+
+class GoalPipeline:
+    """
+    Linear pipeline of stages, one worker thread per stage
+
+    Each stage reads from its own bounded input queue (``queue_size`` items)
+    and writes to the next stage's, so stage N works on item i while stage
+    N+1 works on item i-1. Items keep their input order. An item whose stage
+    raises skips the remaining stages and comes out as the exception;
+    ``on_error`` is called with the original item and the exception in the
+    failing stage's worker, before any later item reaches the next stage.
+
+    Per stage, the run reports busy time and occupancy (busy / wall time),
+    time starved (waiting for input) and time blocked (waiting for room in
+    the next queue), plus the deepest its input queue got. The stage with
+    the highest occupancy is the bottleneck; stages upstream of it block and
+    stages downstream starve.
+    """
+
+    def __init__(
+        self,
+        stages: List[Tuple[str, Callable[[Any], Any]]],
+        queue_size: int = 2,
+        on_error: Optional[Callable[[Any, Exception], None]] = None
+    ):
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+        self.on_error = on_error
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.last_run: Dict[str, Any] = {}
+
+    def _stage_worker(
+        self,
+        fn: Callable[[Any], Any],
+        inbox: "queue.Queue",
+        outbox: "queue.Queue",
+        stats: _StageStats
+    ):
+        while True:
+            waited = time.perf_counter()
+            work = inbox.get()
+            stats.starved_s += time.perf_counter() - waited
+            # Backlog this stage found, counting the item it just took
+            stats.max_queue_depth = max(stats.max_queue_depth, inbox.qsize() + 1)
+            if work is _END:
+                outbox.put(_END)
+                return
+
+            if work.error is None:
+                started = time.perf_counter()
+                try:
+                    work.value = fn(work.value)
+                except Exception as e:
+                    work.error = e
+                    stats.failed += 1
+                    if self.on_error is not None:
+                        self.on_error(work.item, e)
+                stats.busy_s += time.perf_counter() - started
+                stats.processed += 1
+
+            waited = time.perf_counter()
+            outbox.put(work)
+            stats.blocked_s += time.perf_counter() - waited
+
+    def run(
+        self,
+        items: List[Any],
+        stages: Optional[Dict[str, Callable[[Any], Any]]] = None
+    ) -> List[Union[Any, Exception]]:
+        """
+        Push items through every stage
+
+        Args:
+            items: Inputs to the first stage
+            stages: Replacement functions for named stages, for this run only
+
+        Returns:
+            The last stage's output or the raised exception for each item, in input order
+        """
+        overrides = stages or {}
+        stages = [(name, overrides.get(name, fn)) for name, fn in self.stages]
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in stages]
+        queues.append(queue.Queue())
+        stats = [_StageStats(name) for name, _ in stages]
+
+        workers = [
+            threading.Thread(
+                target=self._stage_worker,
+                args=(fn, queues[i], queues[i + 1], stats[i]),
+                name=f"pipeline-{name}",
+                daemon=True
+            )
+            for i, (name, fn) in enumerate(stages)
+        ]
+
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+
+        # Feed from a separate thread so a full first queue cannot stall collection
+        def feed():
+            for index, item in enumerate(items):
+                queues[0].put(_Work(index, item))
+            queues[0].put(_END)
+
+        feeder = threading.Thread(target=feed, name="pipeline-feed", daemon=True)
+        feeder.start()
+
+        results: List[Union[Any, Exception, None]] = [None] * len(items)
+        while True:
+            work = queues[-1].get()
+            if work is _END:
+                break
+            results[work.index] = work.error if work.error is not None else work.value
+
+        feeder.join()
+        for worker in workers:
+            worker.join()
+        wall_s = time.perf_counter() - started
+
+        stages = {s.name: s.to_dict(wall_s) for s in stats}
+        report = {
+            "items": len(items),
+            "wall_ms": round(wall_s * 1000, 2),
+            "serial_ms": round(sum(s.busy_s for s in stats) * 1000, 2),
+            "bottleneck": max(stages, key=lambda name: stages[name]["occupancy"]) if stages else None,
+            "stages": stages
+        }
+        with self._lock:
+            self.runs += 1
+            self.last_run = report
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the number of runs and the last run's stage occupancy"""
+        with self._lock:
+            return {
+                "queue_size": self.queue_size,
+                "runs": self.runs,
+                "last_run": dict(self.last_run)
+            }
@@ -0,0 +1,231 @@
+"""
+Goal scheduler
+Runs goals as a dependency graph on a bounded worker pool, highest priority first
+"""
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from .base_agent import Goal, GoalStatus
+
+
+class GoalScheduler:
+    """
+    Priority-aware, dependency-driven parallel goal runner
+
+    A goal depends on the goals listed in its ``depends_on`` and, through
+    ``type_dependencies``, on every goal of a prerequisite type in the same
+    run (e.g. {"customer_retention": ["analytics_insights"]} runs analytics
+    before retention). Dependencies outside the run are ignored. Goals whose
+    dependencies are done are ready; whenever a worker is free the ready goal
+    with the highest effective priority starts, where effective priority is
+    ``priority`` plus ``aging_per_minute`` for every minute the goal has been
+    ready, so low-priority goals are not starved. Ties go to the goal added
+    first.
+
+    A goal that raises is marked failed, and the goals depending on it are
+    cancelled instead of run.
+    """
+
+    def __init__(
+        self,
+        run_goal: Callable[[Goal], Dict[str, Any]],
+        max_workers: int = 4,
+        aging_per_minute: float = 1.0,
+        type_dependencies: Optional[Dict[str, List[str]]] = None
+    ):
+        self.run_goal = run_goal
+        self.max_workers = max(1, max_workers)
+        self.aging_per_minute = aging_per_minute
+        self.type_dependencies = type_dependencies or {}
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.goals_run = 0
+        self.goals_failed = 0
+        self.total_queue_wait_ms = 0.0
+        self.total_run_ms = 0.0
+        self.max_queue_wait_ms = 0.0
+        self.last_run: List[Dict[str, Any]] = []
+
+    def dependencies(self, goals: List[Goal]) -> Dict[str, Set[str]]:
+        """
+        Prerequisite goal ids of each goal in a run
+
+        Raises:
+            ValueError: If the dependencies contain a cycle
+        """
+        ids = {g.id for g in goals}
+        by_type: Dict[str, List[str]] = {}
+        for g in goals:
+            by_type.setdefault(g.goal_type.value, []).append(g.id)
+
+        deps: Dict[str, Set[str]] = {}
+        for g in goals:
+            required = {d for d in g.depends_on if d in ids}
+            for prerequisite in self.type_dependencies.get(g.goal_type.value, []):
+                required.update(by_type.get(prerequisite, []))
+            required.discard(g.id)
+            deps[g.id] = required
+
+        # Kahn's algorithm: anything left unvisited is on a cycle
+        remaining = {goal_id: len(required) for goal_id, required in deps.items()}
+        ready = [goal_id for goal_id, count in remaining.items() if count == 0]
+        visited = 0
+        while ready:
+            done = ready.pop()
+            visited += 1
+            for goal_id, required in deps.items():
+                if done in required:
+                    remaining[goal_id] -= 1
+                    if remaining[goal_id] == 0:
+                        ready.append(goal_id)
+        if visited < len(goals):
+            cycle = sorted(goal_id for goal_id, count in remaining.items() if count > 0)
+            raise ValueError(f"Goal dependency cycle between: {', '.join(cycle)}")
+        return deps
+
+    def dispatch_order(self, goals: List[Goal]) -> List[Goal]:
+        """
+        Serial order that respects dependencies, highest priority first among ready goals
+
+        Used by runners that process goals one at a time per stage, such as GoalPipeline.
+        """
+        deps = {goal_id: set(required) for goal_id, required in self.dependencies(goals).items()}
+        order = {g.id: index for index, g in enumerate(goals)}
+        pending = list(goals)
+        ordered: List[Goal] = []
+        while pending:
+            ready = [g for g in pending if not deps[g.id]]
+            goal = max(ready, key=lambda g: (g.priority, -order[g.id]))
+            pending.remove(goal)
+            ordered.append(goal)
+            for required in deps.values():
+                required.discard(goal.id)
+        return ordered
+
+    def _effective_priority(self, goal: Goal, ready_at: float, now: float) -> float:
+        return goal.priority + self.aging_per_minute * (now - ready_at) / 60
+
+    def run(
+        self,
+        goals: List[Goal],
+        run_goal: Optional[Callable[[Goal], Dict[str, Any]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Run goals respecting dependencies and priority
+
+        Args:
+            goals: Goals to run
+            run_goal: Runs one goal for this run only (defaults to the scheduler's run_goal)
+
+        Returns:
+            One result per goal, in input order. Each goal that ran has a
+            "schedule" entry with the time spent waiting for dependencies,
+            waiting for a worker once ready, and running, in milliseconds.
+        """
+        run_goal = run_goal or self.run_goal
+        deps = self.dependencies(goals)
+        order = {g.id: index for index, g in enumerate(goals)}
+        by_id = {g.id: g for g in goals}
+        dependents: Dict[str, List[str]] = {g.id: [] for g in goals}
+        for goal_id, required in deps.items():
+            for prerequisite in required:
+                dependents[prerequisite].append(goal_id)
+
+        submitted = time.perf_counter()
+        waiting = {goal_id: set(required) for goal_id, required in deps.items() if required}
+        ready_at = {g.id: submitted for g in goals if not deps[g.id]}
+        # goal id -> (ready, started) perf_counter readings
+        timings: Dict[str, Tuple[float, float]] = {}
+        results: Dict[str, Dict[str, Any]] = {}
+        running: Dict[Future, str] = {}
+
+        def finish(goal_id: str, result: Dict[str, Any], failed: bool):
+            """Record a finished goal and release or cancel its dependents"""
+            results[goal_id] = result
+            now = time.perf_counter()
+            for dependent in dependents[goal_id]:
+                if dependent in results:
+                    continue
+                if failed:
+                    by_id[dependent].update_status(GoalStatus.CANCELLED)
+                    finish(dependent, {
+                        "goal_id": dependent,
+                        "goal_type": by_id[dependent].goal_type.value,
+                        "status": "cancelled",
+                        "error": f"Dependency {goal_id} did not complete"
+                    }, True)
+                    continue
+                waiting[dependent].discard(goal_id)
+                if not waiting[dependent]:
+                    del waiting[dependent]
+                    ready_at[dependent] = now
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="goal") as pool:
+            while ready_at or running:
+                now = time.perf_counter()
+                while ready_at and len(running) < self.max_workers:
+                    goal_id = max(
+                        ready_at,
+                        key=lambda i: (self._effective_priority(by_id[i], ready_at[i], now), -order[i])
+                    )
+                    timings[goal_id] = (ready_at.pop(goal_id), time.perf_counter())
+                    running[pool.submit(run_goal, by_id[goal_id])] = goal_id
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    goal_id = running.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        by_id[goal_id].update_status(GoalStatus.FAILED)
+                        finish(goal_id, {
+                            "goal_id": goal_id,
+                            "goal_type": by_id[goal_id].goal_type.value,
+                            "status": "failed",
+                            "error": str(error) or type(error).__name__
+                        }, True)
+                    else:
+                        finish(goal_id, future.result(), False)
+                    ready, started = timings[goal_id]
+                    results[goal_id]["schedule"] = {
+                        "priority": by_id[goal_id].priority,
+                        "dependency_wait_ms": round((ready - submitted) * 1000, 2),
+                        "queue_wait_ms": round((started - ready) * 1000, 2),
+                        "run_ms": round((time.perf_counter() - started) * 1000, 2)
+                    }
+
+        return self._report([results[g.id] for g in goals])
+
+    def _report(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Fold a run's timings into the scheduler stats"""
+        timed = [r for r in results if "schedule" in r]
+        with self._lock:
+            self.runs += 1
+            self.goals_run += len(timed)
+            self.goals_failed += sum(1 for r in results if r.get("status") in ("failed", "cancelled"))
+            for r in timed:
+                self.total_queue_wait_ms += r["schedule"]["queue_wait_ms"]
+                self.total_run_ms += r["schedule"]["run_ms"]
+                self.max_queue_wait_ms = max(self.max_queue_wait_ms, r["schedule"]["queue_wait_ms"])
+            self.last_run = [
+                {"goal_id": r["goal_id"], "goal_type": r["goal_type"], **r.get("schedule", {})}
+                for r in results
+            ]
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue wait and run time totals plus the last run's per-goal timings"""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "aging_per_minute": self.aging_per_minute,
+                "type_dependencies": self.type_dependencies,
+                "runs": self.runs,
+                "goals_run": self.goals_run,
+                "goals_failed": self.goals_failed,
+                "avg_queue_wait_ms": round(self.total_queue_wait_ms / self.goals_run, 2) if self.goals_run else 0.0,
+                "max_queue_wait_ms": round(self.max_queue_wait_ms, 2),
+                "avg_run_ms": round(self.total_run_ms / self.goals_run, 2) if self.goals_run else 0.0,
+                "last_run": list(self.last_run)
+            }
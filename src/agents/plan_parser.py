@@ -0,0 +1,110 @@
+"""
+Incremental plan parser
+Turns a streamed LLM plan into subtasks as soon as each numbered item is complete
+"""
+import re
+from typing import Any, Dict, List
+
+
+# Numbered items: "1.", "1)", "1:" followed by the task name
+NUMBERED_ITEM = re.compile(r'^(\d+)[.):]\s*(.+)')
+
+TASK_PREFIXES = ['Task:', 'Subtask:', 'Step:']
+
+# Used when the LLM response contains no numbered items
+DEFAULT_SUBTASKS = [
+    {'id': 'task_1', 'name': 'Plan campaign strategy', 'status': 'pending', 'description': 'Develop comprehensive campaign strategy'},
+    {'id': 'task_2', 'name': 'Create marketing content', 'status': 'pending', 'description': 'Design promotional materials and messaging'},
+    {'id': 'task_3', 'name': 'Deploy across channels', 'status': 'pending', 'description': 'Launch campaign on email and social media'},
+    {'id': 'task_4', 'name': 'Monitor performance', 'status': 'pending', 'description': 'Track metrics and engagement'},
+    {'id': 'task_5', 'name': 'Optimize and adjust', 'status': 'pending', 'description': 'Make improvements based on results'}
+]
+
+
+def default_subtasks() -> List[Dict[str, Any]]:
+    """Fresh copies of the fallback subtasks"""
+    return [dict(task) for task in DEFAULT_SUBTASKS]
+
+
+class IncrementalPlanParser:
+    """
+    Parser for LLM plans, used whole by RetailMarketingAgent._parse_plan
+    and chunk by chunk by stream_plan
+
+    Feed it text chunks of any size as they arrive. A subtask is complete
+    when the next numbered item starts (or the stream ends), and ``feed``
+    returns it at that point. Only the current partial line and the task
+    being built are held, so each chunk is processed in time proportional
+    to its own length.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._current: Dict[str, Any] = {}
+        self._count = 0
+
+    def _finish_current(self) -> List[Dict[str, Any]]:
+        """Close the task being built, if any"""
+        if not self._current.get('name'):
+            return []
+        self._count += 1
+        task = self._current
+        task['id'] = f"task_{self._count}"
+        self._current = {}
+        return [task]
+
+    def _parse_line(self, line: str) -> List[Dict[str, Any]]:
+        """Process one complete line, returning any subtask it completes"""
+        line = line.strip()
+        if not line:
+            return []
+
+        number_match = NUMBERED_ITEM.match(line)
+        if number_match:
+            completed = self._finish_current()
+            task_name = number_match.group(2).strip()
+            for prefix in TASK_PREFIXES:
+                if task_name.startswith(prefix):
+                    task_name = task_name[len(prefix):].strip()
+            self._current = {
+                'name': task_name,
+                'status': 'pending',
+                'description': task_name
+            }
+            return completed
+
+        if self._current and not line.startswith('#'):
+            self._current['description'] += ' ' + line
+        return []
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """
+        Consume a chunk of streamed text
+
+        Returns:
+            Subtasks completed by this chunk, in order
+        """
+        if '\n' not in chunk:
+            self._buffer += chunk
+            return []
+
+        *lines, self._buffer = (self._buffer + chunk).split('\n')
+        completed = []
+        for line in lines:
+            completed.extend(self._parse_line(line))
+        return completed
+
+    def close(self) -> List[Dict[str, Any]]:
+        """
+        Flush the end of the stream
+
+        Returns:
+            The final subtask, or the default plan if nothing was parsed at all
+        """
+        completed = self._parse_line(self._buffer)
+        self._buffer = ""
+        completed.extend(self._finish_current())
+        if self._count == 0:
+            completed = default_subtasks()
+            self._count = len(completed)
+        return completed
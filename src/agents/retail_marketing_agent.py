@@ -1,12 +1,29 @@
 """
 Main Retail Marketing Agent implementation
 """
-from typing import Dict, List, Any, Optional
-from langchain_openai import AzureChatOpenAI, ChatOpenAI
+import asyncio
+import re
+import threading
+import time
+import uuid
+from contextlib import closing
+from typing import Callable, Dict, Iterable, Iterator, List, Any, Optional, Tuple, Union
 from langchain_core.prompts import ChatPromptTemplate
 
 from .base_agent import BaseAgent, Goal, GoalType, GoalStatus
+from .plan_parser import IncrementalPlanParser
+from .goal_scheduler import GoalScheduler
+from .goal_pipeline import GoalPipeline
+from .goal_checkpoint import STAGES as CHECKPOINT_STAGES, get_checkpoint_store
 from ..config.settings import settings
+from ..utils.llm_helper import get_llm, invoke_prompt, ainvoke_prompt, batch_prompt, stream_prompt, get_routing_stats
+from ..utils.prompt_registry import registered_prompt
+from ..utils.llm_metrics import get_llm_metrics, estimate_tokens
+from ..utils.single_flight import get_single_flight_stats
+from ..utils.rate_limiter import get_rate_limiter_stats
+from ..utils.semantic_cache import get_semantic_cache
+from ..utils.result_compactor import result_compactor
+from ..utils.hedging import get_hedging_stats
 from ..services.deployment_service import DeploymentService
 from ..modules.customer_acquisition import CustomerAcquisitionModule
 from ..modules.customer_retention import CustomerRetentionModule
@@ -19,53 +36,214 @@ class RetailMarketingAgent(BaseAgent):
     """
     Main orchestrator agent for retail marketing activities
     Coordinates various specialized marketing modules
+
+    The deployment service (mock customer database, email and social
+    services), campaign manager and marketing modules are built on first
+    use, so an agent that only plans does not pay for them. Call
+    ``prewarm()`` to build them up front instead.
+
+    With GOAL_CHECKPOINT_ENABLED, each goal is checkpointed after it is
+    created, planned, executed and evaluated, under the agent's ``agent_id``.
+    An agent constructed with the ``agent_id`` of an interrupted one reloads
+    its unfinished goals, and execute() resumes them from their last
+    completed stage instead of repeating LLM calls and deployments.
+
+    Agents pickle (for the agent pool's snapshots): goals, memory, campaigns
+    and the deployment service's customers, emails and posts are kept, while
+    the LLM client, locks, scheduler, pipeline and the stateless marketing
+    modules are recreated on unpickling.
     """
+
+    # Subsystems built on first use, with their factories
+    SUBSYSTEMS = {
+        "deployment_service": DeploymentService,
+        "campaign_manager": CampaignManager,
+        "acquisition_module": CustomerAcquisitionModule,
+        "retention_module": CustomerRetentionModule,
+        "digital_module": DigitalMarketingModule
+    }
+
+    # Stages execute_campaign reports through its progress callback
+    CAMPAIGN_EXECUTION_STAGES = ["launching", "deploying", "recording"]
+
+    # Subsystems that hold state and are kept when the agent is pickled
+    STATEFUL_SUBSYSTEMS = ("deployment_service", "campaign_manager")
+
+    # Process-bound attributes dropped when pickling and rebuilt by _init_runtime
+    RUNTIME_ATTRS = (
+        "llm", "_subsystem_lock", "_campaign_lock", "_evaluation_lock",
+        "goal_scheduler", "goal_pipeline", "checkpoints"
+    )
+
+    # Header line of each goal's section in a batch evaluation prompt and response
+    BATCH_GOAL_HEADER = re.compile(r"^\s*#*\s*GOAL\s+(\S+?)\s*:?\s*$", re.MULTILINE | re.IGNORECASE)
     
     def __init__(
         self,
         client_name: str,
         store_type: str = "general",
         has_online_store: bool = True,
-        location: Optional[str] = None
+        location: Optional[str] = None,
+        agent_id: Optional[str] = None
     ):
         super().__init__(
             name="Retail Marketing Agent",
             description="AI-powered marketing agent for retail businesses"
         )
         
+        # Owner of this agent's goal checkpoints; client names are not unique
+        self.agent_id = agent_id or uuid.uuid4().hex
         self.client_name = client_name
         self.store_type = store_type
         self.has_online_store = has_online_store
         self.location = location or settings.store.location
         
-        # Initialize LLM (Azure or OpenAI)
-        if settings.openai.use_azure:
-            self.llm = AzureChatOpenAI(
-                azure_deployment=settings.openai.azure_deployment,
-                api_version=settings.openai.azure_api_version,
-                azure_endpoint=settings.openai.azure_endpoint,
-                api_key=settings.openai.azure_api_key,
-                temperature=settings.openai.temperature
-            )
-        else:
-            self.llm = ChatOpenAI(
-                model=settings.openai.model,
-                temperature=settings.openai.temperature,
-                openai_api_key=settings.openai.api_key
-            )
-        
         # Store context
         self.store_memory("client_name", client_name)
         self.store_memory("store_type", store_type)
         self.store_memory("has_online_store", has_online_store)
         self.store_memory("location", location)
         
-        # Initialize services and modules
-        self.deployment_service = DeploymentService()
-        self.campaign_manager = CampaignManager()
-        self.acquisition_module = CustomerAcquisitionModule()
-        self.retention_module = CustomerRetentionModule()
-        self.digital_module = DigitalMarketingModule()
+        # Services and modules are built on first use (see SUBSYSTEMS)
+        self._subsystems: Dict[str, Any] = {}
+        self._subsystem_build_ms: Dict[str, float] = {}
+        self.evaluation_stats = {
+            "batches": 0,
+            "goals": 0,
+            "round_trips": 0,
+            "fallbacks": 0,
+            "prompt_tokens": 0,
+            "per_goal_prompt_tokens": 0
+        }
+        # Restored goals and the last stage each completed before the restart
+        self._resume_stage: Dict[str, str] = {}
+        self._init_runtime()
+        if agent_id is not None and self.checkpoints is not None:
+            self._restore_goals()
+    
+    def _init_runtime(self):
+        """Create the LLM client, locks, scheduler, pipeline and checkpoint store"""
+        # Initialize LLM (Azure or OpenAI) from the shared client pool
+        self.llm = get_llm()
+        self._subsystem_lock = threading.Lock()
+        self._campaign_lock = threading.Lock()
+        self._evaluation_lock = threading.Lock()
+        self.goal_scheduler = GoalScheduler(
+            self._execute_goal,
+            max_workers=settings.scheduler.max_workers,
+            aging_per_minute=settings.scheduler.aging_per_minute,
+            type_dependencies=settings.scheduler.type_dependencies
+        )
+        self.goal_pipeline = GoalPipeline(
+            [
+                ("plan", self._plan_stage),
+                ("execute", self._execute_stage),
+                ("evaluate", self._evaluate_stage)
+            ],
+            queue_size=settings.scheduler.pipeline_queue_size,
+            on_error=self._stage_failed
+        )
+        self.checkpoints = get_checkpoint_store()
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        for name in self.RUNTIME_ATTRS:
+            state.pop(name, None)
+        # Marketing modules only wrap the LLM client; they are rebuilt on first use
+        state["_subsystems"] = {
+            name: instance for name, instance in self._subsystems.items()
+            if name in self.STATEFUL_SUBSYSTEMS
+        }
+        state["_subsystem_build_ms"] = {
+            name: ms for name, ms in self._subsystem_build_ms.items() if name in state["_subsystems"]
+        }
+        return state
+    
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self._init_runtime()
+    
+    def _restore_goals(self):
+        """Reload this agent's unfinished checkpointed goals as active goals"""
+        for goal, stage in self.checkpoints.load(self.agent_id, unfinished_only=True):
+            self._resume_stage[goal.id] = stage
+            if goal.status == GoalStatus.COMPLETED:
+                goal.status = GoalStatus.IN_PROGRESS
+            self.add_goal(goal)
+    
+    def _checkpoint(self, goal: Goal, stage: str):
+        """Record that a goal completed a stage"""
+        if self.checkpoints is not None:
+            self.checkpoints.save(self.agent_id, goal, stage)
+    
+    def _resumed_past(self, goal: Goal, stage: str) -> bool:
+        """Whether a restored goal had already completed a stage before the restart"""
+        resume = self._resume_stage.get(goal.id)
+        return resume is not None and CHECKPOINT_STAGES.index(resume) >= CHECKPOINT_STAGES.index(stage)
+    
+    def _subsystem(self, name: str) -> Any:
+        """Get a subsystem, building it on first use"""
+        instance = self._subsystems.get(name)
+        if instance is None:
+            # Goals run on scheduler and pipeline threads; build each subsystem once
+            with self._subsystem_lock:
+                instance = self._subsystems.get(name)
+                if instance is None:
+                    started = time.perf_counter()
+                    instance = self.SUBSYSTEMS[name]()
+                    self._subsystem_build_ms[name] = round((time.perf_counter() - started) * 1000, 2)
+                    self._subsystems[name] = instance
+        return instance
+
+    @property
+    def deployment_service(self) -> DeploymentService:
+        return self._subsystem("deployment_service")
+
+    @property
+    def campaign_manager(self) -> CampaignManager:
+        return self._subsystem("campaign_manager")
+
+    @property
+    def acquisition_module(self) -> CustomerAcquisitionModule:
+        return self._subsystem("acquisition_module")
+
+    @property
+    def retention_module(self) -> CustomerRetentionModule:
+        return self._subsystem("retention_module")
+
+    @property
+    def digital_module(self) -> DigitalMarketingModule:
+        return self._subsystem("digital_module")
+
+    def prewarm(self, subsystems: Optional[List[str]] = None) -> Dict[str, float]:
+        """
+        Build subsystems now instead of on first use
+        
+        Args:
+            subsystems: Names from SUBSYSTEMS to build (default: all of them)
+        
+        Returns:
+            Build time in milliseconds of each requested subsystem
+        """
+        names = list(self.SUBSYSTEMS) if subsystems is None else subsystems
+        unknown = [name for name in names if name not in self.SUBSYSTEMS]
+        if unknown:
+            raise ValueError(f"Unknown subsystems: {', '.join(unknown)}")
+        for name in names:
+            self._subsystem(name)
+        return {name: self._subsystem_build_ms[name] for name in names}
+
+    def built_subsystem(self, name: str) -> Optional[Any]:
+        """Get a subsystem if it has been built, without building it"""
+        return self._subsystems.get(name)
+
+    def subsystem_status(self) -> Dict[str, Any]:
+        """Which subsystems have been built and how long each took"""
+        with self._subsystem_lock:
+            return {
+                name: {"built": name in self._subsystems, "build_ms": self._subsystem_build_ms.get(name)}
+                for name in self.SUBSYSTEMS
+            }
     
     def set_goal(
         self,
@@ -74,7 +252,8 @@ class RetailMarketingAgent(BaseAgent):
         timeframe: str,
         description: Optional[str] = None,
         metrics: Optional[Dict[str, Any]] = None,
-        priority: int = 1
+        priority: int = 1,
+        depends_on: Optional[List[str]] = None
     ) -> Goal:
         """
         Set a new marketing goal
@@ -86,6 +265,7 @@ class RetailMarketingAgent(BaseAgent):
             description: Optional detailed description
             metrics: Optional success metrics
             priority: Goal priority (1-5, higher is more important)
+            depends_on: IDs of goals that must complete before this one runs
         
         Returns:
             Created Goal object
@@ -103,17 +283,19 @@ class RetailMarketingAgent(BaseAgent):
             target=target,
             timeframe=timeframe,
             metrics=metrics,
-            priority=priority
+            priority=priority,
+            depends_on=depends_on
         )
         
         self.add_goal(goal)
+        self._checkpoint(goal, "created")
         return goal
     
-    def plan(self, goal: Goal) -> List[Dict[str, Any]]:
-        """
-        Create an execution plan for the given goal using AI
-        """
-        planning_prompt = ChatPromptTemplate.from_messages([
+    @staticmethod
+    @registered_prompt("agent.plan")
+    def _planning_prompt() -> ChatPromptTemplate:
+        """Build the prompt used to plan a goal"""
+        return ChatPromptTemplate.from_messages([
             ("system", """You are an expert retail marketing strategist. Create a detailed execution plan 
             for the given marketing goal. Break it down into specific, actionable subtasks.
             
@@ -146,10 +328,10 @@ class RetailMarketingAgent(BaseAgent):
             
             Format as a numbered list.""")
         ])
-        
-        chain = planning_prompt | self.llm
-        
-        response = chain.invoke({
+    
+    def _planning_inputs(self, goal: Goal) -> Dict[str, Any]:
+        """Template variables for the planning prompt"""
+        return {
             "client_name": self.client_name,
             "store_type": self.store_type,
             "has_online_store": self.has_online_store,
@@ -158,123 +340,307 @@ class RetailMarketingAgent(BaseAgent):
             "target": goal.target,
             "timeframe": goal.timeframe,
             "description": goal.description
-        })
-        
-        # Parse response into subtasks
-        response_text = response.content if hasattr(response, 'content') else str(response)
+        }
+    
+    def plan(self, goal: Goal) -> List[Dict[str, Any]]:
+        """
+        Create an execution plan for the given goal using AI
+        """
+        response_text = invoke_prompt(
+            self._planning_prompt(), self.llm, self._planning_inputs(goal), name="agent.plan"
+        )
+        return self._apply_plan(goal, response_text)
+    
+    async def aplan(self, goal: Goal) -> List[Dict[str, Any]]:
+        """
+        Async version of plan, built on ainvoke
+        """
+        response_text = await ainvoke_prompt(
+            self._planning_prompt(), self.llm, self._planning_inputs(goal), name="agent.plan"
+        )
+        return self._apply_plan(goal, response_text)
+    
+    def _apply_plan(self, goal: Goal, response_text: str) -> List[Dict[str, Any]]:
+        """Parse a planning response into subtasks and add them to the goal"""
         subtasks = self._parse_plan(response_text)
-        
-        # Add subtasks to goal
         for subtask in subtasks:
             goal.add_subtask(subtask)
         
         return subtasks
     
-    def _parse_plan(self, plan_text: str) -> List[Dict[str, Any]]:
-        """Parse the AI-generated plan into structured subtasks"""
-        import re
-        
-        subtasks = []
-        lines = plan_text.strip().split('\n')
-        
-        current_task = {}
-        task_counter = 0
+    def stream_plan(self, goal: Goal) -> Iterator[Dict[str, Any]]:
+        """
+        Streaming version of plan: yields each subtask as soon as it is complete
         
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            
-            # Match numbered items: "1.", "1)", "Step 1:", etc.
-            number_match = re.match(r'^(\d+)[.):]\s*(.+)', line)
-            if number_match:
-                # Save previous task
-                if current_task and current_task.get('name'):
-                    task_counter += 1
-                    current_task['id'] = f"task_{task_counter}"
-                    subtasks.append(current_task)
-                
-                # Start new task
-                task_name = number_match.group(2).strip()
-                # Remove common prefixes
-                for prefix in ['Task:', 'Subtask:', 'Step:']:
-                    if task_name.startswith(prefix):
-                        task_name = task_name[len(prefix):].strip()
-                
-                current_task = {
-                    'name': task_name,
-                    'status': 'pending',
-                    'description': task_name
-                }
-            elif current_task and line and not line.startswith('#'):
-                # Append to description
-                current_task['description'] += ' ' + line
-        
-        # Add last task
-        if current_task and current_task.get('name'):
-            task_counter += 1
-            current_task['id'] = f"task_{task_counter}"
-            subtasks.append(current_task)
-        
-        # If parsing failed, create default subtasks
-        if not subtasks:
-            subtasks = [
-                {'id': 'task_1', 'name': 'Plan campaign strategy', 'status': 'pending', 'description': 'Develop comprehensive campaign strategy'},
-                {'id': 'task_2', 'name': 'Create marketing content', 'status': 'pending', 'description': 'Design promotional materials and messaging'},
-                {'id': 'task_3', 'name': 'Deploy across channels', 'status': 'pending', 'description': 'Launch campaign on email and social media'},
-                {'id': 'task_4', 'name': 'Monitor performance', 'status': 'pending', 'description': 'Track metrics and engagement'},
-                {'id': 'task_5', 'name': 'Optimize and adjust', 'status': 'pending', 'description': 'Make improvements based on results'}
-            ]
+        Subtasks are parsed incrementally from the LLM token stream and added
+        to the goal before being yielded, so callers can start acting on the
+        first items while the rest of the plan is still being generated.
+        Closing the generator early aborts the LLM request.
+        """
+        parser = IncrementalPlanParser()
+        chunks = stream_prompt(
+            self._planning_prompt(), self.llm, self._planning_inputs(goal), name="agent.plan"
+        )
+        with closing(chunks):
+            for chunk in chunks:
+                for subtask in parser.feed(chunk):
+                    goal.add_subtask(subtask)
+                    yield subtask
         
-        return subtasks
+        for subtask in parser.close():
+            goal.add_subtask(subtask)
+            yield subtask
+    
+    def _parse_plan(self, plan_text: str) -> List[Dict[str, Any]]:
+        """Parse the AI-generated plan into structured subtasks"""
+        parser = IncrementalPlanParser()
+        return parser.feed(plan_text) + parser.close()
     
     def execute(self, goal: Optional[Goal] = None) -> Dict[str, Any]:
         """
         Execute a marketing goal or all pending goals
+        
+        Goals run on the goal scheduler: independent goals execute in
+        parallel, dependencies run first, and ready goals start in priority
+        order. Each result carries its queue wait and run time under "schedule".
+        
+        With EVAL_BATCH_SIZE above 1, goals are only planned and executed on
+        the scheduler, then evaluated that many per LLM call (see evaluate_batch).
         """
-        if goal:
-            goals_to_execute = [goal]
+        goals_to_execute = [goal] if goal else self.get_active_goals()
+        if not goals_to_execute:
+            return self._no_goals_report()
+        
+        if settings.evaluation.batch_size > 1:
+            results = self.goal_scheduler.run(goals_to_execute, run_goal=self._plan_and_execute_goal)
+            self._evaluate_results(goals_to_execute, results, settings.evaluation.batch_size)
         else:
-            goals_to_execute = self.get_active_goals()
+            results = self.goal_scheduler.run(goals_to_execute)
         
+        return self._execution_report(results)
+    
+    async def aexecute(self, goal: Optional[Goal] = None) -> Dict[str, Any]:
+        """
+        Async version of execute
+        
+        Goals are independent of each other, so they run concurrently on the
+        current event loop; the total time is roughly that of the slowest goal.
+        A goal that raises is marked failed without stopping the others.
+        """
+        goals_to_execute = [goal] if goal else self.get_active_goals()
         if not goals_to_execute:
-            return {
-                "status": "no_goals",
-                "message": "No goals to execute"
-            }
+            return self._no_goals_report()
+        
+        outcomes = await asyncio.gather(
+            *(self._aexecute_goal(g) for g in goals_to_execute),
+            return_exceptions=True
+        )
+        
+        return self._execution_report(self._collect_outcomes(goals_to_execute, outcomes))
+    
+    @staticmethod
+    def _no_goals_report() -> Dict[str, Any]:
+        """Report for an execute call that found nothing to run"""
+        return {
+            "status": "no_goals",
+            "message": "No goals to execute"
+        }
+    
+    @staticmethod
+    def _execution_report(results: List[Dict[str, Any]], **extra: Any) -> Dict[str, Any]:
+        """Report for an execute call from its per-goal results"""
+        return {
+            "status": "success",
+            "goals_executed": len(results),
+            "goals_failed": sum(1 for r in results if r.get("status") in ("failed", "cancelled")),
+            "results": results,
+            **extra
+        }
+    
+    @staticmethod
+    def _collect_outcomes(goals: List[Goal], outcomes: List[Any]) -> List[Dict[str, Any]]:
+        """
+        Per-goal results from goal runs that returned a result or raised
         
+        A goal whose run raised is marked failed, unless it was already
+        cancelled, and its result carries the error.
+        """
         results = []
+        for g, outcome in zip(goals, outcomes):
+            if isinstance(outcome, BaseException):
+                if g.status != GoalStatus.CANCELLED:
+                    g.update_status(GoalStatus.FAILED)
+                outcome = {
+                    "goal_id": g.id,
+                    "goal_type": g.goal_type.value,
+                    "status": g.status.value,
+                    "error": str(outcome) or type(outcome).__name__
+                }
+            results.append(outcome)
+        return results
+    
+    def execute_pipelined(self, goals: Optional[List[Goal]] = None) -> Dict[str, Any]:
+        """
+        Execute goals through overlapping plan, execute and evaluate stages
         
-        for g in goals_to_execute:
-            g.update_status(GoalStatus.IN_PROGRESS)
-            
-            # Create plan if not exists
-            if not g.subtasks:
-                self.plan(g)
-            
-            # Execute based on goal type
-            execution_result = self._execute_goal_by_type(g)
-            
+        Each stage has one worker and a bounded input queue, so while goal N
+        is being deployed, goal N+1 is being planned and goal N-1 evaluated.
+        Goals enter in dependency order, highest priority first, with the
+        same prerequisites the scheduler uses (``depends_on`` and the goal
+        type dependencies). A goal is marked failed as soon as a stage raises,
+        and a goal whose prerequisites have not all completed by the time it
+        reaches the execute stage is cancelled instead of deployed.
+        Stage occupancy for the run is under "pipeline".
+        
+        Args:
+            goals: Goals to run (defaults to all active goals)
+        """
+        goals_to_execute = self.goal_scheduler.dispatch_order(
+            goals if goals is not None else self.get_active_goals()
+        )
+        
+        if not goals_to_execute:
+            return self._no_goals_report()
+        
+        prerequisites = self.goal_scheduler.dependencies(goals_to_execute)
+        outcomes = self.goal_pipeline.run(goals_to_execute, stages={
+            "execute": lambda g: self._execute_stage(g, prerequisites[g.id])
+        })
+        results = self._collect_outcomes(goals_to_execute, outcomes)
+        
+        return self._execution_report(results, pipeline=self.goal_pipeline.stats()["last_run"])
+    
+    def _plan_stage(self, g: Goal) -> Goal:
+        """First stage of a goal run: mark it in progress and plan it if needed"""
+        g.update_status(GoalStatus.IN_PROGRESS)
+        
+        # Create plan if not exists
+        if not g.subtasks and not self._resumed_past(g, "planned"):
+            self.plan(g)
+        if not self._resumed_past(g, "planned"):
+            self._checkpoint(g, "planned")
+        return g
+    
+    async def _aplan_stage(self, g: Goal):
+        """Async version of _plan_stage, for a goal already marked in progress"""
+        if not g.subtasks and not self._resumed_past(g, "planned"):
+            await self.aplan(g)
+        if not self._resumed_past(g, "planned"):
+            self._checkpoint(g, "planned")
+    
+    def _stage_failed(self, g: Goal, error: Exception):
+        """Mark a goal failed as soon as one of its pipeline stages raises"""
+        if g.status != GoalStatus.CANCELLED:
+            g.update_status(GoalStatus.FAILED)
+    
+    def _execute_stage(self, g: Goal, prerequisites: Iterable[str] = ()) -> Tuple[Goal, Dict[str, Any]]:
+        """
+        Second stage of a goal run: execute its strategy
+        
+        Args:
+            g: Goal to execute
+            prerequisites: Ids of goals that must have completed first; the
+                goal is cancelled if any has not
+        """
+        unfinished = [
+            goal_id for goal_id in prerequisites
+            if self.goals.get(goal_id) is not None
+            and self.goals.get(goal_id).status != GoalStatus.COMPLETED
+        ]
+        if unfinished:
+            g.update_status(GoalStatus.CANCELLED)
+            raise RuntimeError(f"Dependency {unfinished[0]} did not complete")
+        
+        # A restored goal that was already deployed is not deployed again
+        if self._resumed_past(g, "executed"):
+            execution_result = g.results["execution"]
             g.update_status(GoalStatus.COMPLETED)
-            g.add_result("execution", execution_result)
-            
-            # Evaluate results
-            evaluation = self.evaluate(g, execution_result)
-            g.add_result("evaluation", evaluation)
-            
-            results.append({
-                "goal_id": g.id,
-                "goal_type": g.goal_type.value,
-                "execution": execution_result,
-                "evaluation": evaluation
-            })
+            return g, execution_result
+        
+        # Execute based on goal type
+        execution_result = self._execute_goal_by_type(g)
         
+        g.update_status(GoalStatus.COMPLETED)
+        g.add_result("execution", execution_result)
+        self._checkpoint(g, "executed")
+        return g, execution_result
+    
+    def _evaluate_stage(self, executed: Tuple[Goal, Dict[str, Any]]) -> Dict[str, Any]:
+        """Last stage of a goal run: evaluate the execution results"""
+        g, execution_result = executed
+        evaluation = self.evaluate(g, execution_result)
+        self._record_evaluation(g, evaluation)
+        
+        return self._goal_result(g, execution_result, evaluation)
+    
+    @staticmethod
+    def _goal_result(g: Goal, execution_result: Dict[str, Any], evaluation: Dict[str, Any]) -> Dict[str, Any]:
+        """Result of a goal run that was planned, executed and evaluated"""
         return {
-            "status": "success",
-            "goals_executed": len(results),
-            "results": results
+            "goal_id": g.id,
+            "goal_type": g.goal_type.value,
+            "execution": execution_result,
+            "evaluation": evaluation
         }
     
+    def _record_evaluation(self, g: Goal, evaluation: Dict[str, Any]):
+        """Store a goal's evaluation, checkpoint it and archive its results"""
+        g.add_result("evaluation", evaluation)
+        self._checkpoint(g, "evaluated")
+        self._resume_stage.pop(g.id, None)
+        self.archive_goal_results(g)
+    
+    def _execute_goal(self, g: Goal) -> Dict[str, Any]:
+        """Plan, execute and evaluate a single goal"""
+        return self._evaluate_stage(self._execute_stage(self._plan_stage(g)))
+    
+    def _plan_and_execute_goal(self, g: Goal) -> Dict[str, Any]:
+        """Plan and execute a single goal, leaving evaluation to a batch"""
+        _, execution_result = self._execute_stage(self._plan_stage(g))
+        return {
+            "goal_id": g.id,
+            "goal_type": g.goal_type.value,
+            "execution": execution_result
+        }
+    
+    def _evaluate_results(self, goals: List[Goal], results: List[Dict[str, Any]], batch_size: int):
+        """Evaluate the executed goals of a scheduler run in batches, filling in their results"""
+        by_id = {g.id: g for g in goals}
+        executed = [r for r in results if "execution" in r]
+        for start in range(0, len(executed), batch_size):
+            chunk = executed[start:start + batch_size]
+            items = [(by_id[r["goal_id"]], r["execution"]) for r in chunk]
+            for result, (g, _), evaluation in zip(chunk, items, self.evaluate_batch(items)):
+                if isinstance(evaluation, Exception):
+                    g.update_status(GoalStatus.FAILED)
+                    result.update(status="failed", error=str(evaluation) or type(evaluation).__name__)
+                    continue
+                self._record_evaluation(g, evaluation)
+                result["evaluation"] = evaluation
+    
+    async def _aexecute_goal(self, g: Goal) -> Dict[str, Any]:
+        """Async version of _execute_goal"""
+        g.update_status(GoalStatus.IN_PROGRESS)
+        
+        if self._resumed_past(g, "executed"):
+            execution_result = g.results["execution"]
+        else:
+            # Execution never reads the plan's subtasks, so both LLM calls can run at once
+            _, execution_result = await asyncio.gather(
+                self._aplan_stage(g),
+                self._aexecute_goal_by_type(g)
+            )
+        
+        g.update_status(GoalStatus.COMPLETED)
+        if not self._resumed_past(g, "executed"):
+            g.add_result("execution", execution_result)
+            self._checkpoint(g, "executed")
+        
+        evaluation = await self.aevaluate(g, execution_result)
+        self._record_evaluation(g, evaluation)
+        
+        return self._goal_result(g, execution_result, evaluation)
+    
     def _execute_goal_by_type(self, goal: Goal) -> Dict[str, Any]:
         """Execute goal based on its type"""
         execution_strategies = {
@@ -293,25 +659,188 @@ class RetailMarketingAgent(BaseAgent):
         else:
             return {"error": f"No execution strategy for {goal.goal_type.value}"}
     
-    def _execute_customer_acquisition(self, goal: Goal) -> Dict[str, Any]:
-        """Execute customer acquisition goal"""
-        # Extract target and duration from goal
-        target_customers = 100  # Default
-        duration_days = 30  # Default
+    async def _aexecute_goal_by_type(self, goal: Goal) -> Dict[str, Any]:
+        """Async version of _execute_goal_by_type"""
+        if goal.goal_type == GoalType.CUSTOMER_ACQUISITION:
+            return await self._aexecute_customer_acquisition(goal)
         
-        # Generate campaign content using AI
-        campaign_data = self.acquisition_module.create_promotion_campaign(
-            target_audience="new customers in local area",
-            campaign_type="acquisition",
-            budget=5000.0,
-            duration_days=duration_days,
-            store_context={
+        # The remaining strategies make no LLM calls
+        return self._execute_goal_by_type(goal)
+    
+    def _acquisition_campaign_request(self) -> Dict[str, Any]:
+        """Arguments for generating acquisition campaign content"""
+        return {
+            "target_audience": "new customers in local area",
+            "campaign_type": "acquisition",
+            "budget": 5000.0,
+            "duration_days": 30,
+            "store_context": {
                 "name": self.client_name,
                 "type": self.store_type,
                 "location": self.location
             }
+        }
+    
+    def generate_marketing_plan(
+        self,
+        goal: str,
+        budget: float = 5000.0,
+        goal_type: str = "customer_acquisition",
+        duration_days: int = 30,
+        hedge: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Generate campaign content for review without deploying it
+        
+        Args:
+            goal: What the campaign should achieve, used as its target audience brief
+            budget: Campaign budget
+            goal_type: Goal type value, used as the campaign type
+            duration_days: Campaign duration in days
+            hedge: Interactive request; hedge slow LLM calls when hedging is enabled
+        
+        Returns:
+            Campaign dict with the generated campaign_plan
+        """
+        request = self._acquisition_campaign_request()
+        request.update(
+            target_audience=goal,
+            campaign_type=goal_type,
+            budget=float(budget),
+            duration_days=duration_days
+        )
+        return self.acquisition_module.create_promotion_campaign(**request, hedge=hedge)
+
+    def save_campaign_draft(
+        self,
+        campaign_data: Dict[str, Any],
+        goal_type: str = "customer_acquisition"
+    ) -> Dict[str, Any]:
+        """
+        Register generated campaign content as a draft campaign
+        
+        Args:
+            campaign_data: Campaign dict from generate_marketing_plan
+            goal_type: Goal type value the content was generated for
+        
+        Returns:
+            The draft campaign as a dictionary; pass its id to execute_campaign
+        """
+        campaign_type = {
+            "customer_acquisition": "ACQUISITION",
+            "customer_retention": "RETENTION",
+            "seasonal_campaign": "SEASONAL",
+            "community_engagement": "EVENT"
+        }.get(goal_type, "BRAND_AWARENESS")
+        
+        campaign = self.campaign_manager.create_campaign(
+            name=f"{self.client_name} - {goal_type.replace('_', ' ').title()}",
+            campaign_type=campaign_type,
+            description=campaign_data.get("target_audience", ""),
+            start_date=datetime.fromisoformat(campaign_data["start_date"]),
+            end_date=datetime.fromisoformat(campaign_data["end_date"]),
+            budget=float(campaign_data.get("budget", 0.0)),
+            target_metrics={}
+        )
+        campaign.add_asset("campaign_plan", campaign_data.get("campaign_plan", ""))
+        return campaign.to_dict()
+
+    def execute_campaign(
+        self,
+        campaign_id: str,
+        progress: Optional[Callable[[str], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Launch a draft campaign and deploy it to its channels
+        
+        Acquisition campaigns go to new customers, retention campaigns to
+        existing ones and other types to social media.
+        
+        Args:
+            campaign_id: ID of a campaign saved with save_campaign_draft
+            progress: Called with each stage in CAMPAIGN_EXECUTION_STAGES as it starts
+        
+        Returns:
+            Deployment results for the campaign
+        
+        Raises:
+            ValueError: If the campaign does not exist or was already launched
+        """
+        report = progress or (lambda stage: None)
+        
+        report("launching")
+        with self._campaign_lock:
+            campaign = self.campaign_manager.get_campaign(campaign_id)
+            if campaign is None:
+                raise ValueError(f"Campaign not found: {campaign_id}")
+            if campaign.status not in (CampaignStatus.DRAFT, CampaignStatus.PLANNED):
+                raise ValueError(f"Campaign {campaign_id} is already {campaign.status.value}")
+            campaign.update_status(CampaignStatus.PLANNED)
+            self.campaign_manager.launch_campaign(campaign_id)
+        
+        report("deploying")
+        content = {
+            "campaign_type": campaign.campaign_type.value,
+            "campaign_plan": campaign.assets.get("campaign_plan", campaign.description)
+        }
+        if campaign.campaign_type == CampaignType.ACQUISITION:
+            deployment_results = self.deployment_service.deploy_customer_acquisition_campaign(
+                campaign_id=campaign_id,
+                campaign_content=content,
+                target_segment="new"
+            )
+        elif campaign.campaign_type == CampaignType.RETENTION:
+            deployment_results = self.deployment_service.deploy_retention_campaign(
+                campaign_id=campaign_id,
+                campaign_content=content
+            )
+        else:
+            deployment_results = self.deployment_service.deploy_digital_campaign(
+                campaign_id=campaign_id,
+                campaign_content=content
+            )
+        
+        report("recording")
+        for channel in deployment_results.get("channels_deployed", []):
+            campaign.add_channel(channel)
+        campaign.update_performance({
+            "emails_sent": deployment_results.get("email", {}).get("sent", 0),
+            "social_posts": deployment_results.get("social_media", {}).get("posts_created", 0),
+            "total_reach": deployment_results.get("total_reach", 0),
+            "deployment_date": deployment_results.get("deployed_at")
+        })
+        
+        return {
+            "campaign_id": campaign.id,
+            "campaign_name": campaign.name,
+            "status": campaign.status.value,
+            "channels_deployed": deployment_results.get("channels_deployed", []),
+            "deployment": deployment_results
+        }
+    
+    def _execute_customer_acquisition(self, goal: Goal) -> Dict[str, Any]:
+        """Execute customer acquisition goal"""
+        # Generate campaign content using AI
+        campaign_data = self.acquisition_module.create_promotion_campaign(
+            **self._acquisition_campaign_request()
         )
         
+        return self._deploy_customer_acquisition(goal, campaign_data)
+    
+    async def _aexecute_customer_acquisition(self, goal: Goal) -> Dict[str, Any]:
+        """Async version of _execute_customer_acquisition"""
+        campaign_data = await self.acquisition_module.acreate_promotion_campaign(
+            **self._acquisition_campaign_request()
+        )
+        
+        return self._deploy_customer_acquisition(goal, campaign_data)
+    
+    def _deploy_customer_acquisition(self, goal: Goal, campaign_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Create, launch and deploy an acquisition campaign from generated content"""
+        # Extract target and duration from goal
+        target_customers = 100  # Default
+        duration_days = 30  # Default
+        
         # Create campaign in campaign manager
         campaign = self.campaign_manager.create_campaign(
             name=f"{self.client_name} - Customer Acquisition",
@@ -485,11 +1014,11 @@ class RetailMarketingAgent(BaseAgent):
             "message": "Community engagement initiatives launched"
         }
     
-    def evaluate(self, goal: Goal, results: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Evaluate the results of goal execution using AI
-        """
-        evaluation_prompt = ChatPromptTemplate.from_messages([
+    @staticmethod
+    @registered_prompt("agent.evaluate")
+    def _evaluation_prompt() -> ChatPromptTemplate:
+        """Build the prompt used to evaluate execution results"""
+        return ChatPromptTemplate.from_messages([
             ("system", """You are an expert retail marketing analyst. Evaluate the execution results 
             of a marketing goal and provide insights and recommendations."""),
             ("user", """Goal: {goal_description}
@@ -507,35 +1036,243 @@ class RetailMarketingAgent(BaseAgent):
             
             Format as structured bullet points.""")
         ])
-        
-        chain = evaluation_prompt | self.llm
-        
-        evaluation_response = chain.invoke({
+    
+    def _compact_results(self, results: Dict[str, Any]) -> Tuple[str, int]:
+        """Execution results as prompt text, and the tokens saved by compacting them"""
+        if not settings.evaluation.compact_results:
+            return str(results), 0
+        return result_compactor.compact(results, settings.evaluation.results_token_budget)
+    
+    def _evaluation_inputs(self, goal: Goal, results_text: str) -> Dict[str, Any]:
+        """Template variables for the evaluation prompt"""
+        return {
             "goal_description": goal.description,
             "target": goal.target,
             "timeframe": goal.timeframe,
-            "results": str(results)
-        })
-        
-        evaluation = evaluation_response.content if hasattr(evaluation_response, 'content') else str(evaluation_response)
-        
+            "results": results_text
+        }
+    
+    def evaluate(self, goal: Goal, results: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Evaluate the results of goal execution using AI
+        """
+        results_text, tokens_saved = self._compact_results(results)
+        evaluation = invoke_prompt(
+            self._evaluation_prompt(), self.llm, self._evaluation_inputs(goal, results_text), name="agent.evaluate"
+        )
+        return self._evaluation_result(goal, evaluation, tokens_saved)
+    
+    @staticmethod
+    def _evaluation_result(goal: Goal, evaluation_text: str, tokens_saved: int) -> Dict[str, Any]:
+        """Evaluation record for a goal evaluated on its own"""
         return {
-            "evaluation_text": evaluation,
+            "evaluation_text": evaluation_text,
             "goal_id": goal.id,
+            "results_tokens_saved": tokens_saved,
             "timestamp": datetime.now().isoformat()
         }
     
-    def get_status_report(self) -> Dict[str, Any]:
-        """Get a comprehensive status report of all goals and activities"""
+    @staticmethod
+    @registered_prompt("agent.evaluate_batch")
+    def _batch_evaluation_prompt() -> ChatPromptTemplate:
+        """Build the prompt used to evaluate several goals in one call"""
+        return ChatPromptTemplate.from_messages([
+            ("system", """You are an expert retail marketing analyst. Evaluate the execution results 
+            of each marketing goal and provide insights and recommendations."""),
+            ("user", """Evaluate each of these {goal_count} goals on its own.
+            
+            {goals}
+            
+            For each goal provide:
+            1. Success assessment (score 0-100)
+            2. Key achievements
+            3. Areas for improvement
+            4. Next steps and recommendations
+            
+            Start each goal's evaluation with its header line exactly as given above
+            (### GOAL followed by the goal id) and format it as structured bullet points.""")
+        ])
+    
+    @staticmethod
+    def _batch_goal_section(goal: Goal, results_text: str) -> str:
+        """One goal's part of the batch evaluation prompt"""
+        return (
+            f"### GOAL {goal.id}\n"
+            f"Goal: {goal.description}\n"
+            f"Target: {goal.target}\n"
+            f"Timeframe: {goal.timeframe}\n"
+            f"Execution Results:\n{results_text}"
+        )
+    
+    def _parse_batch_evaluation(self, response_text: str, goal_ids: List[str]) -> Dict[str, str]:
+        """Split a batch evaluation response into evaluation text per goal id"""
+        # Only the expected ids count as headers, so a line like "Goal achieved" stays text
+        headers = [h for h in self.BATCH_GOAL_HEADER.finditer(response_text) if h.group(1) in goal_ids]
+        sections: Dict[str, str] = {}
+        for index, header in enumerate(headers):
+            end = headers[index + 1].start() if index + 1 < len(headers) else len(response_text)
+            text = response_text[header.end():end].strip()
+            if text:
+                sections[header.group(1)] = text
+        return sections
+    
+    @staticmethod
+    def _prompt_tokens(prompt: ChatPromptTemplate, variables: Dict[str, Any]) -> int:
+        return sum(estimate_tokens(str(m.content)) for m in prompt.format_messages(**variables))
+    
+    def evaluate_batch(
+        self,
+        items: List[Tuple[Goal, Dict[str, Any]]]
+    ) -> List[Union[Dict[str, Any], Exception]]:
+        """
+        Evaluate several goals with one LLM call
+        
+        Each goal's compacted results go into its own "### GOAL <id>" section
+        of a single prompt, and the response is split on the same headers.
+        Goals whose section is missing or empty (or every goal, if the call
+        fails) are evaluated individually instead. Round-trips and estimated
+        prompt tokens, next to what per-goal evaluation would have used, are
+        added to evaluation_stats.
+        
+        Args:
+            items: (goal, execution results) pairs
+        
+        Returns:
+            Evaluation dict (as from evaluate) or the raised exception for each goal, in order
+        """
+        if not items:
+            return []
+        compacted = [self._compact_results(results) for _, results in items]
+        per_goal_inputs = [
+            self._evaluation_inputs(goal, results_text)
+            for (goal, _), (results_text, _) in zip(items, compacted)
+        ]
+        per_goal_tokens = sum(self._prompt_tokens(self._evaluation_prompt(), v) for v in per_goal_inputs)
+        
+        batch_inputs = {
+            "goal_count": len(items),
+            "goals": "\n\n".join(
+                self._batch_goal_section(goal, results_text)
+                for (goal, _), (results_text, _) in zip(items, compacted)
+            )
+        }
+        prompt_tokens = self._prompt_tokens(self._batch_evaluation_prompt(), batch_inputs)
+        try:
+            sections = self._parse_batch_evaluation(invoke_prompt(
+                self._batch_evaluation_prompt(), self.llm, batch_inputs, name="agent.evaluate_batch"
+            ), [goal.id for goal, _ in items])
+        except Exception:
+            sections = {}
+        
+        evaluations: List[Union[Dict[str, Any], Exception, None]] = []
+        fallback = []
+        for index, ((goal, _), (_, tokens_saved)) in enumerate(zip(items, compacted)):
+            text = sections.get(goal.id)
+            if text is None:
+                fallback.append(index)
+                evaluations.append(None)
+                continue
+            evaluations.append({
+                "evaluation_text": text,
+                "goal_id": goal.id,
+                "results_tokens_saved": tokens_saved,
+                "batched": True,
+                "timestamp": datetime.now().isoformat()
+            })
+        
+        if fallback:
+            responses = batch_prompt(
+                self._evaluation_prompt(), self.llm,
+                [per_goal_inputs[i] for i in fallback], name="agent.evaluate"
+            )
+            for index, response in zip(fallback, responses):
+                goal = items[index][0]
+                prompt_tokens += self._prompt_tokens(self._evaluation_prompt(), per_goal_inputs[index])
+                evaluations[index] = response if isinstance(response, Exception) else {
+                    "evaluation_text": response,
+                    "goal_id": goal.id,
+                    "results_tokens_saved": compacted[index][1],
+                    "batched": False,
+                    "timestamp": datetime.now().isoformat()
+                }
+        
+        with self._evaluation_lock:
+            stats = self.evaluation_stats
+            stats["batches"] += 1
+            stats["goals"] += len(items)
+            stats["round_trips"] += 1 + len(fallback)
+            stats["fallbacks"] += len(fallback)
+            stats["prompt_tokens"] += prompt_tokens
+            stats["per_goal_prompt_tokens"] += per_goal_tokens
+        return evaluations
+    
+    def get_evaluation_stats(self) -> Dict[str, Any]:
+        """Batch evaluation round-trips and prompt tokens next to per-goal evaluation"""
+        with self._evaluation_lock:
+            stats = dict(self.evaluation_stats)
+        stats["batch_size"] = settings.evaluation.batch_size
+        stats["per_goal_round_trips"] = stats["goals"]
+        stats["round_trips_saved"] = stats["goals"] - stats["round_trips"]
+        stats["prompt_tokens_saved"] = stats["per_goal_prompt_tokens"] - stats["prompt_tokens"]
+        return stats
+    
+    async def aevaluate(self, goal: Goal, results: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Async version of evaluate, built on ainvoke
+        """
+        results_text, tokens_saved = self._compact_results(results)
+        evaluation = await ainvoke_prompt(
+            self._evaluation_prompt(), self.llm, self._evaluation_inputs(goal, results_text), name="agent.evaluate"
+        )
+        return self._evaluation_result(goal, evaluation, tokens_saved)
+    
+    # Goals listed by get_status_report unless the caller asks for another window
+    STATUS_REPORT_GOALS = 50
+    
+    def get_status_report(self, max_goals: Optional[int] = STATUS_REPORT_GOALS) -> Dict[str, Any]:
+        """
+        Get a comprehensive status report of all goals and activities
+        
+        Subsystems that have not been built yet are not built for the report:
+        customer_stats is None until the deployment service has loaded the
+        customer database, and all_campaigns is empty until the campaign
+        manager exists.
+        
+        Args:
+            max_goals: Number of most recent goals to list under "goals"; None
+                lists every goal. The counts always cover every goal and come
+                from the goal store's indexes, so a report costs the window
+                size, not the agent's whole goal history.
+        """
+        semantic_cache = get_semantic_cache()
+        deployment_service = self.built_subsystem("deployment_service")
+        campaign_manager = self.built_subsystem("campaign_manager")
+        goals = self.goals if max_goals is None else self.goals.recent(max_goals)
         return {
+            "agent_id": self.agent_id,
             "client_name": self.client_name,
             "store_type": self.store_type,
             "total_goals": len(self.goals),
-            "active_goals": len(self.get_active_goals()),
-            "completed_goals": len(self.get_completed_goals()),
-            "goals": [g.to_dict() for g in self.goals],
-            "customer_stats": self.deployment_service.get_customer_stats(),
-            "all_campaigns": self.campaign_manager.get_all_campaigns()
+            "active_goals": self.goals.count(GoalStatus.PENDING, GoalStatus.IN_PROGRESS),
+            "completed_goals": self.goals.count(GoalStatus.COMPLETED),
+            "goals_by_status": self.goals.status_counts(),
+            "goals_by_type": self.goals.type_counts(),
+            "goals": [g.to_dict() for g in goals],
+            "customer_stats": deployment_service.get_customer_stats() if deployment_service is not None else None,
+            "all_campaigns": campaign_manager.get_all_campaigns() if campaign_manager is not None else [],
+            "llm_metrics": get_llm_metrics().get_stats(),
+            "single_flight": get_single_flight_stats(),
+            "rate_limiter": get_rate_limiter_stats(),
+            "semantic_cache": semantic_cache.get_stats() if semantic_cache is not None else None,
+            "result_compaction": result_compactor.stats(),
+            "routing": get_routing_stats(),
+            "hedging": get_hedging_stats(),
+            "scheduler": self.goal_scheduler.stats(),
+            "pipeline": self.goal_pipeline.stats(),
+            "subsystems": self.subsystem_status(),
+            "memory": self.memory.stats(),
+            "evaluation_batching": self.get_evaluation_stats(),
+            "checkpoints": self.checkpoints.stats(self.agent_id) if self.checkpoints is not None else None
         }
     
     def get_deployment_overview(self, campaign_id: str) -> Dict[str, Any]:
@@ -7,7 +7,8 @@ from datetime import datetime
 import json
 from langchain_core.prompts import ChatPromptTemplate
 
-from ..utils.llm_helper import get_llm
+from ..utils.llm_helper import get_llm, invoke_prompt, ainvoke_prompt
+from ..utils.prompt_registry import registered_prompt
 
 
 class CustomerAnalyticsModule:
@@ -16,21 +17,11 @@ class CustomerAnalyticsModule:
     def __init__(self):
         self.llm = get_llm(temperature=0.3)  # Lower temperature for more analytical responses
     
-    def analyze_sales_data(
-        self,
-        sales_data: Dict[str, Any],
-        time_period: str,
-        store_context: Dict[str, Any]
-    ) -> Dict[str, Any]:
-        """
-        Analyze sales data and provide insights
-        
-        Args:
-            sales_data: Sales data dictionary with metrics
-            time_period: Time period of the data
-            store_context: Store information
-        """
-        prompt = ChatPromptTemplate.from_messages([
+    @staticmethod
+    @registered_prompt("customer_analytics.analyze_sales_data")
+    def _analyze_sales_data_prompt() -> ChatPromptTemplate:
+        """Build the prompt for analyze_sales_data"""
+        return ChatPromptTemplate.from_messages([
             ("system", """You are an expert retail analytics consultant.
             Analyze sales data and provide actionable insights."""),
             ("user", """Store: {store_name}
@@ -52,39 +43,73 @@ class CustomerAnalyticsModule:
             
             Be specific and data-driven in your insights.""")
         ])
-        
-        chain = prompt | self.llm
-        
-        response = chain.invoke({
+    
+    @staticmethod
+    def _analyze_sales_data_inputs(
+        sales_data: Dict[str, Any],
+        time_period: str,
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Prompt variables for analyze_sales_data"""
+        return {
             "store_name": store_context.get("name", "Store"),
             "store_type": store_context.get("type", "retail"),
             "time_period": time_period,
             "sales_data": json.dumps(sales_data, indent=2)
-        })
-        
-        analysis = response.content if hasattr(response, 'content') else str(response)
-        
+        }
+    
+    @staticmethod
+    def _analyze_sales_data_result(
+        analysis: Optional[str],
+        time_period: str
+    ) -> Dict[str, Any]:
+        """Result of analyze_sales_data"""
         return {
             "analysis": analysis,
             "time_period": time_period,
             "analyzed_at": datetime.now().isoformat()
         }
     
-    def segment_customers(
+    def analyze_sales_data(
         self,
-        customer_data: List[Dict[str, Any]],
-        segmentation_criteria: str,
+        sales_data: Dict[str, Any],
+        time_period: str,
         store_context: Dict[str, Any]
     ) -> Dict[str, Any]:
         """
-        Segment customers based on behavior and characteristics
+        Analyze sales data and provide insights
         
         Args:
-            customer_data: List of customer records
-            segmentation_criteria: Criteria for segmentation (RFM, demographics, behavior)
+            sales_data: Sales data dictionary with metrics
+            time_period: Time period of the data
             store_context: Store information
         """
-        prompt = ChatPromptTemplate.from_messages([
+        prompt = self._analyze_sales_data_prompt()
+        
+        inputs = self._analyze_sales_data_inputs(sales_data, time_period, store_context)
+        analysis = invoke_prompt(prompt, self.llm, inputs, name="customer_analytics.analyze_sales_data")
+        
+        return self._analyze_sales_data_result(analysis, time_period)
+    
+    async def aanalyze_sales_data(
+        self,
+        sales_data: Dict[str, Any],
+        time_period: str,
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Async version of analyze_sales_data, built on ainvoke"""
+        prompt = self._analyze_sales_data_prompt()
+        
+        inputs = self._analyze_sales_data_inputs(sales_data, time_period, store_context)
+        analysis = await ainvoke_prompt(prompt, self.llm, inputs, name="customer_analytics.analyze_sales_data")
+        
+        return self._analyze_sales_data_result(analysis, time_period)
+    
+    @staticmethod
+    @registered_prompt("customer_analytics.segment_customers")
+    def _segment_customers_prompt() -> ChatPromptTemplate:
+        """Build the prompt for segment_customers"""
+        return ChatPromptTemplate.from_messages([
             ("system", """You are an expert in customer segmentation and targeting.
             Create meaningful customer segments for personalized marketing."""),
             ("user", """Store: {store_name}
@@ -105,18 +130,28 @@ class CustomerAnalyticsModule:
             
             Create 4-6 actionable segments.""")
         ])
-        
-        chain = prompt | self.llm
-        
-        response = chain.invoke({
+    
+    @staticmethod
+    def _segment_customers_inputs(
+        customer_data: List[Dict[str, Any]],
+        segmentation_criteria: str,
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Prompt variables for segment_customers"""
+        return {
             "store_name": store_context.get("name", "Store"),
             "store_type": store_context.get("type", "retail"),
             "segmentation_criteria": segmentation_criteria,
             "customer_count": len(customer_data)
-        })
-        
-        segmentation = response.content if hasattr(response, 'content') else str(response)
-        
+        }
+    
+    @staticmethod
+    def _segment_customers_result(
+        segmentation: Optional[str],
+        customer_data: List[Dict[str, Any]],
+        segmentation_criteria: str
+    ) -> Dict[str, Any]:
+        """Result of segment_customers"""
         return {
             "segmentation": segmentation,
             "criteria": segmentation_criteria,
@@ -124,19 +159,46 @@ class CustomerAnalyticsModule:
             "created_at": datetime.now().isoformat()
         }
     
-    def analyze_shopping_patterns(
+    def segment_customers(
         self,
-        transaction_data: List[Dict[str, Any]],
+        customer_data: List[Dict[str, Any]],
+        segmentation_criteria: str,
         store_context: Dict[str, Any]
     ) -> Dict[str, Any]:
         """
-        Analyze shopping patterns and basket analysis
+        Segment customers based on behavior and characteristics
         
         Args:
-            transaction_data: List of transaction records
+            customer_data: List of customer records
+            segmentation_criteria: Criteria for segmentation (RFM, demographics, behavior)
             store_context: Store information
         """
-        prompt = ChatPromptTemplate.from_messages([
+        prompt = self._segment_customers_prompt()
+        
+        inputs = self._segment_customers_inputs(customer_data, segmentation_criteria, store_context)
+        segmentation = invoke_prompt(prompt, self.llm, inputs, name="customer_analytics.segment_customers")
+        
+        return self._segment_customers_result(segmentation, customer_data, segmentation_criteria)
+    
+    async def asegment_customers(
+        self,
+        customer_data: List[Dict[str, Any]],
+        segmentation_criteria: str,
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Async version of segment_customers, built on ainvoke"""
+        prompt = self._segment_customers_prompt()
+        
+        inputs = self._segment_customers_inputs(customer_data, segmentation_criteria, store_context)
+        segmentation = await ainvoke_prompt(prompt, self.llm, inputs, name="customer_analytics.segment_customers")
+        
+        return self._segment_customers_result(segmentation, customer_data, segmentation_criteria)
+    
+    @staticmethod
+    @registered_prompt("customer_analytics.analyze_shopping_patterns")
+    def _analyze_shopping_patterns_prompt() -> ChatPromptTemplate:
+        """Build the prompt for analyze_shopping_patterns"""
+        return ChatPromptTemplate.from_messages([
             ("system", """You are an expert in retail analytics and market basket analysis.
             Identify shopping patterns that can improve merchandising and promotions."""),
             ("user", """Store: {store_name}
@@ -157,38 +219,68 @@ class CustomerAnalyticsModule:
             
             Focus on opportunities to increase basket size and frequency.""")
         ])
-        
-        chain = prompt | self.llm
-        
-        response = chain.invoke({
+    
+    @staticmethod
+    def _analyze_shopping_patterns_inputs(
+        transaction_data: List[Dict[str, Any]],
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Prompt variables for analyze_shopping_patterns"""
+        return {
             "store_name": store_context.get("name", "Store"),
             "store_type": store_context.get("type", "retail"),
             "transaction_count": len(transaction_data)
-        })
-        
-        pattern_analysis = response.content if hasattr(response, 'content') else str(response)
-        
+        }
+    
+    @staticmethod
+    def _analyze_shopping_patterns_result(
+        pattern_analysis: Optional[str],
+        transaction_data: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Result of analyze_shopping_patterns"""
         return {
             "pattern_analysis": pattern_analysis,
             "transactions_analyzed": len(transaction_data),
             "analyzed_at": datetime.now().isoformat()
         }
     
-    def process_customer_feedback(
+    def analyze_shopping_patterns(
         self,
-        feedback_data: List[Dict[str, Any]],
-        feedback_type: str,
+        transaction_data: List[Dict[str, Any]],
         store_context: Dict[str, Any]
     ) -> Dict[str, Any]:
         """
-        Process and analyze customer feedback
+        Analyze shopping patterns and basket analysis
         
         Args:
-            feedback_data: List of feedback records (reviews, surveys, comments)
-            feedback_type: Type of feedback (reviews, surveys, social_media)
+            transaction_data: List of transaction records
             store_context: Store information
         """
-        prompt = ChatPromptTemplate.from_messages([
+        prompt = self._analyze_shopping_patterns_prompt()
+        
+        inputs = self._analyze_shopping_patterns_inputs(transaction_data, store_context)
+        pattern_analysis = invoke_prompt(prompt, self.llm, inputs, name="customer_analytics.analyze_shopping_patterns")
+        
+        return self._analyze_shopping_patterns_result(pattern_analysis, transaction_data)
+    
+    async def aanalyze_shopping_patterns(
+        self,
+        transaction_data: List[Dict[str, Any]],
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Async version of analyze_shopping_patterns, built on ainvoke"""
+        prompt = self._analyze_shopping_patterns_prompt()
+        
+        inputs = self._analyze_shopping_patterns_inputs(transaction_data, store_context)
+        pattern_analysis = await ainvoke_prompt(prompt, self.llm, inputs, name="customer_analytics.analyze_shopping_patterns")
+        
+        return self._analyze_shopping_patterns_result(pattern_analysis, transaction_data)
+    
+    @staticmethod
+    @registered_prompt("customer_analytics.process_customer_feedback")
+    def _process_customer_feedback_prompt() -> ChatPromptTemplate:
+        """Build the prompt for process_customer_feedback"""
+        return ChatPromptTemplate.from_messages([
             ("system", """You are an expert in customer sentiment analysis and feedback processing.
             Extract insights from customer feedback to improve service and offerings."""),
             ("user", """Store: {store_name}
@@ -210,18 +302,28 @@ class CustomerAnalyticsModule:
             
             Be objective and specific in identifying issues and opportunities.""")
         ])
-        
-        chain = prompt | self.llm
-        
-        response = chain.invoke({
+    
+    @staticmethod
+    def _process_customer_feedback_inputs(
+        feedback_data: List[Dict[str, Any]],
+        feedback_type: str,
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Prompt variables for process_customer_feedback"""
+        return {
             "store_name": store_context.get("name", "Store"),
             "store_type": store_context.get("type", "retail"),
             "feedback_type": feedback_type,
             "feedback_count": len(feedback_data)
-        })
-        
-        feedback_analysis = response.content if hasattr(response, 'content') else str(response)
-        
+        }
+    
+    @staticmethod
+    def _process_customer_feedback_result(
+        feedback_analysis: Optional[str],
+        feedback_data: List[Dict[str, Any]],
+        feedback_type: str
+    ) -> Dict[str, Any]:
+        """Result of process_customer_feedback"""
         return {
             "feedback_analysis": feedback_analysis,
             "feedback_type": feedback_type,
@@ -229,19 +331,46 @@ class CustomerAnalyticsModule:
             "analyzed_at": datetime.now().isoformat()
         }
     
-    def predict_customer_lifetime_value(
+    def process_customer_feedback(
         self,
-        customer_profile: Dict[str, Any],
+        feedback_data: List[Dict[str, Any]],
+        feedback_type: str,
         store_context: Dict[str, Any]
     ) -> Dict[str, Any]:
         """
-        Predict customer lifetime value and retention probability
+        Process and analyze customer feedback
         
         Args:
-            customer_profile: Customer data and purchase history
+            feedback_data: List of feedback records (reviews, surveys, comments)
+            feedback_type: Type of feedback (reviews, surveys, social_media)
             store_context: Store information
         """
-        prompt = ChatPromptTemplate.from_messages([
+        prompt = self._process_customer_feedback_prompt()
+        
+        inputs = self._process_customer_feedback_inputs(feedback_data, feedback_type, store_context)
+        feedback_analysis = invoke_prompt(prompt, self.llm, inputs, name="customer_analytics.process_customer_feedback")
+        
+        return self._process_customer_feedback_result(feedback_analysis, feedback_data, feedback_type)
+    
+    async def aprocess_customer_feedback(
+        self,
+        feedback_data: List[Dict[str, Any]],
+        feedback_type: str,
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Async version of process_customer_feedback, built on ainvoke"""
+        prompt = self._process_customer_feedback_prompt()
+        
+        inputs = self._process_customer_feedback_inputs(feedback_data, feedback_type, store_context)
+        feedback_analysis = await ainvoke_prompt(prompt, self.llm, inputs, name="customer_analytics.process_customer_feedback")
+        
+        return self._process_customer_feedback_result(feedback_analysis, feedback_data, feedback_type)
+    
+    @staticmethod
+    @registered_prompt("customer_analytics.predict_customer_lifetime_value")
+    def _predict_customer_lifetime_value_prompt() -> ChatPromptTemplate:
+        """Build the prompt for predict_customer_lifetime_value"""
+        return ChatPromptTemplate.from_messages([
             ("system", """You are an expert in predictive customer analytics and CLV modeling.
             Assess customer value and retention probability."""),
             ("user", """Store: {store_name}
@@ -262,38 +391,68 @@ class CustomerAnalyticsModule:
             
             Base predictions on behavior patterns and industry benchmarks.""")
         ])
-        
-        chain = prompt | self.llm
-        
-        response = chain.invoke({
+    
+    @staticmethod
+    def _predict_customer_lifetime_value_inputs(
+        customer_profile: Dict[str, Any],
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Prompt variables for predict_customer_lifetime_value"""
+        return {
             "store_name": store_context.get("name", "Store"),
             "store_type": store_context.get("type", "retail"),
             "customer_profile": json.dumps(customer_profile, indent=2)
-        })
-        
-        prediction = response.content if hasattr(response, 'content') else str(response)
-        
+        }
+    
+    @staticmethod
+    def _predict_customer_lifetime_value_result(
+        prediction: Optional[str],
+        customer_profile: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Result of predict_customer_lifetime_value"""
         return {
             "prediction": prediction,
             "customer_id": customer_profile.get("id", "unknown"),
             "predicted_at": datetime.now().isoformat()
         }
     
-    def generate_performance_report(
+    def predict_customer_lifetime_value(
         self,
-        metrics: Dict[str, Any],
-        comparison_period: Optional[str],
+        customer_profile: Dict[str, Any],
         store_context: Dict[str, Any]
     ) -> Dict[str, Any]:
         """
-        Generate comprehensive performance report
+        Predict customer lifetime value and retention probability
         
         Args:
-            metrics: Dictionary of performance metrics
-            comparison_period: Previous period to compare against
+            customer_profile: Customer data and purchase history
             store_context: Store information
         """
-        prompt = ChatPromptTemplate.from_messages([
+        prompt = self._predict_customer_lifetime_value_prompt()
+        
+        inputs = self._predict_customer_lifetime_value_inputs(customer_profile, store_context)
+        prediction = invoke_prompt(prompt, self.llm, inputs, name="customer_analytics.predict_customer_lifetime_value")
+        
+        return self._predict_customer_lifetime_value_result(prediction, customer_profile)
+    
+    async def apredict_customer_lifetime_value(
+        self,
+        customer_profile: Dict[str, Any],
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Async version of predict_customer_lifetime_value, built on ainvoke"""
+        prompt = self._predict_customer_lifetime_value_prompt()
+        
+        inputs = self._predict_customer_lifetime_value_inputs(customer_profile, store_context)
+        prediction = await ainvoke_prompt(prompt, self.llm, inputs, name="customer_analytics.predict_customer_lifetime_value")
+        
+        return self._predict_customer_lifetime_value_result(prediction, customer_profile)
+    
+    @staticmethod
+    @registered_prompt("customer_analytics.generate_performance_report")
+    def _generate_performance_report_prompt() -> ChatPromptTemplate:
+        """Build the prompt for generate_performance_report"""
+        return ChatPromptTemplate.from_messages([
             ("system", """You are an expert retail business analyst.
             Create comprehensive performance reports with insights and recommendations."""),
             ("user", """Store: {store_name}
@@ -316,20 +475,64 @@ class CustomerAnalyticsModule:
             
             Make the report clear, concise, and actionable.""")
         ])
-        
-        chain = prompt | self.llm
-        
-        response = chain.invoke({
+    
+    @staticmethod
+    def _generate_performance_report_inputs(
+        metrics: Dict[str, Any],
+        comparison_period: Optional[str],
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Prompt variables for generate_performance_report"""
+        return {
             "store_name": store_context.get("name", "Store"),
             "store_type": store_context.get("type", "retail"),
             "comparison_period": comparison_period or "N/A",
             "metrics": json.dumps(metrics, indent=2)
-        })
-        
-        report = response.content if hasattr(response, 'content') else str(response)
-        
+        }
+    
+    @staticmethod
+    def _generate_performance_report_result(
+        report: Optional[str],
+        comparison_period: Optional[str]
+    ) -> Dict[str, Any]:
+        """Result of generate_performance_report"""
         return {
             "report": report,
             "report_date": datetime.now().isoformat(),
             "comparison_period": comparison_period
         }
+    
+    def generate_performance_report(
+        self,
+        metrics: Dict[str, Any],
+        comparison_period: Optional[str],
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Generate comprehensive performance report
+        
+        Args:
+            metrics: Dictionary of performance metrics
+            comparison_period: Previous period to compare against
+            store_context: Store information
+        """
+        prompt = self._generate_performance_report_prompt()
+        
+        inputs = self._generate_performance_report_inputs(metrics, comparison_period, store_context)
+        report = invoke_prompt(prompt, self.llm, inputs, name="customer_analytics.generate_performance_report")
+        
+        return self._generate_performance_report_result(report, comparison_period)
+    
+    async def agenerate_performance_report(
+        self,
+        metrics: Dict[str, Any],
+        comparison_period: Optional[str],
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Async version of generate_performance_report, built on ainvoke"""
+        prompt = self._generate_performance_report_prompt()
+        
+        inputs = self._generate_performance_report_inputs(metrics, comparison_period, store_context)
+        report = await ainvoke_prompt(prompt, self.llm, inputs, name="customer_analytics.generate_performance_report")
+        
+        return self._generate_performance_report_result(report, comparison_period)
@@ -2,7 +2,7 @@
 Configuration settings for Retail Marketing Agent
 """
 import os
-from typing import Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
@@ -21,12 +21,201 @@ class OpenAIConfig(BaseModel):
     azure_deployment: str = os.getenv("AZURE_OPENAI_DEPLOYMENT", "gpt-4o")
     azure_api_version: str = os.getenv("AZURE_API_VERSION", "2024-02-15-preview")
     
+    # Cheaper model tier for simple tasks (see RoutingConfig)
+    fast_model: str = os.getenv("OPENAI_FAST_MODEL", "gpt-4o-mini")
+    azure_fast_deployment: str = os.getenv("AZURE_OPENAI_FAST_DEPLOYMENT", "gpt-4o-mini")
+    
     # Use Azure if credentials are provided
     use_azure: bool = bool(os.getenv("AZURE_OPENAI_API_KEY"))
     
+    # LLM backend: "azure", "openai" or "fake" (deterministic offline model)
+    provider: str = os.getenv(
+        "LLM_PROVIDER", "azure" if os.getenv("AZURE_OPENAI_API_KEY") else "openai"
+    ).lower()
+    
+    # Fake provider behaviour (simulated upstream latency and throughput)
+    fake_latency_ms: float = float(os.getenv("FAKE_LLM_LATENCY_MS", "300"))
+    fake_tokens_per_second: float = float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", "50"))
+    fake_response_tokens: int = int(os.getenv("FAKE_LLM_RESPONSE_TOKENS", "400"))
+    # Fraction of fake calls that hit a slow upstream, and their extra delay
+    fake_slow_rate: float = float(os.getenv("FAKE_LLM_SLOW_RATE", "0"))
+    fake_slow_ms: float = float(os.getenv("FAKE_LLM_SLOW_MS", "5000"))
+    
     # Common settings
     temperature: float = 0.7
     max_tokens: int = 2000
+    
+    # Shared HTTP connection pool used by every pooled LLM client
+    http_max_connections: int = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100"))
+    http_max_keepalive: int = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "20"))
+    http_keepalive_expiry: float = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "30"))
+    
+    # Default number of concurrent requests for *_batch module methods
+    batch_max_concurrency: int = int(os.getenv("LLM_BATCH_MAX_CONCURRENCY", "5"))
+    
+    # Coalesce identical concurrent requests into one upstream call
+    single_flight: bool = os.getenv("LLM_SINGLE_FLIGHT", "true").lower() == "true"
+
+
+class LLMCacheConfig(BaseModel):
+    """LLM response cache configuration (opt-in)"""
+    enabled: bool = os.getenv("LLM_CACHE_ENABLED", "false").lower() == "true"
+    path: str = os.getenv("LLM_CACHE_PATH", "llm_cache.db")
+    ttl_seconds: int = int(os.getenv("LLM_CACHE_TTL_SECONDS", "86400"))
+    max_memory_entries: int = int(os.getenv("LLM_CACHE_MAX_MEMORY_ENTRIES", "1000"))
+
+
+class SemanticCacheConfig(BaseModel):
+    """Near-duplicate prompt cache configuration (opt-in)"""
+    enabled: bool = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+    # Minimum cosine similarity of prompt variables for a cached response to be reused
+    threshold: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+    # Entries kept per call site and model
+    max_entries: int = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "500"))
+    # Modules whose outputs may be served from the semantic cache
+    modules: List[str] = [
+        m.strip() for m in os.getenv(
+            "SEMANTIC_CACHE_MODULES", "customer_acquisition,customer_retention,digital_marketing"
+        ).split(",") if m.strip()
+    ]
+
+
+class LLMMetricsConfig(BaseModel):
+    """LLM call instrumentation configuration"""
+    buffer_size: int = int(os.getenv("LLM_METRICS_BUFFER_SIZE", "1000"))
+    # Estimated USD price per 1K tokens, used for cost reporting only
+    prompt_cost_per_1k: float = float(os.getenv("LLM_PROMPT_COST_PER_1K", "0.01"))
+    completion_cost_per_1k: float = float(os.getenv("LLM_COMPLETION_COST_PER_1K", "0.03"))
+
+
+class RateLimitConfig(BaseModel):
+    """Client-side LLM rate limiting, applied per deployment (opt-in)"""
+    enabled: bool = os.getenv("LLM_RATE_LIMIT_ENABLED", "false").lower() == "true"
+    # Should match the deployment's quota; unset leaves that quota unlimited
+    requests_per_minute: Optional[float] = (
+        float(os.environ["LLM_REQUESTS_PER_MINUTE"]) if os.getenv("LLM_REQUESTS_PER_MINUTE") else None
+    )
+    tokens_per_minute: Optional[float] = (
+        float(os.environ["LLM_TOKENS_PER_MINUTE"]) if os.getenv("LLM_TOKENS_PER_MINUTE") else None
+    )
+    # Completion tokens reserved per request until actual usage is known
+    expected_completion_tokens: int = int(os.getenv("LLM_EXPECTED_COMPLETION_TOKENS", "500"))
+    # Adaptive concurrency bounds and the latency above which it backs off
+    max_concurrency: int = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+    min_concurrency: int = int(os.getenv("LLM_MIN_CONCURRENCY", "1"))
+    latency_target_ms: float = float(os.getenv("LLM_LATENCY_TARGET_MS", "30000"))
+    max_retries: int = int(os.getenv("LLM_RATE_LIMIT_MAX_RETRIES", "3"))
+
+
+class EvaluationConfig(BaseModel):
+    """Goal evaluation configuration"""
+    # Reduce execution results to a KPI digest before sending them to the LLM
+    compact_results: bool = os.getenv("EVAL_COMPACT_RESULTS", "true").lower() == "true"
+    results_token_budget: int = int(os.getenv("EVAL_RESULTS_TOKEN_BUDGET", "150"))
+    # Goals evaluated per LLM call by execute(); 1 evaluates each goal on its own
+    batch_size: int = int(os.getenv("EVAL_BATCH_SIZE", "1"))
+
+
+class RoutingConfig(BaseModel):
+    """Model tier routing per call site (opt-in)"""
+    enabled: bool = os.getenv("LLM_ROUTING_ENABLED", "false").lower() == "true"
+    default_tier: str = os.getenv("LLM_DEFAULT_TIER", "quality")
+    # "<module>.<method>=<tier>" or "<module>=<tier>", comma separated
+    routes: Dict[str, str] = dict(
+        route.strip().split("=", 1) for route in os.getenv(
+            "LLM_ROUTES",
+            "customer_acquisition.generate_targeted_ad_copy=fast,"
+            "instore_marketing.create_signage_materials=fast,"
+            "agent.evaluate=fast,"
+            "agent.evaluate_batch=fast"
+        ).split(",") if "=" in route
+    )
+    # Send quality-tier calls to the fast tier while the quality deployment is backed up
+    fallback_on_load: bool = os.getenv("LLM_TIER_FALLBACK", "false").lower() == "true"
+    fallback_queue_depth: int = int(os.getenv("LLM_TIER_FALLBACK_QUEUE_DEPTH", "8"))
+    # Estimated USD price per 1K tokens for the fast tier
+    fast_prompt_cost_per_1k: float = float(os.getenv("LLM_FAST_PROMPT_COST_PER_1K", "0.00015"))
+    fast_completion_cost_per_1k: float = float(os.getenv("LLM_FAST_COMPLETION_COST_PER_1K", "0.0006"))
+
+
+class HedgingConfig(BaseModel):
+    """Hedged requests for interactive call sites (opt-in)"""
+    enabled: bool = os.getenv("LLM_HEDGING_ENABLED", "false").lower() == "true"
+    # Hedge after this percentile of the call site's recent latencies
+    percentile: float = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+    min_delay_ms: float = float(os.getenv("LLM_HEDGE_MIN_DELAY_MS", "100"))
+    # Delay used until min_samples latencies have been seen
+    initial_delay_ms: float = float(os.getenv("LLM_HEDGE_INITIAL_DELAY_MS", "2000"))
+    min_samples: int = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+    # Hedges may not exceed this fraction of hedgeable requests
+    max_extra_load: float = float(os.getenv("LLM_HEDGE_MAX_EXTRA_LOAD", "0.1"))
+    max_workers: int = int(os.getenv("LLM_HEDGE_MAX_WORKERS", "32"))
+
+
+def _parse_goal_dependencies(value: str) -> Dict[str, List[str]]:
+    """Parse "<goal_type>=<prerequisite goal_type>" pairs into goal_type -> prerequisites"""
+    dependencies: Dict[str, List[str]] = {}
+    for rule in value.split(","):
+        if "=" in rule:
+            dependent, prerequisite = (part.strip() for part in rule.split("=", 1))
+            dependencies.setdefault(dependent, []).append(prerequisite)
+    return dependencies
+
+
+class SchedulerConfig(BaseModel):
+    """Goal scheduler configuration"""
+    # Goals executed in parallel
+    max_workers: int = int(os.getenv("GOAL_SCHEDULER_MAX_WORKERS", "4"))
+    # Priority added per minute a ready goal waits for a worker
+    aging_per_minute: float = float(os.getenv("GOAL_PRIORITY_AGING_PER_MINUTE", "1.0"))
+    # "<goal_type>=<prerequisite goal_type>", comma separated: goals of the
+    # first type wait for all goals of the second type in the same run
+    type_dependencies: Dict[str, List[str]] = _parse_goal_dependencies(
+        os.getenv("GOAL_DEPENDENCIES", "customer_retention=analytics_insights")
+    )
+    # Goals each stage of the pipelined executor may have queued
+    pipeline_queue_size: int = int(os.getenv("GOAL_PIPELINE_QUEUE_SIZE", "2"))
+
+
+class CheckpointConfig(BaseModel):
+    """Goal checkpoint configuration (opt-in)"""
+    enabled: bool = os.getenv("GOAL_CHECKPOINT_ENABLED", "false").lower() == "true"
+    path: str = os.getenv("GOAL_CHECKPOINT_PATH", "goal_checkpoints.db")
+
+
+class MemoryConfig(BaseModel):
+    """Per-agent memory configuration"""
+    # Bytes of memory values (pickled size) kept in RAM per agent; colder entries go to disk
+    budget_bytes: int = int(os.getenv("AGENT_MEMORY_BUDGET_BYTES", str(2 * 1024 * 1024)))
+    # Directory for the spill file (default: the system temp directory)
+    spill_dir: str = os.getenv("AGENT_MEMORY_SPILL_DIR", "")
+    compression_level: int = int(os.getenv("AGENT_MEMORY_COMPRESSION_LEVEL", "6"))
+
+
+class JobQueueConfig(BaseModel):
+    """Background job configuration for long-running API calls"""
+    # Jobs run in parallel
+    max_workers: int = int(os.getenv("JOB_WORKERS", "4"))
+    # Jobs that may wait for a worker before new submissions are rejected
+    max_pending: int = int(os.getenv("JOB_QUEUE_SIZE", "64"))
+    # How long finished jobs and their results stay retrievable
+    result_ttl_seconds: float = float(os.getenv("JOB_RESULT_TTL_SECONDS", "3600"))
+    max_retained: int = int(os.getenv("JOB_MAX_RETAINED", "1000"))
+
+
+class AgentPoolConfig(BaseModel):
+    """Agent pool configuration for the API's per-tenant agents"""
+    # Agents kept in memory; least recently used idle agents are snapshotted to disk beyond this
+    max_agents: int = int(os.getenv("AGENT_POOL_MAX_AGENTS", "100"))
+    # Total snapshot size (pickled bytes) of the agents kept in memory
+    memory_budget_bytes: int = int(os.getenv("AGENT_POOL_MEMORY_BUDGET_BYTES", str(256 * 1024 * 1024)))
+    # Agents unused for this long are snapshotted even when the pool has room
+    idle_ttl_seconds: float = float(os.getenv("AGENT_POOL_IDLE_TTL_SECONDS", "1800"))
+    snapshot_dir: str = os.getenv("AGENT_POOL_SNAPSHOT_DIR", "agent_snapshots")
+    # Records per chunk of an agent's customers, emails, posts and comments in its snapshot
+    snapshot_chunk_records: int = int(os.getenv("AGENT_SNAPSHOT_CHUNK_RECORDS", "16384"))
+    # Incremental snapshot segments kept per agent before a full snapshot replaces them
+    snapshot_max_segments: int = int(os.getenv("AGENT_SNAPSHOT_MAX_SEGMENTS", "16"))
 
 
 class StoreConfig(BaseModel):
@@ -75,6 +264,18 @@ class CampaignConfig(BaseModel):
 class Settings(BaseModel):
     """Main settings class"""
     openai: OpenAIConfig = OpenAIConfig()
+    llm_cache: LLMCacheConfig = LLMCacheConfig()
+    semantic_cache: SemanticCacheConfig = SemanticCacheConfig()
+    llm_metrics: LLMMetricsConfig = LLMMetricsConfig()
+    rate_limit: RateLimitConfig = RateLimitConfig()
+    evaluation: EvaluationConfig = EvaluationConfig()
+    routing: RoutingConfig = RoutingConfig()
+    hedging: HedgingConfig = HedgingConfig()
+    scheduler: SchedulerConfig = SchedulerConfig()
+    checkpoint: CheckpointConfig = CheckpointConfig()
+    memory: MemoryConfig = MemoryConfig()
+    jobs: JobQueueConfig = JobQueueConfig()
+    agent_pool: AgentPoolConfig = AgentPoolConfig()
     store: StoreConfig = StoreConfig()
     social_media: SocialMediaConfig = SocialMediaConfig()
     email: EmailConfig = EmailConfig()
@@ -2,11 +2,13 @@
 Customer Acquisition Module
 Handles promotional campaigns, targeting, and new customer acquisition strategies
 """
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Iterator, Optional
+from contextlib import closing
 from datetime import datetime, timedelta
 from langchain_core.prompts import ChatPromptTemplate
 
-from ..utils.llm_helper import get_llm
+from ..utils.llm_helper import get_llm, invoke_prompt, ainvoke_prompt, batch_prompt, stream_prompt
+from ..utils.prompt_registry import registered_prompt
 
 
 class CustomerAcquisitionModule:
@@ -15,25 +17,11 @@ class CustomerAcquisitionModule:
     def __init__(self):
         self.llm = get_llm()
     
-    def create_promotion_campaign(
-        self,
-        target_audience: str,
-        campaign_type: str,
-        budget: float,
-        duration_days: int,
-        store_context: Dict[str, Any]
-    ) -> Dict[str, Any]:
-        """
-        Create a promotional campaign to acquire new customers
-        
-        Args:
-            target_audience: Description of target customer segment
-            campaign_type: Type of campaign (seasonal, clearance, new_product, etc.)
-            budget: Campaign budget
-            duration_days: Campaign duration in days
-            store_context: Store information (name, type, location)
-        """
-        prompt = ChatPromptTemplate.from_messages([
+    @staticmethod
+    @registered_prompt("customer_acquisition.create_promotion_campaign")
+    def _create_promotion_campaign_prompt() -> ChatPromptTemplate:
+        """Build the prompt for create_promotion_campaign"""
+        return ChatPromptTemplate.from_messages([
             ("system", """You are an expert retail marketing strategist specializing in customer acquisition.
             Create a comprehensive promotional campaign that will attract new customers."""),
             ("user", """Store: {store_name}
@@ -57,10 +45,17 @@ class CustomerAcquisitionModule:
             
             Format the response as a structured campaign plan.""")
         ])
-        
-        chain = prompt | self.llm
-        
-        response = chain.invoke({
+    
+    @staticmethod
+    def _create_promotion_campaign_inputs(
+        target_audience: str,
+        campaign_type: str,
+        budget: float,
+        duration_days: int,
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Prompt variables for create_promotion_campaign"""
+        return {
             "store_name": store_context.get("name", "Store"),
             "store_type": store_context.get("type", "retail"),
             "location": store_context.get("location", "Local"),
@@ -68,10 +63,17 @@ class CustomerAcquisitionModule:
             "campaign_type": campaign_type,
             "budget": budget,
             "duration_days": duration_days
-        })
-        
-        campaign_plan = response.content if hasattr(response, 'content') else str(response)
-        
+        }
+    
+    @staticmethod
+    def _create_promotion_campaign_result(
+        campaign_plan: Optional[str],
+        target_audience: str,
+        campaign_type: str,
+        budget: float,
+        duration_days: int
+    ) -> Dict[str, Any]:
+        """Result of create_promotion_campaign"""
         start_date = datetime.now()
         end_date = start_date + timedelta(days=duration_days)
         
@@ -86,19 +88,88 @@ class CustomerAcquisitionModule:
             "created_at": datetime.now().isoformat()
         }
     
-    def design_first_purchase_incentive(
+    def create_promotion_campaign(
         self,
-        incentive_type: str,
-        store_context: Dict[str, Any]
+        target_audience: str,
+        campaign_type: str,
+        budget: float,
+        duration_days: int,
+        store_context: Dict[str, Any],
+        hedge: bool = False
     ) -> Dict[str, Any]:
         """
-        Design incentives for first-time customers
+        Create a promotional campaign to acquire new customers
         
         Args:
-            incentive_type: Type of incentive (discount, gift, points, etc.)
-            store_context: Store information
+            target_audience: Description of target customer segment
+            campaign_type: Type of campaign (seasonal, clearance, new_product, etc.)
+            budget: Campaign budget
+            duration_days: Campaign duration in days
+            store_context: Store information (name, type, location)
+            hedge: Interactive request; hedge slow LLM calls when hedging is enabled
         """
-        prompt = ChatPromptTemplate.from_messages([
+        prompt = self._create_promotion_campaign_prompt()
+        
+        inputs = self._create_promotion_campaign_inputs(target_audience, campaign_type, budget, duration_days, store_context)
+        campaign_plan = invoke_prompt(prompt, self.llm, inputs, name="customer_acquisition.create_promotion_campaign", hedge=hedge)
+        
+        return self._create_promotion_campaign_result(campaign_plan, target_audience, campaign_type, budget, duration_days)
+    
+    async def acreate_promotion_campaign(
+        self,
+        target_audience: str,
+        campaign_type: str,
+        budget: float,
+        duration_days: int,
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Async version of create_promotion_campaign, built on ainvoke"""
+        prompt = self._create_promotion_campaign_prompt()
+        
+        inputs = self._create_promotion_campaign_inputs(target_audience, campaign_type, budget, duration_days, store_context)
+        campaign_plan = await ainvoke_prompt(prompt, self.llm, inputs, name="customer_acquisition.create_promotion_campaign")
+        
+        return self._create_promotion_campaign_result(campaign_plan, target_audience, campaign_type, budget, duration_days)
+    
+    def stream_promotion_campaign(
+        self,
+        target_audience: str,
+        campaign_type: str,
+        budget: float,
+        duration_days: int,
+        store_context: Dict[str, Any],
+        hedge: bool = False
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream a promotional campaign while the LLM is generating it
+        
+        Takes the same arguments as create_promotion_campaign. After every
+        chunk the campaign dict is yielded with campaign_plan holding the text
+        received so far and status "generating"; the final yield has status
+        "planned". Closing the generator early aborts the LLM request.
+        """
+        prompt = self._create_promotion_campaign_prompt()
+        
+        campaign = self._create_promotion_campaign_result("", target_audience, campaign_type, budget, duration_days)
+        campaign["status"] = "generating"
+        
+        inputs = self._create_promotion_campaign_inputs(target_audience, campaign_type, budget, duration_days, store_context)
+        chunks = stream_prompt(prompt, self.llm, inputs, name="customer_acquisition.create_promotion_campaign", hedge=hedge)
+        
+        # closing() propagates an early close to the LLM stream
+        with closing(chunks):
+            for chunk in chunks:
+                campaign["campaign_plan"] += chunk
+                yield campaign
+        
+        campaign["status"] = "planned"
+        yield campaign
+    
+    @staticmethod
+    @registered_prompt("customer_acquisition.design_first_purchase_incentive")
+    def _design_first_purchase_incentive_prompt() -> ChatPromptTemplate:
+        """Build the prompt for design_first_purchase_incentive"""
+        return ChatPromptTemplate.from_messages([
             ("system", """You are an expert in customer acquisition and loyalty programs.
             Design an attractive first-purchase incentive that will convert new customers."""),
             ("user", """Store: {store_name}
@@ -115,17 +186,25 @@ class CustomerAcquisitionModule:
             
             Make it compelling and easy to understand.""")
         ])
-        
-        chain = prompt | self.llm
-        
-        response = chain.invoke({
+    
+    @staticmethod
+    def _design_first_purchase_incentive_inputs(
+        incentive_type: str,
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Prompt variables for design_first_purchase_incentive"""
+        return {
             "store_name": store_context.get("name", "Store"),
             "store_type": store_context.get("type", "retail"),
             "incentive_type": incentive_type
-        })
-        
-        incentive_design = response.content if hasattr(response, 'content') else str(response)
-        
+        }
+    
+    @staticmethod
+    def _design_first_purchase_incentive_result(
+        incentive_design: Optional[str],
+        incentive_type: str
+    ) -> Dict[str, Any]:
+        """Result of design_first_purchase_incentive"""
         return {
             "incentive_design": incentive_design,
             "incentive_type": incentive_type,
@@ -133,19 +212,43 @@ class CustomerAcquisitionModule:
             "created_at": datetime.now().isoformat()
         }
     
-    def create_referral_program(
+    def design_first_purchase_incentive(
         self,
-        reward_structure: str,
+        incentive_type: str,
         store_context: Dict[str, Any]
     ) -> Dict[str, Any]:
         """
-        Create a customer referral program
+        Design incentives for first-time customers
         
         Args:
-            reward_structure: How referrers and referees are rewarded
+            incentive_type: Type of incentive (discount, gift, points, etc.)
             store_context: Store information
         """
-        prompt = ChatPromptTemplate.from_messages([
+        prompt = self._design_first_purchase_incentive_prompt()
+        
+        inputs = self._design_first_purchase_incentive_inputs(incentive_type, store_context)
+        incentive_design = invoke_prompt(prompt, self.llm, inputs, name="customer_acquisition.design_first_purchase_incentive")
+        
+        return self._design_first_purchase_incentive_result(incentive_design, incentive_type)
+    
+    async def adesign_first_purchase_incentive(
+        self,
+        incentive_type: str,
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Async version of design_first_purchase_incentive, built on ainvoke"""
+        prompt = self._design_first_purchase_incentive_prompt()
+        
+        inputs = self._design_first_purchase_incentive_inputs(incentive_type, store_context)
+        incentive_design = await ainvoke_prompt(prompt, self.llm, inputs, name="customer_acquisition.design_first_purchase_incentive")
+        
+        return self._design_first_purchase_incentive_result(incentive_design, incentive_type)
+    
+    @staticmethod
+    @registered_prompt("customer_acquisition.create_referral_program")
+    def _create_referral_program_prompt() -> ChatPromptTemplate:
+        """Build the prompt for create_referral_program"""
+        return ChatPromptTemplate.from_messages([
             ("system", """You are an expert in referral marketing and viral growth strategies.
             Create a referral program that incentivizes existing customers to bring in new ones."""),
             ("user", """Store: {store_name}
@@ -165,17 +268,25 @@ class CustomerAcquisitionModule:
             
             Make it simple, attractive, and easy to participate in.""")
         ])
-        
-        chain = prompt | self.llm
-        
-        response = chain.invoke({
+    
+    @staticmethod
+    def _create_referral_program_inputs(
+        reward_structure: str,
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Prompt variables for create_referral_program"""
+        return {
             "store_name": store_context.get("name", "Store"),
             "store_type": store_context.get("type", "retail"),
             "reward_structure": reward_structure
-        })
-        
-        referral_program = response.content if hasattr(response, 'content') else str(response)
-        
+        }
+    
+    @staticmethod
+    def _create_referral_program_result(
+        referral_program: Optional[str],
+        reward_structure: str
+    ) -> Dict[str, Any]:
+        """Result of create_referral_program"""
         return {
             "referral_program": referral_program,
             "reward_structure": reward_structure,
@@ -183,23 +294,43 @@ class CustomerAcquisitionModule:
             "created_at": datetime.now().isoformat()
         }
     
-    def generate_targeted_ad_copy(
+    def create_referral_program(
         self,
-        platform: str,
-        target_segment: str,
-        product_category: str,
+        reward_structure: str,
         store_context: Dict[str, Any]
     ) -> Dict[str, Any]:
         """
-        Generate ad copy for different platforms and target segments
+        Create a customer referral program
         
         Args:
-            platform: Advertising platform (facebook, instagram, google, etc.)
-            target_segment: Customer segment to target
-            product_category: Product category being promoted
+            reward_structure: How referrers and referees are rewarded
             store_context: Store information
         """
-        prompt = ChatPromptTemplate.from_messages([
+        prompt = self._create_referral_program_prompt()
+        
+        inputs = self._create_referral_program_inputs(reward_structure, store_context)
+        referral_program = invoke_prompt(prompt, self.llm, inputs, name="customer_acquisition.create_referral_program")
+        
+        return self._create_referral_program_result(referral_program, reward_structure)
+    
+    async def acreate_referral_program(
+        self,
+        reward_structure: str,
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Async version of create_referral_program, built on ainvoke"""
+        prompt = self._create_referral_program_prompt()
+        
+        inputs = self._create_referral_program_inputs(reward_structure, store_context)
+        referral_program = await ainvoke_prompt(prompt, self.llm, inputs, name="customer_acquisition.create_referral_program")
+        
+        return self._create_referral_program_result(referral_program, reward_structure)
+    
+    @staticmethod
+    @registered_prompt("customer_acquisition.generate_targeted_ad_copy")
+    def _generate_targeted_ad_copy_prompt() -> ChatPromptTemplate:
+        """Build the prompt for generate_targeted_ad_copy"""
+        return ChatPromptTemplate.from_messages([
             ("system", """You are an expert copywriter specializing in retail advertising.
             Create compelling ad copy that drives clicks and conversions."""),
             ("user", """Store: {store_name}
@@ -216,19 +347,31 @@ class CustomerAcquisitionModule:
             
             Each variation should be optimized for {platform} and appeal to {target_segment}.""")
         ])
-        
-        chain = prompt | self.llm
-        
-        response = chain.invoke({
+    
+    @staticmethod
+    def _generate_targeted_ad_copy_inputs(
+        platform: str,
+        target_segment: str,
+        product_category: str,
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Prompt variables for generate_targeted_ad_copy"""
+        return {
             "store_name": store_context.get("name", "Store"),
             "store_type": store_context.get("type", "retail"),
             "platform": platform,
             "target_segment": target_segment,
             "product_category": product_category
-        })
-        
-        ad_copy = response.content if hasattr(response, 'content') else str(response)
-        
+        }
+    
+    @staticmethod
+    def _generate_targeted_ad_copy_result(
+        ad_copy: Optional[str],
+        platform: str,
+        target_segment: str,
+        product_category: str
+    ) -> Dict[str, Any]:
+        """Result of generate_targeted_ad_copy"""
         return {
             "ad_copy": ad_copy,
             "platform": platform,
@@ -236,3 +379,97 @@ class CustomerAcquisitionModule:
             "product_category": product_category,
             "created_at": datetime.now().isoformat()
         }
+    
+    def generate_targeted_ad_copy(
+        self,
+        platform: str,
+        target_segment: str,
+        product_category: str,
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Generate ad copy for different platforms and target segments
+        
+        Args:
+            platform: Advertising platform (facebook, instagram, google, etc.)
+            target_segment: Customer segment to target
+            product_category: Product category being promoted
+            store_context: Store information
+        """
+        prompt = self._generate_targeted_ad_copy_prompt()
+        
+        inputs = self._generate_targeted_ad_copy_inputs(platform, target_segment, product_category, store_context)
+        ad_copy = invoke_prompt(prompt, self.llm, inputs, name="customer_acquisition.generate_targeted_ad_copy")
+        
+        return self._generate_targeted_ad_copy_result(ad_copy, platform, target_segment, product_category)
+    
+    async def agenerate_targeted_ad_copy(
+        self,
+        platform: str,
+        target_segment: str,
+        product_category: str,
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Async version of generate_targeted_ad_copy, built on ainvoke"""
+        prompt = self._generate_targeted_ad_copy_prompt()
+        
+        inputs = self._generate_targeted_ad_copy_inputs(platform, target_segment, product_category, store_context)
+        ad_copy = await ainvoke_prompt(prompt, self.llm, inputs, name="customer_acquisition.generate_targeted_ad_copy")
+        
+        return self._generate_targeted_ad_copy_result(ad_copy, platform, target_segment, product_category)
+    
+    def generate_targeted_ad_copy_batch(
+        self,
+        requests: List[Dict[str, Any]],
+        max_concurrency: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Generate ad copy for many platform/segment/category combinations in one batch
+        
+        Args:
+            requests: Argument sets for generate_targeted_ad_copy, each with
+                platform, target_segment, product_category and store_context
+            max_concurrency: Maximum parallel LLM requests (defaults to settings)
+        
+        Returns:
+            One result per request, in order. A failed item carries an "error"
+            message instead of ad copy and does not affect the others.
+        """
+        prompt = self._generate_targeted_ad_copy_prompt()
+        
+        variables_list = []
+        for request in requests:
+            # A malformed request (missing arguments, not a dict) fails only its own item
+            try:
+                variables_list.append(self._generate_targeted_ad_copy_inputs(
+                    request["platform"],
+                    request["target_segment"],
+                    request["product_category"],
+                    request.get("store_context") or {}
+                ))
+            except KeyError as e:
+                variables_list.append(ValueError(f"Missing request argument: {e}"))
+            except Exception as e:
+                variables_list.append(e)
+        
+        outputs = batch_prompt(
+            prompt, self.llm, variables_list,
+            name="customer_acquisition.generate_targeted_ad_copy",
+            max_concurrency=max_concurrency
+        )
+        
+        results = []
+        for request, output in zip(requests, outputs):
+            failed = isinstance(output, Exception)
+            args = request if isinstance(request, dict) else {}
+            result = self._generate_targeted_ad_copy_result(
+                None if failed else output,
+                args.get("platform"),
+                args.get("target_segment"),
+                args.get("product_category")
+            )
+            if failed:
+                result["error"] = str(output)
+            results.append(result)
+        
+        return results
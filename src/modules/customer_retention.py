@@ -6,7 +6,8 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime
 from langchain_core.prompts import ChatPromptTemplate
 
-from ..utils.llm_helper import get_llm
+from ..utils.llm_helper import get_llm, invoke_prompt, ainvoke_prompt, batch_prompt
+from ..utils.prompt_registry import registered_prompt
 
 
 class CustomerRetentionModule:
@@ -15,19 +16,11 @@ class CustomerRetentionModule:
     def __init__(self):
         self.llm = get_llm()
     
-    def design_loyalty_program(
-        self,
-        program_type: str,
-        store_context: Dict[str, Any]
-    ) -> Dict[str, Any]:
-        """
-        Design a comprehensive loyalty program
-        
-        Args:
-            program_type: Type of loyalty program (points, tiers, cashback, etc.)
-            store_context: Store information
-        """
-        prompt = ChatPromptTemplate.from_messages([
+    @staticmethod
+    @registered_prompt("customer_retention.design_loyalty_program")
+    def _design_loyalty_program_prompt() -> ChatPromptTemplate:
+        """Build the prompt for design_loyalty_program"""
+        return ChatPromptTemplate.from_messages([
             ("system", """You are an expert in customer loyalty and retention strategies.
             Design a loyalty program that keeps customers coming back."""),
             ("user", """Store: {store_name}
@@ -46,17 +39,25 @@ class CustomerRetentionModule:
             
             Make it engaging and valuable for customers.""")
         ])
-        
-        chain = prompt | self.llm
-        
-        response = chain.invoke({
+    
+    @staticmethod
+    def _design_loyalty_program_inputs(
+        program_type: str,
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Prompt variables for design_loyalty_program"""
+        return {
             "store_name": store_context.get("name", "Store"),
             "store_type": store_context.get("type", "retail"),
             "program_type": program_type
-        })
-        
-        loyalty_program = response.content if hasattr(response, 'content') else str(response)
-        
+        }
+    
+    @staticmethod
+    def _design_loyalty_program_result(
+        loyalty_program: Optional[str],
+        program_type: str
+    ) -> Dict[str, Any]:
+        """Result of design_loyalty_program"""
         return {
             "loyalty_program": loyalty_program,
             "program_type": program_type,
@@ -64,21 +65,43 @@ class CustomerRetentionModule:
             "created_at": datetime.now().isoformat()
         }
     
-    def create_email_campaign(
+    def design_loyalty_program(
         self,
-        campaign_goal: str,
-        customer_segment: str,
+        program_type: str,
         store_context: Dict[str, Any]
     ) -> Dict[str, Any]:
         """
-        Create an email marketing campaign
+        Design a comprehensive loyalty program
         
         Args:
-            campaign_goal: Goal of the campaign (re-engagement, new product, sale, etc.)
-            customer_segment: Target customer segment
+            program_type: Type of loyalty program (points, tiers, cashback, etc.)
             store_context: Store information
         """
-        prompt = ChatPromptTemplate.from_messages([
+        prompt = self._design_loyalty_program_prompt()
+        
+        inputs = self._design_loyalty_program_inputs(program_type, store_context)
+        loyalty_program = invoke_prompt(prompt, self.llm, inputs, name="customer_retention.design_loyalty_program")
+        
+        return self._design_loyalty_program_result(loyalty_program, program_type)
+    
+    async def adesign_loyalty_program(
+        self,
+        program_type: str,
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Async version of design_loyalty_program, built on ainvoke"""
+        prompt = self._design_loyalty_program_prompt()
+        
+        inputs = self._design_loyalty_program_inputs(program_type, store_context)
+        loyalty_program = await ainvoke_prompt(prompt, self.llm, inputs, name="customer_retention.design_loyalty_program")
+        
+        return self._design_loyalty_program_result(loyalty_program, program_type)
+    
+    @staticmethod
+    @registered_prompt("customer_retention.create_email_campaign")
+    def _create_email_campaign_prompt() -> ChatPromptTemplate:
+        """Build the prompt for create_email_campaign"""
+        return ChatPromptTemplate.from_messages([
             ("system", """You are an expert email marketer specializing in retail.
             Create email campaigns that drive engagement and sales."""),
             ("user", """Store: {store_name}
@@ -98,18 +121,28 @@ class CustomerRetentionModule:
             
             Make emails engaging and conversion-focused.""")
         ])
-        
-        chain = prompt | self.llm
-        
-        response = chain.invoke({
+    
+    @staticmethod
+    def _create_email_campaign_inputs(
+        campaign_goal: str,
+        customer_segment: str,
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Prompt variables for create_email_campaign"""
+        return {
             "store_name": store_context.get("name", "Store"),
             "store_type": store_context.get("type", "retail"),
             "campaign_goal": campaign_goal,
             "customer_segment": customer_segment
-        })
-        
-        email_campaign = response.content if hasattr(response, 'content') else str(response)
-        
+        }
+    
+    @staticmethod
+    def _create_email_campaign_result(
+        email_campaign: Optional[str],
+        campaign_goal: str,
+        customer_segment: str
+    ) -> Dict[str, Any]:
+        """Result of create_email_campaign"""
         return {
             "email_campaign": email_campaign,
             "campaign_goal": campaign_goal,
@@ -118,19 +151,101 @@ class CustomerRetentionModule:
             "created_at": datetime.now().isoformat()
         }
     
-    def create_win_back_campaign(
+    def create_email_campaign(
         self,
-        inactive_period: str,
+        campaign_goal: str,
+        customer_segment: str,
         store_context: Dict[str, Any]
     ) -> Dict[str, Any]:
         """
-        Create a campaign to win back inactive customers
+        Create an email marketing campaign
         
         Args:
-            inactive_period: How long customers have been inactive
+            campaign_goal: Goal of the campaign (re-engagement, new product, sale, etc.)
+            customer_segment: Target customer segment
             store_context: Store information
         """
-        prompt = ChatPromptTemplate.from_messages([
+        prompt = self._create_email_campaign_prompt()
+        
+        inputs = self._create_email_campaign_inputs(campaign_goal, customer_segment, store_context)
+        email_campaign = invoke_prompt(prompt, self.llm, inputs, name="customer_retention.create_email_campaign")
+        
+        return self._create_email_campaign_result(email_campaign, campaign_goal, customer_segment)
+    
+    async def acreate_email_campaign(
+        self,
+        campaign_goal: str,
+        customer_segment: str,
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Async version of create_email_campaign, built on ainvoke"""
+        prompt = self._create_email_campaign_prompt()
+        
+        inputs = self._create_email_campaign_inputs(campaign_goal, customer_segment, store_context)
+        email_campaign = await ainvoke_prompt(prompt, self.llm, inputs, name="customer_retention.create_email_campaign")
+        
+        return self._create_email_campaign_result(email_campaign, campaign_goal, customer_segment)
+    
+    def create_email_campaign_batch(
+        self,
+        requests: List[Dict[str, Any]],
+        max_concurrency: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Create email campaigns for many goals/segments in one batch
+        
+        Args:
+            requests: Argument sets for create_email_campaign, each with
+                campaign_goal, customer_segment and store_context
+            max_concurrency: Maximum parallel LLM requests (defaults to settings)
+        
+        Returns:
+            One result per request, in order. A failed item has status
+            "failed" and an "error" message; it does not affect the others.
+        """
+        prompt = self._create_email_campaign_prompt()
+        
+        variables_list = []
+        for request in requests:
+            # A malformed request (missing arguments, not a dict) fails only its own item
+            try:
+                variables_list.append(self._create_email_campaign_inputs(
+                    request["campaign_goal"],
+                    request["customer_segment"],
+                    request.get("store_context") or {}
+                ))
+            except KeyError as e:
+                variables_list.append(ValueError(f"Missing request argument: {e}"))
+            except Exception as e:
+                variables_list.append(e)
+        
+        outputs = batch_prompt(
+            prompt, self.llm, variables_list,
+            name="customer_retention.create_email_campaign",
+            max_concurrency=max_concurrency
+        )
+        
+        results = []
+        for request, output in zip(requests, outputs):
+            failed = isinstance(output, Exception)
+            args = request if isinstance(request, dict) else {}
+            result = self._create_email_campaign_result(
+                None if failed else output,
+                args.get("campaign_goal"),
+                args.get("customer_segment")
+            )
+            if failed:
+                result["status"] = "failed"
+                result["error"] = str(output)
+            results.append(result)
+        
+        return results
+    
+    @staticmethod
+    @registered_prompt("customer_retention.create_win_back_campaign")
+    def _create_win_back_campaign_prompt() -> ChatPromptTemplate:
+        """Build the prompt for create_win_back_campaign"""
+        return ChatPromptTemplate.from_messages([
             ("system", """You are an expert in customer re-engagement and win-back strategies.
             Create campaigns that bring inactive customers back."""),
             ("user", """Store: {store_name}
@@ -147,17 +262,25 @@ class CustomerRetentionModule:
             
             Make the campaign emotionally resonant and valuable.""")
         ])
-        
-        chain = prompt | self.llm
-        
-        response = chain.invoke({
+    
+    @staticmethod
+    def _create_win_back_campaign_inputs(
+        inactive_period: str,
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Prompt variables for create_win_back_campaign"""
+        return {
             "store_name": store_context.get("name", "Store"),
             "store_type": store_context.get("type", "retail"),
             "inactive_period": inactive_period
-        })
-        
-        winback_campaign = response.content if hasattr(response, 'content') else str(response)
-        
+        }
+    
+    @staticmethod
+    def _create_win_back_campaign_result(
+        winback_campaign: Optional[str],
+        inactive_period: str
+    ) -> Dict[str, Any]:
+        """Result of create_win_back_campaign"""
         return {
             "winback_campaign": winback_campaign,
             "inactive_period": inactive_period,
@@ -165,19 +288,43 @@ class CustomerRetentionModule:
             "created_at": datetime.now().isoformat()
         }
     
-    def create_vip_experience(
+    def create_win_back_campaign(
         self,
-        vip_criteria: str,
+        inactive_period: str,
         store_context: Dict[str, Any]
     ) -> Dict[str, Any]:
         """
-        Create VIP customer experience and perks
+        Create a campaign to win back inactive customers
         
         Args:
-            vip_criteria: Criteria for VIP status (spend, frequency, etc.)
+            inactive_period: How long customers have been inactive
             store_context: Store information
         """
-        prompt = ChatPromptTemplate.from_messages([
+        prompt = self._create_win_back_campaign_prompt()
+        
+        inputs = self._create_win_back_campaign_inputs(inactive_period, store_context)
+        winback_campaign = invoke_prompt(prompt, self.llm, inputs, name="customer_retention.create_win_back_campaign")
+        
+        return self._create_win_back_campaign_result(winback_campaign, inactive_period)
+    
+    async def acreate_win_back_campaign(
+        self,
+        inactive_period: str,
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Async version of create_win_back_campaign, built on ainvoke"""
+        prompt = self._create_win_back_campaign_prompt()
+        
+        inputs = self._create_win_back_campaign_inputs(inactive_period, store_context)
+        winback_campaign = await ainvoke_prompt(prompt, self.llm, inputs, name="customer_retention.create_win_back_campaign")
+        
+        return self._create_win_back_campaign_result(winback_campaign, inactive_period)
+    
+    @staticmethod
+    @registered_prompt("customer_retention.create_vip_experience")
+    def _create_vip_experience_prompt() -> ChatPromptTemplate:
+        """Build the prompt for create_vip_experience"""
+        return ChatPromptTemplate.from_messages([
             ("system", """You are an expert in luxury retail and VIP customer experiences.
             Design exclusive experiences that make top customers feel valued."""),
             ("user", """Store: {store_name}
@@ -196,20 +343,60 @@ class CustomerRetentionModule:
             
             Make it luxurious and aspirational.""")
         ])
-        
-        chain = prompt | self.llm
-        
-        response = chain.invoke({
+    
+    @staticmethod
+    def _create_vip_experience_inputs(
+        vip_criteria: str,
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Prompt variables for create_vip_experience"""
+        return {
             "store_name": store_context.get("name", "Store"),
             "store_type": store_context.get("type", "retail"),
             "vip_criteria": vip_criteria
-        })
-        
-        vip_experience = response.content if hasattr(response, 'content') else str(response)
-        
+        }
+    
+    @staticmethod
+    def _create_vip_experience_result(
+        vip_experience: Optional[str],
+        vip_criteria: str
+    ) -> Dict[str, Any]:
+        """Result of create_vip_experience"""
         return {
             "vip_experience": vip_experience,
             "vip_criteria": vip_criteria,
             "status": "created",
             "created_at": datetime.now().isoformat()
         }
+    
+    def create_vip_experience(
+        self,
+        vip_criteria: str,
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Create VIP customer experience and perks
+        
+        Args:
+            vip_criteria: Criteria for VIP status (spend, frequency, etc.)
+            store_context: Store information
+        """
+        prompt = self._create_vip_experience_prompt()
+        
+        inputs = self._create_vip_experience_inputs(vip_criteria, store_context)
+        vip_experience = invoke_prompt(prompt, self.llm, inputs, name="customer_retention.create_vip_experience")
+        
+        return self._create_vip_experience_result(vip_experience, vip_criteria)
+    
+    async def acreate_vip_experience(
+        self,
+        vip_criteria: str,
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Async version of create_vip_experience, built on ainvoke"""
+        prompt = self._create_vip_experience_prompt()
+        
+        inputs = self._create_vip_experience_inputs(vip_criteria, store_context)
+        vip_experience = await ainvoke_prompt(prompt, self.llm, inputs, name="customer_retention.create_vip_experience")
+        
+        return self._create_vip_experience_result(vip_experience, vip_criteria)
@@ -6,7 +6,8 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime
 from langchain_core.prompts import ChatPromptTemplate
 
-from ..utils.llm_helper import get_llm
+from ..utils.llm_helper import get_llm, invoke_prompt, ainvoke_prompt
+from ..utils.prompt_registry import registered_prompt
 
 
 class DigitalMarketingModule:
@@ -15,25 +16,11 @@ class DigitalMarketingModule:
     def __init__(self):
         self.llm = get_llm()
     
-    def create_social_media_content(
-        self,
-        platform: str,
-        content_type: str,
-        theme: str,
-        num_posts: int,
-        store_context: Dict[str, Any]
-    ) -> Dict[str, Any]:
-        """
-        Create social media content for various platforms
-        
-        Args:
-            platform: Social media platform (instagram, facebook, tiktok, twitter)
-            content_type: Type of content (product showcase, behind-scenes, tips, etc.)
-            theme: Content theme or campaign
-            num_posts: Number of posts to create
-            store_context: Store information
-        """
-        prompt = ChatPromptTemplate.from_messages([
+    @staticmethod
+    @registered_prompt("digital_marketing.create_social_media_content")
+    def _create_social_media_content_prompt() -> ChatPromptTemplate:
+        """Build the prompt for create_social_media_content"""
+        return ChatPromptTemplate.from_messages([
             ("system", """You are an expert social media manager for retail brands.
             Create engaging content that drives engagement and sales."""),
             ("user", """Store: {store_name}
@@ -53,20 +40,34 @@ class DigitalMarketingModule:
             
             Make content authentic, engaging, and shareable.""")
         ])
-        
-        chain = prompt | self.llm
-        
-        response = chain.invoke({
+    
+    @staticmethod
+    def _create_social_media_content_inputs(
+        platform: str,
+        content_type: str,
+        theme: str,
+        num_posts: int,
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Prompt variables for create_social_media_content"""
+        return {
             "store_name": store_context.get("name", "Store"),
             "store_type": store_context.get("type", "retail"),
             "platform": platform,
             "content_type": content_type,
             "theme": theme,
             "num_posts": num_posts
-        })
-        
-        social_content = response.content if hasattr(response, 'content') else str(response)
-        
+        }
+    
+    @staticmethod
+    def _create_social_media_content_result(
+        social_content: Optional[str],
+        platform: str,
+        content_type: str,
+        theme: str,
+        num_posts: int
+    ) -> Dict[str, Any]:
+        """Result of create_social_media_content"""
         return {
             "social_content": social_content,
             "platform": platform,
@@ -77,17 +78,52 @@ class DigitalMarketingModule:
             "created_at": datetime.now().isoformat()
         }
     
-    def optimize_local_seo(
+    def create_social_media_content(
         self,
+        platform: str,
+        content_type: str,
+        theme: str,
+        num_posts: int,
         store_context: Dict[str, Any]
     ) -> Dict[str, Any]:
         """
-        Create local SEO optimization strategy
+        Create social media content for various platforms
         
         Args:
-            store_context: Store information including location
+            platform: Social media platform (instagram, facebook, tiktok, twitter)
+            content_type: Type of content (product showcase, behind-scenes, tips, etc.)
+            theme: Content theme or campaign
+            num_posts: Number of posts to create
+            store_context: Store information
         """
-        prompt = ChatPromptTemplate.from_messages([
+        prompt = self._create_social_media_content_prompt()
+        
+        inputs = self._create_social_media_content_inputs(platform, content_type, theme, num_posts, store_context)
+        social_content = invoke_prompt(prompt, self.llm, inputs, name="digital_marketing.create_social_media_content")
+        
+        return self._create_social_media_content_result(social_content, platform, content_type, theme, num_posts)
+    
+    async def acreate_social_media_content(
+        self,
+        platform: str,
+        content_type: str,
+        theme: str,
+        num_posts: int,
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Async version of create_social_media_content, built on ainvoke"""
+        prompt = self._create_social_media_content_prompt()
+        
+        inputs = self._create_social_media_content_inputs(platform, content_type, theme, num_posts, store_context)
+        social_content = await ainvoke_prompt(prompt, self.llm, inputs, name="digital_marketing.create_social_media_content")
+        
+        return self._create_social_media_content_result(social_content, platform, content_type, theme, num_posts)
+    
+    @staticmethod
+    @registered_prompt("digital_marketing.optimize_local_seo")
+    def _optimize_local_seo_prompt() -> ChatPromptTemplate:
+        """Build the prompt for optimize_local_seo"""
+        return ChatPromptTemplate.from_messages([
             ("system", """You are an expert in local SEO for retail businesses.
             Create strategies to improve local search visibility."""),
             ("user", """Store: {store_name}
@@ -106,40 +142,63 @@ class DigitalMarketingModule:
             
             Focus on actionable items that improve local search rankings.""")
         ])
-        
-        chain = prompt | self.llm
-        
-        response = chain.invoke({
+    
+    @staticmethod
+    def _optimize_local_seo_inputs(
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Prompt variables for optimize_local_seo"""
+        return {
             "store_name": store_context.get("name", "Store"),
             "store_type": store_context.get("type", "retail"),
             "location": store_context.get("location", "Local Area")
-        })
-        
-        seo_strategy = response.content if hasattr(response, 'content') else str(response)
-        
+        }
+    
+    @staticmethod
+    def _optimize_local_seo_result(
+        seo_strategy: Optional[str]
+    ) -> Dict[str, Any]:
+        """Result of optimize_local_seo"""
         return {
             "seo_strategy": seo_strategy,
             "status": "created",
             "created_at": datetime.now().isoformat()
         }
     
-    def create_influencer_campaign(
+    def optimize_local_seo(
         self,
-        campaign_goal: str,
-        influencer_tier: str,
-        budget: float,
         store_context: Dict[str, Any]
     ) -> Dict[str, Any]:
         """
-        Create an influencer marketing campaign
+        Create local SEO optimization strategy
         
         Args:
-            campaign_goal: Goal of influencer campaign
-            influencer_tier: Type of influencers (nano, micro, macro, mega)
-            budget: Campaign budget
-            store_context: Store information
+            store_context: Store information including location
         """
-        prompt = ChatPromptTemplate.from_messages([
+        prompt = self._optimize_local_seo_prompt()
+        
+        inputs = self._optimize_local_seo_inputs(store_context)
+        seo_strategy = invoke_prompt(prompt, self.llm, inputs, name="digital_marketing.optimize_local_seo")
+        
+        return self._optimize_local_seo_result(seo_strategy)
+    
+    async def aoptimize_local_seo(
+        self,
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Async version of optimize_local_seo, built on ainvoke"""
+        prompt = self._optimize_local_seo_prompt()
+        
+        inputs = self._optimize_local_seo_inputs(store_context)
+        seo_strategy = await ainvoke_prompt(prompt, self.llm, inputs, name="digital_marketing.optimize_local_seo")
+        
+        return self._optimize_local_seo_result(seo_strategy)
+    
+    @staticmethod
+    @registered_prompt("digital_marketing.create_influencer_campaign")
+    def _create_influencer_campaign_prompt() -> ChatPromptTemplate:
+        """Build the prompt for create_influencer_campaign"""
+        return ChatPromptTemplate.from_messages([
             ("system", """You are an expert in influencer marketing for retail brands.
             Create campaigns that leverage influencer reach effectively."""),
             ("user", """Store: {store_name}
@@ -160,19 +219,31 @@ class DigitalMarketingModule:
             
             Optimize for authenticity and ROI.""")
         ])
-        
-        chain = prompt | self.llm
-        
-        response = chain.invoke({
+    
+    @staticmethod
+    def _create_influencer_campaign_inputs(
+        campaign_goal: str,
+        influencer_tier: str,
+        budget: float,
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Prompt variables for create_influencer_campaign"""
+        return {
             "store_name": store_context.get("name", "Store"),
             "store_type": store_context.get("type", "retail"),
             "campaign_goal": campaign_goal,
             "influencer_tier": influencer_tier,
             "budget": budget
-        })
-        
-        influencer_campaign = response.content if hasattr(response, 'content') else str(response)
-        
+        }
+    
+    @staticmethod
+    def _create_influencer_campaign_result(
+        influencer_campaign: Optional[str],
+        campaign_goal: str,
+        influencer_tier: str,
+        budget: float
+    ) -> Dict[str, Any]:
+        """Result of create_influencer_campaign"""
         return {
             "influencer_campaign": influencer_campaign,
             "campaign_goal": campaign_goal,
@@ -182,21 +253,49 @@ class DigitalMarketingModule:
             "created_at": datetime.now().isoformat()
         }
     
-    def create_content_calendar(
+    def create_influencer_campaign(
         self,
-        duration_weeks: int,
-        platforms: List[str],
+        campaign_goal: str,
+        influencer_tier: str,
+        budget: float,
         store_context: Dict[str, Any]
     ) -> Dict[str, Any]:
         """
-        Create a comprehensive content calendar
+        Create an influencer marketing campaign
         
         Args:
-            duration_weeks: Number of weeks to plan
-            platforms: List of platforms to create content for
+            campaign_goal: Goal of influencer campaign
+            influencer_tier: Type of influencers (nano, micro, macro, mega)
+            budget: Campaign budget
             store_context: Store information
         """
-        prompt = ChatPromptTemplate.from_messages([
+        prompt = self._create_influencer_campaign_prompt()
+        
+        inputs = self._create_influencer_campaign_inputs(campaign_goal, influencer_tier, budget, store_context)
+        influencer_campaign = invoke_prompt(prompt, self.llm, inputs, name="digital_marketing.create_influencer_campaign")
+        
+        return self._create_influencer_campaign_result(influencer_campaign, campaign_goal, influencer_tier, budget)
+    
+    async def acreate_influencer_campaign(
+        self,
+        campaign_goal: str,
+        influencer_tier: str,
+        budget: float,
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Async version of create_influencer_campaign, built on ainvoke"""
+        prompt = self._create_influencer_campaign_prompt()
+        
+        inputs = self._create_influencer_campaign_inputs(campaign_goal, influencer_tier, budget, store_context)
+        influencer_campaign = await ainvoke_prompt(prompt, self.llm, inputs, name="digital_marketing.create_influencer_campaign")
+        
+        return self._create_influencer_campaign_result(influencer_campaign, campaign_goal, influencer_tier, budget)
+    
+    @staticmethod
+    @registered_prompt("digital_marketing.create_content_calendar")
+    def _create_content_calendar_prompt() -> ChatPromptTemplate:
+        """Build the prompt for create_content_calendar"""
+        return ChatPromptTemplate.from_messages([
             ("system", """You are an expert social media strategist for retail.
             Create content calendars that maintain consistent engagement."""),
             ("user", """Store: {store_name}
@@ -215,18 +314,28 @@ class DigitalMarketingModule:
             
             Ensure variety and strategic timing.""")
         ])
-        
-        chain = prompt | self.llm
-        
-        response = chain.invoke({
+    
+    @staticmethod
+    def _create_content_calendar_inputs(
+        duration_weeks: int,
+        platforms: List[str],
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Prompt variables for create_content_calendar"""
+        return {
             "store_name": store_context.get("name", "Store"),
             "store_type": store_context.get("type", "retail"),
             "duration_weeks": duration_weeks,
             "platforms": ", ".join(platforms)
-        })
-        
-        content_calendar = response.content if hasattr(response, 'content') else str(response)
-        
+        }
+    
+    @staticmethod
+    def _create_content_calendar_result(
+        content_calendar: Optional[str],
+        duration_weeks: int,
+        platforms: List[str]
+    ) -> Dict[str, Any]:
+        """Result of create_content_calendar"""
         return {
             "content_calendar": content_calendar,
             "duration_weeks": duration_weeks,
@@ -234,3 +343,38 @@ class DigitalMarketingModule:
             "status": "created",
             "created_at": datetime.now().isoformat()
         }
+    
+    def create_content_calendar(
+        self,
+        duration_weeks: int,
+        platforms: List[str],
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Create a comprehensive content calendar
+        
+        Args:
+            duration_weeks: Number of weeks to plan
+            platforms: List of platforms to create content for
+            store_context: Store information
+        """
+        prompt = self._create_content_calendar_prompt()
+        
+        inputs = self._create_content_calendar_inputs(duration_weeks, platforms, store_context)
+        content_calendar = invoke_prompt(prompt, self.llm, inputs, name="digital_marketing.create_content_calendar")
+        
+        return self._create_content_calendar_result(content_calendar, duration_weeks, platforms)
+    
+    async def acreate_content_calendar(
+        self,
+        duration_weeks: int,
+        platforms: List[str],
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Async version of create_content_calendar, built on ainvoke"""
+        prompt = self._create_content_calendar_prompt()
+        
+        inputs = self._create_content_calendar_inputs(duration_weeks, platforms, store_context)
+        content_calendar = await ainvoke_prompt(prompt, self.llm, inputs, name="digital_marketing.create_content_calendar")
+        
+        return self._create_content_calendar_result(content_calendar, duration_weeks, platforms)
@@ -6,7 +6,8 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime
 from langchain_core.prompts import ChatPromptTemplate
 
-from ..utils.llm_helper import get_llm
+from ..utils.llm_helper import get_llm, invoke_prompt, ainvoke_prompt
+from ..utils.prompt_registry import registered_prompt
 
 
 class InStoreMarketingModule:
@@ -15,21 +16,11 @@ class InStoreMarketingModule:
     def __init__(self):
         self.llm = get_llm()
     
-    def design_visual_merchandising(
-        self,
-        season: str,
-        focus_products: str,
-        store_context: Dict[str, Any]
-    ) -> Dict[str, Any]:
-        """
-        Design visual merchandising strategy
-        
-        Args:
-            season: Current season or campaign period
-            focus_products: Products to highlight
-            store_context: Store information
-        """
-        prompt = ChatPromptTemplate.from_messages([
+    @staticmethod
+    @registered_prompt("instore_marketing.design_visual_merchandising")
+    def _design_visual_merchandising_prompt() -> ChatPromptTemplate:
+        """Build the prompt for design_visual_merchandising"""
+        return ChatPromptTemplate.from_messages([
             ("system", """You are an expert visual merchandiser for retail stores.
             Create displays that attract attention and drive purchases."""),
             ("user", """Store: {store_name}
@@ -49,18 +40,28 @@ class InStoreMarketingModule:
             
             Make displays eye-catching and sales-driving.""")
         ])
-        
-        chain = prompt | self.llm
-        
-        response = chain.invoke({
+    
+    @staticmethod
+    def _design_visual_merchandising_inputs(
+        season: str,
+        focus_products: str,
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Prompt variables for design_visual_merchandising"""
+        return {
             "store_name": store_context.get("name", "Store"),
             "store_type": store_context.get("type", "retail"),
             "season": season,
             "focus_products": focus_products
-        })
-        
-        merchandising_plan = response.content if hasattr(response, 'content') else str(response)
-        
+        }
+    
+    @staticmethod
+    def _design_visual_merchandising_result(
+        merchandising_plan: Optional[str],
+        season: str,
+        focus_products: str
+    ) -> Dict[str, Any]:
+        """Result of design_visual_merchandising"""
         return {
             "merchandising_plan": merchandising_plan,
             "season": season,
@@ -69,21 +70,46 @@ class InStoreMarketingModule:
             "created_at": datetime.now().isoformat()
         }
     
-    def create_pos_displays(
+    def design_visual_merchandising(
         self,
-        promotion_type: str,
-        location: str,
+        season: str,
+        focus_products: str,
         store_context: Dict[str, Any]
     ) -> Dict[str, Any]:
         """
-        Create point-of-sale display concepts
+        Design visual merchandising strategy
         
         Args:
-            promotion_type: Type of promotion (sale, new product, impulse buy)
-            location: Display location (checkout, endcap, entrance)
+            season: Current season or campaign period
+            focus_products: Products to highlight
             store_context: Store information
         """
-        prompt = ChatPromptTemplate.from_messages([
+        prompt = self._design_visual_merchandising_prompt()
+        
+        inputs = self._design_visual_merchandising_inputs(season, focus_products, store_context)
+        merchandising_plan = invoke_prompt(prompt, self.llm, inputs, name="instore_marketing.design_visual_merchandising")
+        
+        return self._design_visual_merchandising_result(merchandising_plan, season, focus_products)
+    
+    async def adesign_visual_merchandising(
+        self,
+        season: str,
+        focus_products: str,
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Async version of design_visual_merchandising, built on ainvoke"""
+        prompt = self._design_visual_merchandising_prompt()
+        
+        inputs = self._design_visual_merchandising_inputs(season, focus_products, store_context)
+        merchandising_plan = await ainvoke_prompt(prompt, self.llm, inputs, name="instore_marketing.design_visual_merchandising")
+        
+        return self._design_visual_merchandising_result(merchandising_plan, season, focus_products)
+    
+    @staticmethod
+    @registered_prompt("instore_marketing.create_pos_displays")
+    def _create_pos_displays_prompt() -> ChatPromptTemplate:
+        """Build the prompt for create_pos_displays"""
+        return ChatPromptTemplate.from_messages([
             ("system", """You are an expert in point-of-sale marketing and impulse purchasing.
             Create POS displays that maximize last-minute sales."""),
             ("user", """Store: {store_name}
@@ -103,18 +129,28 @@ class InStoreMarketingModule:
             
             Focus on impulse purchase psychology.""")
         ])
-        
-        chain = prompt | self.llm
-        
-        response = chain.invoke({
+    
+    @staticmethod
+    def _create_pos_displays_inputs(
+        promotion_type: str,
+        location: str,
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Prompt variables for create_pos_displays"""
+        return {
             "store_name": store_context.get("name", "Store"),
             "store_type": store_context.get("type", "retail"),
             "promotion_type": promotion_type,
             "location": location
-        })
-        
-        pos_design = response.content if hasattr(response, 'content') else str(response)
-        
+        }
+    
+    @staticmethod
+    def _create_pos_displays_result(
+        pos_design: Optional[str],
+        promotion_type: str,
+        location: str
+    ) -> Dict[str, Any]:
+        """Result of create_pos_displays"""
         return {
             "pos_design": pos_design,
             "promotion_type": promotion_type,
@@ -123,23 +159,46 @@ class InStoreMarketingModule:
             "created_at": datetime.now().isoformat()
         }
     
-    def plan_instore_event(
+    def create_pos_displays(
         self,
-        event_type: str,
-        duration_hours: int,
-        expected_attendance: int,
+        promotion_type: str,
+        location: str,
         store_context: Dict[str, Any]
     ) -> Dict[str, Any]:
         """
-        Plan an in-store event or product demonstration
+        Create point-of-sale display concepts
         
         Args:
-            event_type: Type of event (product launch, workshop, demo, sale event)
-            duration_hours: Event duration in hours
-            expected_attendance: Expected number of attendees
+            promotion_type: Type of promotion (sale, new product, impulse buy)
+            location: Display location (checkout, endcap, entrance)
             store_context: Store information
         """
-        prompt = ChatPromptTemplate.from_messages([
+        prompt = self._create_pos_displays_prompt()
+        
+        inputs = self._create_pos_displays_inputs(promotion_type, location, store_context)
+        pos_design = invoke_prompt(prompt, self.llm, inputs, name="instore_marketing.create_pos_displays")
+        
+        return self._create_pos_displays_result(pos_design, promotion_type, location)
+    
+    async def acreate_pos_displays(
+        self,
+        promotion_type: str,
+        location: str,
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Async version of create_pos_displays, built on ainvoke"""
+        prompt = self._create_pos_displays_prompt()
+        
+        inputs = self._create_pos_displays_inputs(promotion_type, location, store_context)
+        pos_design = await ainvoke_prompt(prompt, self.llm, inputs, name="instore_marketing.create_pos_displays")
+        
+        return self._create_pos_displays_result(pos_design, promotion_type, location)
+    
+    @staticmethod
+    @registered_prompt("instore_marketing.plan_instore_event")
+    def _plan_instore_event_prompt() -> ChatPromptTemplate:
+        """Build the prompt for plan_instore_event"""
+        return ChatPromptTemplate.from_messages([
             ("system", """You are an expert event planner for retail environments.
             Create engaging in-store events that drive traffic and sales."""),
             ("user", """Store: {store_name}
@@ -162,19 +221,31 @@ class InStoreMarketingModule:
             
             Make the event memorable and sales-focused.""")
         ])
-        
-        chain = prompt | self.llm
-        
-        response = chain.invoke({
+    
+    @staticmethod
+    def _plan_instore_event_inputs(
+        event_type: str,
+        duration_hours: int,
+        expected_attendance: int,
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Prompt variables for plan_instore_event"""
+        return {
             "store_name": store_context.get("name", "Store"),
             "store_type": store_context.get("type", "retail"),
             "event_type": event_type,
             "duration_hours": duration_hours,
             "expected_attendance": expected_attendance
-        })
-        
-        event_plan = response.content if hasattr(response, 'content') else str(response)
-        
+        }
+    
+    @staticmethod
+    def _plan_instore_event_result(
+        event_plan: Optional[str],
+        event_type: str,
+        duration_hours: int,
+        expected_attendance: int
+    ) -> Dict[str, Any]:
+        """Result of plan_instore_event"""
         return {
             "event_plan": event_plan,
             "event_type": event_type,
@@ -184,21 +255,49 @@ class InStoreMarketingModule:
             "created_at": datetime.now().isoformat()
         }
     
-    def create_signage_materials(
+    def plan_instore_event(
         self,
-        signage_type: str,
-        message: str,
+        event_type: str,
+        duration_hours: int,
+        expected_attendance: int,
         store_context: Dict[str, Any]
     ) -> Dict[str, Any]:
         """
-        Create in-store signage and promotional materials
+        Plan an in-store event or product demonstration
         
         Args:
-            signage_type: Type of signage (sale, directional, promotional, informational)
-            message: Key message to communicate
+            event_type: Type of event (product launch, workshop, demo, sale event)
+            duration_hours: Event duration in hours
+            expected_attendance: Expected number of attendees
             store_context: Store information
         """
-        prompt = ChatPromptTemplate.from_messages([
+        prompt = self._plan_instore_event_prompt()
+        
+        inputs = self._plan_instore_event_inputs(event_type, duration_hours, expected_attendance, store_context)
+        event_plan = invoke_prompt(prompt, self.llm, inputs, name="instore_marketing.plan_instore_event")
+        
+        return self._plan_instore_event_result(event_plan, event_type, duration_hours, expected_attendance)
+    
+    async def aplan_instore_event(
+        self,
+        event_type: str,
+        duration_hours: int,
+        expected_attendance: int,
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Async version of plan_instore_event, built on ainvoke"""
+        prompt = self._plan_instore_event_prompt()
+        
+        inputs = self._plan_instore_event_inputs(event_type, duration_hours, expected_attendance, store_context)
+        event_plan = await ainvoke_prompt(prompt, self.llm, inputs, name="instore_marketing.plan_instore_event")
+        
+        return self._plan_instore_event_result(event_plan, event_type, duration_hours, expected_attendance)
+    
+    @staticmethod
+    @registered_prompt("instore_marketing.create_signage_materials")
+    def _create_signage_materials_prompt() -> ChatPromptTemplate:
+        """Build the prompt for create_signage_materials"""
+        return ChatPromptTemplate.from_messages([
             ("system", """You are an expert in retail signage and visual communication.
             Create clear, compelling signage that guides and motivates customers."""),
             ("user", """Store: {store_name}
@@ -217,18 +316,28 @@ class InStoreMarketingModule:
             
             Make signage clear, readable, and action-oriented.""")
         ])
-        
-        chain = prompt | self.llm
-        
-        response = chain.invoke({
+    
+    @staticmethod
+    def _create_signage_materials_inputs(
+        signage_type: str,
+        message: str,
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Prompt variables for create_signage_materials"""
+        return {
             "store_name": store_context.get("name", "Store"),
             "store_type": store_context.get("type", "retail"),
             "signage_type": signage_type,
             "message": message
-        })
-        
-        signage_design = response.content if hasattr(response, 'content') else str(response)
-        
+        }
+    
+    @staticmethod
+    def _create_signage_materials_result(
+        signage_design: Optional[str],
+        signage_type: str,
+        message: str
+    ) -> Dict[str, Any]:
+        """Result of create_signage_materials"""
         return {
             "signage_design": signage_design,
             "signage_type": signage_type,
@@ -236,3 +345,38 @@ class InStoreMarketingModule:
             "status": "designed",
             "created_at": datetime.now().isoformat()
         }
+    
+    def create_signage_materials(
+        self,
+        signage_type: str,
+        message: str,
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Create in-store signage and promotional materials
+        
+        Args:
+            signage_type: Type of signage (sale, directional, promotional, informational)
+            message: Key message to communicate
+            store_context: Store information
+        """
+        prompt = self._create_signage_materials_prompt()
+        
+        inputs = self._create_signage_materials_inputs(signage_type, message, store_context)
+        signage_design = invoke_prompt(prompt, self.llm, inputs, name="instore_marketing.create_signage_materials")
+        
+        return self._create_signage_materials_result(signage_design, signage_type, message)
+    
+    async def acreate_signage_materials(
+        self,
+        signage_type: str,
+        message: str,
+        store_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Async version of create_signage_materials, built on ainvoke"""
+        prompt = self._create_signage_materials_prompt()
+        
+        inputs = self._create_signage_materials_inputs(signage_type, message, store_context)
+        signage_design = await ainvoke_prompt(prompt, self.llm, inputs, name="instore_marketing.create_signage_materials")
+        
+        return self._create_signage_materials_result(signage_design, signage_type, message)
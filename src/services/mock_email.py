@@ -3,6 +3,7 @@ Mock Email Service
 Simulates email sending with tracking
 """
 import random
+import threading
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 from dataclasses import dataclass, asdict
@@ -37,6 +38,16 @@ class MockEmailService:
         self.emails: Dict[str, MockEmail] = {}
         self.campaigns: Dict[str, List[str]] = {}  # campaign_id -> email_ids
         self._email_counter = 0
+        self._counter_lock = threading.Lock()
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_counter_lock"]
+        return state
+    
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self._counter_lock = threading.Lock()
     
     def send_email(
         self,
@@ -59,8 +70,9 @@ class MockEmailService:
         Returns:
             MockEmail object
         """
-        self._email_counter += 1
-        email_id = f"EMAIL{self._email_counter:06d}"
+        with self._counter_lock:
+            self._email_counter += 1
+            email_id = f"EMAIL{self._email_counter:06d}"
         
         # Simulate realistic engagement rates
         opened = random.random() < 0.35  # 35% open rate
@@ -3,6 +3,7 @@ Mock Social Media Service
 Simulates posting to Facebook, Instagram, Twitter with engagement tracking
 """
 import random
+import threading
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 from dataclasses import dataclass, asdict
@@ -106,6 +107,16 @@ class MockSocialMediaService:
         self.campaigns: Dict[str, List[str]] = {}  # campaign_id -> post_ids
         self._post_counter = 0
         self._comment_counter = 0
+        self._counter_lock = threading.Lock()
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_counter_lock"]
+        return state
+    
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self._counter_lock = threading.Lock()
     
     def create_post(
         self,
@@ -128,8 +139,9 @@ class MockSocialMediaService:
         Returns:
             MockSocialPost object
         """
-        self._post_counter += 1
-        post_id = f"{platform.upper()}{self._post_counter:06d}"
+        with self._counter_lock:
+            self._post_counter += 1
+            post_id = f"{platform.upper()}{self._post_counter:06d}"
         
         # Generate realistic engagement based on platform
         if platform == "facebook":
@@ -186,8 +198,9 @@ class MockSocialMediaService:
         self.comments[post_id] = []
         
         for _ in range(count):
-            self._comment_counter += 1
-            comment_id = f"COMMENT{self._comment_counter:06d}"
+            with self._counter_lock:
+                self._comment_counter += 1
+                comment_id = f"COMMENT{self._comment_counter:06d}"
             
             # Random sentiment distribution: 60% positive, 30% neutral, 10% negative
             sentiment_choice = random.random()
@@ -14,6 +14,19 @@ from .helpers import (
     calculate_days_until,
     create_summary_stats
 )
+from .llm_helper import get_llm, get_llm_pool_stats, llm_pool, invoke_prompt, ainvoke_prompt, batch_prompt, stream_prompt
+from .llm_helper import model_router, get_routing_stats
+from .llm_cache import LLMResponseCache, get_llm_cache
+from .fake_llm import FakeRetailChatModel
+from .llm_metrics import LLMMetrics, LLMCallRecord, llm_metrics, get_llm_metrics
+from .prompt_registry import PromptRegistry, prompt_registry, registered_prompt
+from .single_flight import SingleFlight, single_flight, get_single_flight_stats
+from .rate_limiter import AdaptiveRateLimiter, get_rate_limiter, get_rate_limiter_stats
+from .semantic_cache import SemanticCache, HashingVectorizer, get_semantic_cache
+from .result_compactor import ResultCompactor, result_compactor
+from .model_router import ModelRouter
+from .hedging import HedgingPolicy, hedging_policy, get_hedging_stats
+from .job_queue import Job, JobQueue, JobQueueFull, get_job_queue, get_job_queue_stats
 
 __all__ = [
     "format_currency",
@@ -26,5 +39,44 @@ __all__ = [
     "generate_hashtags",
     "format_date_range",
     "calculate_days_until",
-    "create_summary_stats"
+    "create_summary_stats",
+    "get_llm",
+    "get_llm_pool_stats",
+    "llm_pool",
+    "invoke_prompt",
+    "ainvoke_prompt",
+    "batch_prompt",
+    "stream_prompt",
+    "LLMResponseCache",
+    "get_llm_cache",
+    "FakeRetailChatModel",
+    "LLMMetrics",
+    "LLMCallRecord",
+    "llm_metrics",
+    "get_llm_metrics",
+    "PromptRegistry",
+    "prompt_registry",
+    "registered_prompt",
+    "SingleFlight",
+    "single_flight",
+    "get_single_flight_stats",
+    "AdaptiveRateLimiter",
+    "get_rate_limiter",
+    "get_rate_limiter_stats",
+    "SemanticCache",
+    "HashingVectorizer",
+    "get_semantic_cache",
+    "ResultCompactor",
+    "result_compactor",
+    "ModelRouter",
+    "model_router",
+    "get_routing_stats",
+    "HedgingPolicy",
+    "hedging_policy",
+    "get_hedging_stats",
+    "Job",
+    "JobQueue",
+    "JobQueueFull",
+    "get_job_queue",
+    "get_job_queue_stats"
 ]
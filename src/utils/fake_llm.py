@@ -0,0 +1,209 @@
+"""
+Fake LLM backend
+Deterministic, offline chat model for benchmarking and load testing
+"""
+import asyncio
+import hashlib
+import random
+import re
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+# Section header lines of a batched prompt
+_SECTION_HEADER = re.compile(r"^\s*### GOAL (\S+)\s*$", re.MULTILINE)
+
+
+class FakeRetailChatModel(BaseChatModel):
+    """
+    Drop-in replacement for ChatOpenAI/AzureChatOpenAI that never touches the network
+
+    The response is derived from a hash of the prompt, so the same prompt
+    always gets the same text. Responses are numbered marketing plans of
+    roughly ``response_tokens`` tokens (one token per word), which keeps the
+    plan parser and downstream string handling on realistic input.
+    Latency is simulated as a fixed time to first token plus streaming at
+    ``tokens_per_second``. A random ``slow_rate`` fraction of calls waits an
+    extra ``slow_ms`` before the first token, like a slow upstream replica;
+    unlike the response text this is not tied to the prompt, so a retry of
+    the same prompt is usually fast.
+
+    A prompt that contains ``### GOAL <id>`` header lines (a batch
+    evaluation) gets one plan per header, each under its own header line,
+    the way a model following the batch format would answer.
+    """
+
+    model_name: str = "fake-retail-llm"
+    temperature: float = 0.7
+    latency_ms: float = 300.0
+    tokens_per_second: float = 50.0
+    response_tokens: int = 400
+    slow_rate: float = 0.0
+    slow_ms: float = 5000.0
+
+    SECTIONS: List[str] = [
+        "Campaign Strategy", "Target Audience Insights", "Channel Mix",
+        "Promotional Offers", "Content Calendar", "Budget Allocation",
+        "Email Sequence", "Social Media Rollout", "In-Store Activation",
+        "Loyalty Incentives", "Measurement Plan", "Optimization Loop"
+    ]
+    OPENERS: List[str] = [
+        "Launch", "Test", "Promote", "Bundle", "Highlight", "Schedule",
+        "Personalize", "Reward", "Retarget", "Feature"
+    ]
+    SUBJECTS: List[str] = [
+        "a limited-time weekend offer", "new arrivals for returning shoppers",
+        "a referral bonus for local customers", "seasonal bestsellers",
+        "free shipping on first online orders", "VIP early access",
+        "a loyalty points multiplier", "in-store demo events"
+    ]
+    OUTCOMES: List[str] = [
+        "to lift conversion rate by 10-15%", "to grow repeat purchases",
+        "to increase average basket size", "to drive foot traffic midweek",
+        "to improve email click-through", "to build social engagement",
+        "to reduce cost per acquisition", "to win back inactive customers"
+    ]
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-retail"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {
+            "model_name": self.model_name,
+            "temperature": self.temperature,
+            "response_tokens": self.response_tokens
+        }
+
+    def _prompt_text(self, messages: List[BaseMessage]) -> str:
+        """Flatten messages into one string"""
+        return "\n".join(str(m.content) for m in messages)
+
+    def _compose(self, prompt_text: str) -> List[str]:
+        """Build the deterministic response for a prompt as a list of word tokens"""
+        sections = _SECTION_HEADER.findall(prompt_text)
+        if not sections:
+            return self._compose_plan(prompt_text)
+        tokens: List[str] = []
+        for section in sections:
+            # Plans are cut at a token count, so the previous one may end mid-line
+            if tokens and not tokens[-1].endswith("\n"):
+                tokens[-1] = tokens[-1].rstrip(" ") + "\n"
+            tokens.append(f"### GOAL {section}\n")
+            tokens.extend(self._compose_plan(f"{prompt_text}\n{section}"))
+        return tokens
+
+    def _compose_plan(self, prompt_text: str) -> List[str]:
+        """One numbered plan of about response_tokens word tokens"""
+        seed = int(hashlib.sha256(prompt_text.encode("utf-8")).hexdigest()[:16], 16)
+        rng = random.Random(seed)
+
+        lines: List[str] = []
+        word_count = 0
+        item = 1
+        while word_count < self.response_tokens:
+            heading = f"{item}. {rng.choice(self.SECTIONS)}"
+            lines.append(heading)
+            word_count += len(heading.split())
+            for _ in range(rng.randint(2, 4)):
+                bullet = (
+                    f"   - {rng.choice(self.OPENERS)} {rng.choice(self.SUBJECTS)} "
+                    f"{rng.choice(self.OUTCOMES)}."
+                )
+                lines.append(bullet)
+                word_count += len(bullet.split())
+            item += 1
+
+        tokens: List[str] = []
+        for line in lines:
+            words = line.split(" ")
+            tokens.extend(word + " " for word in words[:-1])
+            tokens.append(words[-1] + "\n")
+        return tokens[:self.response_tokens]
+
+    def _usage(self, prompt_text: str, completion_tokens: int) -> Dict[str, int]:
+        """Token usage in the shape of AIMessage.usage_metadata"""
+        prompt_tokens = max(1, len(prompt_text) // 4)
+        return {
+            "input_tokens": prompt_tokens,
+            "output_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+
+    def _first_token_delay(self) -> float:
+        """Simulated time to first token, including the occasional slow call"""
+        delay = self.latency_ms / 1000
+        if self.slow_rate and random.random() < self.slow_rate:
+            delay += self.slow_ms / 1000
+        return delay
+
+    def _delay(self, tokens: int) -> float:
+        """Simulated wall time for a full response"""
+        return self._first_token_delay() + tokens / self.tokens_per_second
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        prompt_text = self._prompt_text(messages)
+        tokens = self._compose(prompt_text)
+        time.sleep(self._delay(len(tokens)))
+        message = AIMessage(
+            content="".join(tokens),
+            usage_metadata=self._usage(prompt_text, len(tokens))
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        prompt_text = self._prompt_text(messages)
+        tokens = self._compose(prompt_text)
+        await asyncio.sleep(self._delay(len(tokens)))
+        message = AIMessage(
+            content="".join(tokens),
+            usage_metadata=self._usage(prompt_text, len(tokens))
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any
+    ) -> Iterator[ChatGenerationChunk]:
+        prompt_text = self._prompt_text(messages)
+        tokens = self._compose(prompt_text)
+        time.sleep(self._first_token_delay())
+        for index, token in enumerate(tokens):
+            time.sleep(1 / self.tokens_per_second)
+            usage = self._usage(prompt_text, len(tokens)) if index == len(tokens) - 1 else None
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token, usage_metadata=usage))
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        prompt_text = self._prompt_text(messages)
+        tokens = self._compose(prompt_text)
+        await asyncio.sleep(self._first_token_delay())
+        for index, token in enumerate(tokens):
+            await asyncio.sleep(1 / self.tokens_per_second)
+            usage = self._usage(prompt_text, len(tokens)) if index == len(tokens) - 1 else None
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token, usage_metadata=usage))
@@ -0,0 +1,208 @@
+"""
+Hedged LLM requests
+Cuts tail latency of interactive calls by racing a second request against a slow first one
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from ..config.settings import settings
+from .llm_metrics import LLMMetrics
+
+
+# Latency samples kept per call site for the hedge delay
+_SAMPLE_WINDOW = 200
+# Latency samples kept per kind for the on/off report
+_REPORT_WINDOW = 1000
+# Hedges that may be issued back to back before the budget has to refill
+_BUDGET_BURST = 3.0
+
+
+class HedgingPolicy:
+    """
+    Issue a second, identical request when the first one is slow
+
+    The hedge delay for a call site is the configured percentile of its
+    recent latencies (``initial_delay_ms`` until ``min_samples`` have been
+    seen). When the first attempt has not finished after that delay, a
+    second attempt is started; the first to succeed wins and the other is
+    cancelled. Every request earns ``max_extra_load`` hedge credits and a
+    hedge costs one, so hedges never exceed that fraction of requests
+    (plus a small burst).
+
+    Latencies are measured per kind: "invoke" is the full response and
+    "stream" is the time to the first chunk. Calls that asked for hedging
+    while it was disabled are recorded too, so p50/p99 can be compared with
+    hedging on and off.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._samples: Dict[Tuple[str, str], Deque[float]] = {}
+        self._latencies: Dict[Tuple[str, bool], Deque[float]] = {}
+        self._credits = 1.0
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.budget_denied = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=settings.hedging.max_workers,
+                    thread_name_prefix="llm-hedge"
+                )
+            return self._executor
+
+    def delay_ms(self, name: str, kind: str = "invoke") -> float:
+        """Current hedge delay for a call site"""
+        with self._lock:
+            samples = list(self._samples.get((kind, name), ()))
+        if len(samples) < settings.hedging.min_samples:
+            return settings.hedging.initial_delay_ms
+        return max(
+            settings.hedging.min_delay_ms,
+            LLMMetrics._percentile(samples, settings.hedging.percentile)
+        )
+
+    def record(self, name: str, latency_ms: float, hedging: bool, kind: str = "invoke"):
+        """
+        Record the latency of a call that asked for hedging
+
+        Args:
+            name: Call-site label
+            latency_ms: Full response time ("invoke") or time to first chunk ("stream")
+            hedging: Whether hedging was enabled for the call
+            kind: "invoke" or "stream"
+        """
+        with self._lock:
+            self._samples.setdefault((kind, name), deque(maxlen=_SAMPLE_WINDOW)).append(latency_ms)
+            self._latencies.setdefault((kind, hedging), deque(maxlen=_REPORT_WINDOW)).append(latency_ms)
+
+    def _take_credit(self) -> bool:
+        """Spend one hedge credit if the extra-load budget allows it"""
+        with self._lock:
+            if self._credits < 1.0:
+                self.budget_denied += 1
+                return False
+            self._credits -= 1.0
+            self.hedges += 1
+            return True
+
+    def run(
+        self,
+        name: str,
+        attempt: Callable[[threading.Event], Any],
+        discard: Optional[Callable[[Any], None]] = None,
+        kind: str = "invoke"
+    ) -> Tuple[Any, bool]:
+        """
+        Run a request with hedging
+
+        Args:
+            name: Call-site label
+            attempt: Makes one request; should stop early and raise once the
+                event it is given is set
+            discard: Called with the result of a losing attempt that completed anyway
+            kind: "invoke" or "stream" (selects the latency samples used)
+
+        Returns:
+            (result, hedged) where hedged is True if the hedge request won
+
+        Raises:
+            The first attempt's exception if every attempt fails
+        """
+        with self._lock:
+            self.requests += 1
+            self._credits = min(_BUDGET_BURST, self._credits + settings.hedging.max_extra_load)
+
+        executor = self._get_executor()
+        started = time.perf_counter()
+        cancels = [threading.Event()]
+        futures = [executor.submit(attempt, cancels[0])]
+
+        done, _ = wait(futures, timeout=self.delay_ms(name, kind) / 1000)
+        if not done and self._take_credit():
+            cancels.append(threading.Event())
+            futures.append(executor.submit(attempt, cancels[1]))
+
+        winner: Optional[Future] = None
+        pending = set(futures)
+        while pending and winner is None:
+            _, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in futures:
+                if future.done() and future.exception() is None:
+                    winner = future
+                    break
+
+        for future, cancel in zip(futures, cancels):
+            if future is not winner:
+                cancel.set()
+                if discard is not None:
+                    future.add_done_callback(
+                        lambda f: discard(f.result()) if f.exception() is None else None
+                    )
+
+        if winner is None:
+            raise futures[0].exception()
+
+        hedged = winner is not futures[0]
+        with self._lock:
+            self.hedge_wins += 1 if hedged else 0
+        self.record(name, (time.perf_counter() - started) * 1000, True, kind)
+        return winner.result(), hedged
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hedge counts, extra load and p50/p99 latency with hedging on and off"""
+        with self._lock:
+            latencies = {key: list(values) for key, values in self._latencies.items()}
+            call_sites = list(self._samples)
+            counts = {
+                "requests": self.requests,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "budget_denied": self.budget_denied,
+                "extra_load": round(self.hedges / self.requests, 4) if self.requests else 0.0
+            }
+
+        latency = {}
+        for (kind, hedging), values in sorted(latencies.items()):
+            latency.setdefault(kind, {})["hedging_on" if hedging else "hedging_off"] = {
+                "calls": len(values),
+                "p50_ms": LLMMetrics._percentile(values, 50),
+                "p99_ms": LLMMetrics._percentile(values, 99)
+            }
+
+        return {
+            "enabled": settings.hedging.enabled,
+            "max_extra_load": settings.hedging.max_extra_load,
+            **counts,
+            "delay_ms": {
+                f"{kind}:{name}": round(self.delay_ms(name, kind), 2) for kind, name in call_sites
+            },
+            "latency": latency
+        }
+
+    def reset(self):
+        """Clear latency samples and counters"""
+        with self._lock:
+            self._samples.clear()
+            self._latencies.clear()
+            self._credits = 1.0
+            self.requests = 0
+            self.hedges = 0
+            self.hedge_wins = 0
+            self.budget_denied = 0
+
+
+# Global hedging policy for interactive call sites
+hedging_policy = HedgingPolicy()
+
+
+def get_hedging_stats() -> Dict[str, Any]:
+    """Get hedging counts and latency percentiles"""
+    return hedging_policy.stats()
@@ -0,0 +1,232 @@
+"""
+Background jobs
+Runs long API operations on a bounded worker pool and tracks their stage progress
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from ..config.settings import settings
+
+
+class JobQueueFull(RuntimeError):
+    """Raised when a job is submitted while max_pending jobs are already waiting"""
+
+
+class Job:
+    """One background operation and its progress"""
+
+    def __init__(self, kind: str, stages: List[str], metadata: Optional[Dict[str, Any]] = None):
+        self.id = f"job_{uuid.uuid4().hex[:16]}"
+        self.kind = kind
+        self.stages = stages
+        self.metadata = metadata or {}
+        self.status = "queued"
+        self.stage: Optional[str] = None
+        self.stages_done = 0
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    @property
+    def progress(self) -> int:
+        """Percent of stages completed"""
+        if self.status == "succeeded":
+            return 100
+        if not self.stages:
+            return 0
+        return int(100 * self.stages_done / len(self.stages))
+
+    def to_dict(self, include_result: bool = False) -> Dict[str, Any]:
+        data = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "stage": self.stage,
+            "stages": self.stages,
+            "progress": self.progress,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            **self.metadata
+        }
+        if include_result:
+            data["result"] = self.result
+        return data
+
+
+class JobQueue:
+    """
+    Bounded pool of workers for operations too slow to run inside a request
+
+    ``submit`` returns a queued Job straight away and raises JobQueueFull
+    once ``max_pending`` jobs are waiting for a worker, so a burst of slow
+    requests is shed instead of piling up. The job function gets a
+    ``progress(stage)`` callback; each call marks the previous stage done
+    and the named one current, which is what the status endpoint reports.
+    Finished jobs keep their result for ``result_ttl_seconds``, and at most
+    ``max_retained`` finished jobs are kept (oldest dropped first).
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_pending: int = 64,
+        result_ttl_seconds: float = 3600.0,
+        max_retained: int = 1000
+    ):
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max(0, max_pending)
+        self.result_ttl_seconds = result_ttl_seconds
+        self.max_retained = max(1, max_retained)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._finished_at: "OrderedDict[str, float]" = OrderedDict()
+        self._pending = 0
+        self._running = 0
+        self.submitted = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def submit(
+        self,
+        kind: str,
+        fn: Callable[[Callable[[str], None]], Any],
+        stages: List[str],
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Job:
+        """
+        Queue a job
+
+        Args:
+            kind: Job type label, e.g. "generate_campaign"
+            fn: Does the work; called with a progress(stage) callback and
+                returns the job result
+            stages: Stage names fn reports, in order
+            metadata: Extra fields included in the job's status
+
+        Raises:
+            JobQueueFull: If max_pending jobs are already waiting
+        """
+        job = Job(kind, stages, metadata)
+        with self._lock:
+            self._expire()
+            if self._pending >= self.max_pending + max(0, self.max_workers - self._running):
+                self.rejected += 1
+                raise JobQueueFull(f"{self._pending} jobs already waiting")
+            self._pending += 1
+            self.submitted += 1
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, fn)
+        return job
+
+    def _run(self, job: Job, fn: Callable[[Callable[[str], None]], Any]):
+        with self._lock:
+            self._pending -= 1
+            self._running += 1
+            job.status = "running"
+            job.started_at = datetime.now()
+
+        def progress(stage: str):
+            with self._lock:
+                if job.stage is not None:
+                    job.stages_done += 1
+                job.stage = stage
+
+        try:
+            result = fn(progress)
+        except Exception as e:
+            with self._lock:
+                job.error = str(e) or type(e).__name__
+                job.status = "failed"
+                self.failed += 1
+        else:
+            with self._lock:
+                job.result = result
+                job.stages_done = len(job.stages)
+                job.status = "succeeded"
+                self.succeeded += 1
+        finally:
+            with self._lock:
+                self._running -= 1
+                job.finished_at = datetime.now()
+                self._finished_at[job.id] = time.monotonic()
+
+    def _expire(self):
+        """Drop finished jobs past their TTL or over max_retained; caller holds the lock"""
+        cutoff = time.monotonic() - self.result_ttl_seconds
+        while self._finished_at:
+            job_id, finished = next(iter(self._finished_at.items()))
+            if finished >= cutoff and len(self._finished_at) <= self.max_retained:
+                break
+            del self._finished_at[job_id]
+            self._jobs.pop(job_id, None)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Get a job by id, or None if unknown or expired"""
+        with self._lock:
+            self._expire()
+            return self._jobs.get(job_id)
+
+    def find(self, **metadata: Any) -> Optional[Job]:
+        """Most recent job whose metadata has all the given values"""
+        with self._lock:
+            self._expire()
+            for job in reversed(self._jobs.values()):
+                if all(job.metadata.get(k) == v for k, v in metadata.items()):
+                    return job
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Get worker occupancy and job counts"""
+        with self._lock:
+            self._expire()
+            return {
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "running": self._running,
+                "pending": self._pending,
+                "retained": len(self._jobs),
+                "submitted": self.submitted,
+                "succeeded": self.succeeded,
+                "failed": self.failed,
+                "rejected": self.rejected
+            }
+
+
+_job_queue: Optional[JobQueue] = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Get the shared job queue, creating it from settings on first use"""
+    global _job_queue
+    if _job_queue is None:
+        with _job_queue_lock:
+            if _job_queue is None:
+                config = settings.jobs
+                _job_queue = JobQueue(
+                    max_workers=config.max_workers,
+                    max_pending=config.max_pending,
+                    result_ttl_seconds=config.result_ttl_seconds,
+                    max_retained=config.max_retained
+                )
+    return _job_queue
+
+
+def get_job_queue_stats() -> Dict[str, Any]:
+    """Get job queue occupancy and counts"""
+    return get_job_queue().stats()
@@ -0,0 +1,194 @@
+"""
+LLM Response Cache
+Content-addressed cache for LLM responses: bounded in-memory LRU backed by SQLite
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config.settings import settings
+
+
+class LLMResponseCache:
+    """
+    Two-tier LLM response cache
+
+    Entries are keyed by a hash of the rendered prompt messages plus the model
+    settings, so a hit is only possible for a byte-identical request to the
+    same model. The hot tier is an LRU of at most ``max_memory_entries``
+    responses; every entry is also written to SQLite with an expiry time and
+    the most recent entries are loaded back into memory when the cache opens.
+    """
+
+    def __init__(
+        self,
+        path: str = "llm_cache.db",
+        ttl_seconds: int = 86400,
+        max_memory_entries: int = 1000
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_entries = max_memory_entries
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                name TEXT,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.by_name: Dict[str, Dict[str, int]] = {}
+        self.warmed_entries = self.warm()
+
+    @staticmethod
+    def make_key(messages: List[Any], llm: Any) -> str:
+        """
+        Build the cache key for a rendered prompt and model
+
+        Args:
+            messages: Rendered prompt messages
+            llm: Chat model the messages will be sent to
+
+        Returns:
+            Hex SHA-256 digest
+        """
+        payload = {
+            "messages": [
+                [getattr(m, "type", type(m).__name__), getattr(m, "content", str(m))]
+                for m in messages
+            ],
+            "model": getattr(llm, "_identifying_params", {})
+        }
+        raw = json.dumps(payload, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def warm(self) -> int:
+        """Load the most recent unexpired entries from disk into memory"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+            self._conn.commit()
+            rows = self._conn.execute(
+                "SELECT key, response, expires_at FROM llm_cache "
+                "ORDER BY created_at DESC LIMIT ?",
+                (self.max_memory_entries,)
+            ).fetchall()
+            # Insert oldest first so the newest entries end up most recently used
+            for key, response, expires_at in reversed(rows):
+                self._memory[key] = (response, expires_at)
+        return len(rows)
+
+    def get(self, key: str, name: str = "llm") -> Optional[str]:
+        """Look up a cached response, promoting disk hits into memory"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    self._count(name, "hits")
+                    return entry[0]
+                del self._memory[key]
+
+            row = self._conn.execute(
+                "SELECT response, expires_at FROM llm_cache WHERE key = ? AND expires_at > ?",
+                (key, now)
+            ).fetchone()
+            if row is not None:
+                self._remember(key, row[0], row[1])
+                self.disk_hits += 1
+                self._count(name, "hits")
+                return row[0]
+
+            self.misses += 1
+            self._count(name, "misses")
+            return None
+
+    def set(self, key: str, response: str, name: str = "llm"):
+        """Store a response in both tiers"""
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        with self._lock:
+            self._remember(key, response, expires_at)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, name, response, created_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, name, response, now, expires_at)
+            )
+            self._conn.commit()
+
+    def _remember(self, key: str, response: str, expires_at: float):
+        """Insert into the LRU tier, evicting the least recently used entry"""
+        self._memory[key] = (response, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _count(self, name: str, field: str):
+        """Update per-prompt hit/miss counters"""
+        counters = self.by_name.setdefault(name, {"hits": 0, "misses": 0})
+        counters[field] += 1
+
+    def clear(self):
+        """Remove every cached response from memory and disk"""
+        with self._lock:
+            self._memory.clear()
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache hit/miss statistics"""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            total = hits + self.misses
+            disk_entries = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+            return {
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / total * 100, 2) if total > 0 else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": disk_entries,
+                "warmed_entries": self.warmed_entries,
+                "by_name": {name: dict(counts) for name, counts in self.by_name.items()}
+            }
+
+
+_cache: Optional[LLMResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """
+    Get the process-wide response cache
+
+    Returns:
+        The shared cache, or None when caching is disabled in settings
+    """
+    global _cache
+    if not settings.llm_cache.enabled:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMResponseCache(
+                    path=settings.llm_cache.path,
+                    ttl_seconds=settings.llm_cache.ttl_seconds,
+                    max_memory_entries=settings.llm_cache.max_memory_entries
+                )
+    return _cache
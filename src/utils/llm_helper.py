@@ -1,33 +1,788 @@
 """
 LLM initialization helper
 """
+import asyncio
+import itertools
+import threading
+import time
+import weakref
+from concurrent.futures import CancelledError
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple, Union
+
+import httpx
+from langchain_core.messages import AIMessage
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableLambda
 from langchain_openai import AzureChatOpenAI, ChatOpenAI
 from ..config.settings import settings
+from .fake_llm import FakeRetailChatModel
+from .hedging import hedging_policy
+from .llm_cache import LLMResponseCache, get_llm_cache
+from .llm_metrics import estimate_tokens, llm_metrics, usage_from_response
+from .model_router import ModelRouter
+from .rate_limiter import get_rate_limiter, is_rate_limited
+from .semantic_cache import get_semantic_cache
+from .single_flight import single_flight
+
+
+class LoopLocalAsyncClient(httpx.AsyncClient):
+    """
+    Async HTTP client that keeps one connection pool per event loop
+
+    An httpx.AsyncClient's connections belong to the loop that opened them,
+    so one client shared by several loops (Gradio handlers, successive
+    asyncio.run calls) fails or hangs on reused connections. This client is
+    handed to the SDK once, and sends each request through a client of its
+    own for the running loop.
+    """
+
+    def __init__(self, **client_kwargs: Any):
+        super().__init__(**client_kwargs)
+        self._client_kwargs = client_kwargs
+        self._loop_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._loop_lock = threading.Lock()
+
+    def _loop_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        with self._loop_lock:
+            client = self._loop_clients.get(loop)
+            if client is None:
+                client = self._loop_clients[loop] = httpx.AsyncClient(**self._client_kwargs)
+            return client
+
+    async def send(self, request: httpx.Request, **kwargs: Any) -> httpx.Response:
+        return await self._loop_client().send(request, **kwargs)
+
+    async def aclose(self):
+        """Close the running loop's client"""
+        with self._loop_lock:
+            client = self._loop_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    def close_all(self):
+        """Close every loop's client from outside the loops"""
+        with self._loop_lock:
+            clients = list(self._loop_clients.items())
+            self._loop_clients.clear()
+        try:
+            current = asyncio.get_running_loop()
+        except RuntimeError:
+            current = None
+        for loop, client in clients:
+            if loop.is_closed():
+                # Its transports went with the loop; nothing left to await
+                continue
+            if loop is current:
+                loop.create_task(client.aclose())
+            elif loop.is_running():
+                asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+            else:
+                loop.run_until_complete(client.aclose())
+
+    @property
+    def loops(self) -> int:
+        """Number of event loops with a client"""
+        with self._loop_lock:
+            return len(self._loop_clients)
+
+
+class LLMClientPool:
+    """
+    Process-wide pool of chat model clients
+
+    Clients are keyed by provider, model and temperature so every agent and
+    module asking for the same configuration gets the same instance. All
+    clients share one sync HTTP connection pool and one async connection
+    pool per event loop (LoopLocalAsyncClient), which keeps keep-alive
+    connections (and their TLS sessions) warm across tenants.
+    """
+
+    def __init__(self):
+        self._clients: Dict[Tuple[str, str, float], Any] = {}
+        self._lock = threading.Lock()
+        self._http_client: Optional[httpx.Client] = None
+        self._http_async_client: Optional[LoopLocalAsyncClient] = None
+        self.hits = 0
+        self.misses = 0
 
+    def _limits(self) -> httpx.Limits:
+        """Connection limits shared by the sync and async HTTP clients"""
+        return httpx.Limits(
+            max_connections=settings.openai.http_max_connections,
+            max_keepalive_connections=settings.openai.http_max_keepalive,
+            keepalive_expiry=settings.openai.http_keepalive_expiry
+        )
+
+    def _get_http_clients(self) -> Tuple[httpx.Client, LoopLocalAsyncClient]:
+        """Create the shared HTTP clients on first use (caller holds the lock)"""
+        if self._http_client is None:
+            if settings.rate_limit.enabled:
+                hooks = {"response": [_leave_429_to_limiter]}
+                async_hooks = {"response": [_aleave_429_to_limiter]}
+            else:
+                hooks = async_hooks = {}
+            self._http_client = httpx.Client(limits=self._limits(), event_hooks=hooks)
+            self._http_async_client = LoopLocalAsyncClient(limits=self._limits(), event_hooks=async_hooks)
+        return self._http_client, self._http_async_client
+
+    def get(self, temperature: float, tier: str = "quality"):
+        """Return the pooled client for the configured provider, model tier and temperature"""
+        provider = settings.openai.provider
+        key = (provider, _tier_model(tier), temperature)
+
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self.hits += 1
+                return client
+
+            self.misses += 1
+            if provider == "fake":
+                client = _create_llm(temperature, tier=tier)
+            else:
+                http_client, http_async_client = self._get_http_clients()
+                client = _create_llm(temperature, http_client, http_async_client, tier)
+            self._clients[key] = client
+            return client
 
-def get_llm(temperature: float = None):
+    def stats(self) -> Dict[str, Any]:
+        """Get pool hit/size counters"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._clients),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total * 100, 2) if total > 0 else 0.0,
+                "async_loops": self._http_async_client.loops if self._http_async_client is not None else 0,
+                "clients": [
+                    {"provider": provider, "model": model, "temperature": temp}
+                    for provider, model, temp in self._clients
+                ]
+            }
+
+    def clear(self):
+        """Drop all pooled clients and close the shared HTTP connections"""
+        with self._lock:
+            self._clients.clear()
+            if self._http_client is not None:
+                self._http_client.close()
+            if self._http_async_client is not None:
+                self._http_async_client.close_all()
+            self._http_client = None
+            self._http_async_client = None
+            self.hits = 0
+            self.misses = 0
+
+
+def _leave_429_to_limiter(response: httpx.Response):
     """
-    Get configured LLM instance (Azure or OpenAI)
+    Response hook telling the SDK not to retry a 429 itself
     
+    The rate limiter retries 429s after the provider's Retry-After, pausing
+    every queued caller; the SDK keeps its own retries for timeouts,
+    connection errors and 5xx responses.
+    """
+    if response.status_code == 429:
+        response.headers["x-should-retry"] = "false"
+
+
+async def _aleave_429_to_limiter(response: httpx.Response):
+    """Async version of _leave_429_to_limiter"""
+    _leave_429_to_limiter(response)
+
+
+def _tier_model(tier: str) -> str:
+    """Model (or Azure deployment) serving a tier for the configured provider"""
+    fast = tier == "fast"
+    provider = settings.openai.provider
+    if provider == "fake":
+        return "fake-retail-llm-fast" if fast else "fake-retail-llm"
+    elif provider == "azure":
+        return settings.openai.azure_fast_deployment if fast else settings.openai.azure_deployment
+    else:
+        return settings.openai.fast_model if fast else settings.openai.model
+
+
+def _create_llm(
+    temperature: float,
+    http_client: Optional[httpx.Client] = None,
+    http_async_client: Optional[httpx.AsyncClient] = None,
+    tier: str = "quality"
+):
+    """Build a new LLM client (Azure, OpenAI or the offline fake model)"""
+    provider = settings.openai.provider
+    if provider == "fake":
+        # The fake fast tier answers in half the time
+        speedup = 2 if tier == "fast" else 1
+        return FakeRetailChatModel(
+            model_name=_tier_model(tier),
+            temperature=temperature,
+            latency_ms=settings.openai.fake_latency_ms / speedup,
+            tokens_per_second=settings.openai.fake_tokens_per_second * speedup,
+            response_tokens=settings.openai.fake_response_tokens,
+            slow_rate=settings.openai.fake_slow_rate,
+            slow_ms=settings.openai.fake_slow_ms
+        )
+    elif provider == "azure":
+        return AzureChatOpenAI(
+            azure_deployment=_tier_model(tier),
+            api_version=settings.openai.azure_api_version,
+            azure_endpoint=settings.openai.azure_endpoint,
+            api_key=settings.openai.azure_api_key,
+            temperature=temperature,
+            http_client=http_client,
+            http_async_client=http_async_client
+        )
+    else:
+        return ChatOpenAI(
+            model=_tier_model(tier),
+            temperature=temperature,
+            openai_api_key=settings.openai.api_key,
+            http_client=http_client,
+            http_async_client=http_async_client
+        )
+
+
+# Global client pool shared by all agents and modules
+llm_pool = LLMClientPool()
+
+# Global router choosing the model tier per call site
+model_router = ModelRouter(llm_pool.get)
+
+
+def get_llm(temperature: float = None, tier: str = "quality"):
+    """
+    Get configured LLM instance (Azure, OpenAI or fake, per LLM_PROVIDER)
+
+    Instances are pooled: callers asking for the same provider, model and
+    temperature share one client and its keep-alive connections.
+
     Args:
         temperature: Optional temperature override
-    
+        tier: "quality" (the main model) or "fast" (the cheaper model)
+
     Returns:
         Configured LLM instance
     """
     temp = temperature if temperature is not None else settings.openai.temperature
+    return llm_pool.get(temp, tier)
+
+
+def get_routing_stats() -> Dict[str, Any]:
+    """Get model routing counts per tier"""
+    return model_router.stats()
+
+
+def get_llm_pool_stats() -> Dict[str, Any]:
+    """Get hit/size counters of the shared LLM client pool"""
+    return llm_pool.stats()
+
+
+def _elapsed_ms(started: float) -> float:
+    """Milliseconds since a time.perf_counter() reading"""
+    return (time.perf_counter() - started) * 1000
+
+
+def _single_flight(key: str, fn):
+    """Run fn through the request coalescer when enabled; returns (result, shared)"""
+    if not settings.openai.single_flight:
+        return fn(), False
+    return single_flight.do(key, fn)
+
+
+async def _asingle_flight(key: str, fn):
+    """Async version of _single_flight"""
+    if not settings.openai.single_flight:
+        return await fn(), False
+    return await single_flight.ado(key, fn)
+
+
+def _request_tokens(messages: List[Any]) -> int:
+    """Tokens to reserve from the rate limiter for a request"""
+    prompt_text = "".join(str(getattr(m, 'content', m)) for m in messages)
+    return estimate_tokens(prompt_text) + settings.rate_limit.expected_completion_tokens
+
+
+def _limited_call(llm: Any, messages: List[Any], fn):
+    """Run fn, a request for messages, under the deployment's rate limiter when enabled"""
+    if not settings.rate_limit.enabled:
+        return fn()
+    return get_rate_limiter(llm).call(fn, _request_tokens(messages))
+
+
+def _limited_invoke(llm: Any, messages: List[Any]):
+    """llm.invoke under the deployment's rate limiter when enabled"""
+    return _limited_call(llm, messages, lambda: llm.invoke(messages))
+
+
+def _hedged_invoke(llm: Any, messages: List[Any], name: str, tier: str, cache_status: str):
+    """
+    _limited_invoke raced against a hedge request by the hedging policy
     
-    if settings.openai.use_azure:
-        return AzureChatOpenAI(
-            azure_deployment=settings.openai.azure_deployment,
-            api_version=settings.openai.azure_api_version,
-            azure_endpoint=settings.openai.azure_endpoint,
-            api_key=settings.openai.azure_api_key,
-            temperature=temp
+    Each attempt streams the response so a losing attempt can abort its
+    request at the next chunk. Losing attempts are recorded in the metrics
+    as cancelled, with the tokens they consumed.
+    """
+    def attempt(cancel: threading.Event):
+        if cancel.is_set():
+            raise CancelledError()
+        started = time.perf_counter()
+        received: List[str] = []
+        
+        def collect():
+            usage = None
+            stream = llm.stream(messages)
+            try:
+                for chunk in stream:
+                    if cancel.is_set():
+                        raise CancelledError()
+                    received.append(chunk.content)
+                    usage = getattr(chunk, 'usage_metadata', None) or usage
+            finally:
+                stream.close()
+            return AIMessage(content="".join(received), usage_metadata=usage)
+        
+        try:
+            return _limited_call(llm, messages, collect), started
+        except CancelledError as e:
+            prompt_tokens, completion_tokens = usage_from_response(None, messages, "".join(received))
+            llm_metrics.record(
+                name, prompt_tokens, completion_tokens, _elapsed_ms(started), cache_status,
+                error=e, tier=tier
+            )
+            raise
+    
+    def discard(result):
+        response, started = result
+        prompt_tokens, completion_tokens = usage_from_response(response, messages, response.content)
+        llm_metrics.record(
+            name, prompt_tokens, completion_tokens, _elapsed_ms(started), cache_status,
+            error=CancelledError(), tier=tier
+        )
+    
+    (response, _), _ = hedging_policy.run(name, attempt, discard)
+    return response
+
+
+async def _alimited_invoke(llm: Any, messages: List[Any]):
+    """Async version of _limited_invoke"""
+    if not settings.rate_limit.enabled:
+        return await llm.ainvoke(messages)
+    return await get_rate_limiter(llm).acall(lambda: llm.ainvoke(messages), _request_tokens(messages))
+
+
+class _PromptRequest:
+    """
+    One rendered prompt on its way to the LLM, shared by invoke_prompt and ainvoke_prompt
+    
+    Holds the routed model, the rendered messages and the caches in play;
+    the sync and async helpers only differ in how they send the request.
+    """
+    
+    def __init__(self, prompt: ChatPromptTemplate, llm: Any, variables: Dict[str, Any], name: str):
+        self.llm, self.tier = model_router.route(llm, name)
+        self.messages = prompt.format_messages(**variables)
+        self.variables = variables
+        self.name = name
+        self.started = time.perf_counter()
+        self.key = LLMResponseCache.make_key(self.messages, self.llm)
+        self.cache = get_llm_cache()
+        self.cache_status = "disabled" if self.cache is None else "miss"
+        self.semantic = get_semantic_cache(name)
+    
+    def cached(self) -> Optional[str]:
+        """Response text from the response or semantic cache, or None on a miss"""
+        if self.cache is not None:
+            cached = self.cache.get(self.key, self.name)
+            if cached is not None:
+                self._record(0, 0, "hit")
+                return cached
+        
+        if self.semantic is not None:
+            match = self.semantic.get(self.name, self.variables, self.llm)
+            if match is not None:
+                self._record(0, 0, "semantic_hit")
+                return match[0]
+        return None
+    
+    def failed(self, error: Exception):
+        """Record a request that raised"""
+        self._record(0, 0, self.cache_status, error=error)
+    
+    def finish(self, response: Any, shared: bool) -> str:
+        """Record a response, cache it and return its text"""
+        text = response.content if hasattr(response, 'content') else str(response)
+        if shared:
+            # Another caller issued the identical request; it records usage and caches the result
+            self._record(0, 0, "coalesced")
+            return text
+        prompt_tokens, completion_tokens = usage_from_response(response, self.messages, text)
+        self._record(prompt_tokens, completion_tokens, self.cache_status)
+        
+        if self.cache is not None:
+            self.cache.set(self.key, text, self.name)
+        if self.semantic is not None:
+            self.semantic.set(self.name, self.variables, self.llm, text)
+        return text
+    
+    def elapsed_ms(self) -> float:
+        """Milliseconds since the request was rendered"""
+        return _elapsed_ms(self.started)
+    
+    def _record(self, prompt_tokens: int, completion_tokens: int, cache_status: str, error=None):
+        """Record the request in the LLM metrics under its call site and tier"""
+        llm_metrics.record(
+            self.name, prompt_tokens, completion_tokens, self.elapsed_ms(), cache_status,
+            error=error, tier=self.tier
         )
+
+
+def invoke_prompt(
+    prompt: ChatPromptTemplate,
+    llm: Any,
+    variables: Dict[str, Any],
+    name: str = "llm",
+    hedge: bool = False
+) -> str:
+    """
+    Render a prompt, send it to the LLM and return the response text
+    
+    When the response cache is enabled, identical rendered prompts sent to
+    the same model are answered from the cache instead of the LLM; with the
+    semantic cache enabled, near-identical variables can be answered too. Identical
+    requests already in flight on other threads are coalesced into one call,
+    and calls that do reach the LLM wait for the deployment's rate limiter.
+    With model routing enabled, the call may be sent to the fast model tier
+    configured for this call site instead of ``llm``.
+    
+    Args:
+        prompt: Prompt template to render
+        llm: Chat model to invoke
+        variables: Template variables
+        name: Call-site label, e.g. "customer_acquisition.create_promotion_campaign"
+        hedge: Interactive call: when hedging is enabled, race a second
+            request against a slow first one
+    
+    Returns:
+        Response text
+    """
+    request = _PromptRequest(prompt, llm, variables, name)
+    cached = request.cached()
+    if cached is not None:
+        return cached
+    
+    llm, messages = request.llm, request.messages
+    hedging = hedge and settings.hedging.enabled
+    if hedging:
+        call = lambda: _hedged_invoke(llm, messages, name, request.tier, request.cache_status)
     else:
-        return ChatOpenAI(
-            model=settings.openai.model,
-            temperature=temp,
-            openai_api_key=settings.openai.api_key
+        call = lambda: _limited_invoke(llm, messages)
+    
+    try:
+        response, shared = _single_flight(request.key, call)
+    except Exception as e:
+        request.failed(e)
+        raise
+    if hedge and not hedging and not shared:
+        # Baseline for the hedging on/off latency comparison
+        hedging_policy.record(name, request.elapsed_ms(), False)
+    return request.finish(response, shared)
+
+
+async def ainvoke_prompt(
+    prompt: ChatPromptTemplate,
+    llm: Any,
+    variables: Dict[str, Any],
+    name: str = "llm"
+) -> str:
+    """
+    Async version of invoke_prompt, built on the LLM's ainvoke
+    
+    Identical requests already in flight on the same event loop are
+    coalesced into one call.
+    
+    Args:
+        prompt: Prompt template to render
+        llm: Chat model to invoke
+        variables: Template variables
+        name: Call-site label, e.g. "customer_acquisition.create_promotion_campaign"
+    
+    Returns:
+        Response text
+    """
+    request = _PromptRequest(prompt, llm, variables, name)
+    cached = request.cached()
+    if cached is not None:
+        return cached
+    
+    llm, messages = request.llm, request.messages
+    try:
+        response, shared = await _asingle_flight(request.key, lambda: _alimited_invoke(llm, messages))
+    except Exception as e:
+        request.failed(e)
+        raise
+    return request.finish(response, shared)
+
+
+def batch_prompt(
+    prompt: ChatPromptTemplate,
+    llm: Any,
+    variables_list: List[Union[Dict[str, Any], Exception]],
+    name: str = "llm",
+    max_concurrency: Optional[int] = None
+) -> List[Union[str, Exception]]:
+    """
+    Render many variable sets against one prompt and run them through the LLM's batch
+    
+    Failures are isolated per item: an item whose prompt cannot be rendered
+    or whose request fails gets the exception in its slot instead of a
+    response, and the rest of the batch still completes. Callers that fail
+    to build an item's variables can pass the exception in its place; it is
+    returned in that slot as-is.
+    
+    Args:
+        prompt: Prompt template to render
+        llm: Chat model to invoke
+        variables_list: One dict of template variables (or exception) per item
+        name: Call-site label, e.g. "customer_acquisition.generate_targeted_ad_copy"
+        max_concurrency: Maximum parallel requests (defaults to settings)
+    
+    Returns:
+        Response text or exception for each item, in input order
+    """
+    llm, tier = model_router.route(llm, name)
+    results: List[Union[str, Exception, None]] = [None] * len(variables_list)
+    cache = get_llm_cache()
+    cache_status = "disabled" if cache is None else "miss"
+    semantic = get_semantic_cache(name)
+    keys: Dict[int, str] = {}
+    pending: List[Tuple[int, List[Any]]] = []
+    
+    for index, variables in enumerate(variables_list):
+        if isinstance(variables, Exception):
+            results[index] = variables
+            continue
+        
+        # Everything that touches the item's variables stays inside the try,
+        # so a malformed item fails its own slot rather than the whole batch
+        try:
+            if not isinstance(variables, Mapping):
+                raise TypeError(f"Prompt variables must be a mapping, got {type(variables).__name__}")
+            messages = prompt.format_messages(**variables)
+            
+            if cache is not None:
+                keys[index] = cache.make_key(messages, llm)
+                cached = cache.get(keys[index], name)
+                if cached is not None:
+                    llm_metrics.record(name, 0, 0, 0.0, "hit", tier=tier)
+                    results[index] = cached
+                    continue
+            
+            if semantic is not None:
+                match = semantic.get(name, variables, llm)
+                if match is not None:
+                    llm_metrics.record(name, 0, 0, 0.0, "semantic_hit", tier=tier)
+                    results[index] = match[0]
+                    continue
+        except KeyError as e:
+            results[index] = ValueError(f"Missing prompt variable: {e}")
+            continue
+        except Exception as e:
+            results[index] = e
+            continue
+        
+        pending.append((index, messages))
+    
+    if pending:
+        concurrency = max_concurrency or settings.openai.batch_max_concurrency
+        started = time.perf_counter()
+        # Each item goes through the rate limiter; LangChain's batch supplies the thread pool
+        responses = RunnableLambda(lambda messages: _limited_invoke(llm, messages)).batch(
+            [messages for _, messages in pending],
+            config={"max_concurrency": concurrency},
+            return_exceptions=True
         )
+        # Items run concurrently, so each is charged the wall time of the whole batch
+        latency_ms = _elapsed_ms(started)
+        
+        for (index, messages), response in zip(pending, responses):
+            if isinstance(response, Exception):
+                llm_metrics.record(name, 0, 0, latency_ms, cache_status, error=response, tier=tier)
+                results[index] = response
+                continue
+            
+            text = response.content if hasattr(response, 'content') else str(response)
+            prompt_tokens, completion_tokens = usage_from_response(response, messages, text)
+            llm_metrics.record(name, prompt_tokens, completion_tokens, latency_ms, cache_status, tier=tier)
+            results[index] = text
+            if cache is not None:
+                cache.set(keys[index], text, name)
+            if semantic is not None:
+                semantic.set(name, variables_list[index], llm, text)
+    
+    return results
+
+
+def stream_prompt(
+    prompt: ChatPromptTemplate,
+    llm: Any,
+    variables: Dict[str, Any],
+    name: str = "llm",
+    hedge: bool = False
+) -> Iterator[str]:
+    """
+    Render a prompt and stream the LLM response as text chunks
+    
+    A cached response is yielded as a single chunk. Identical streams already
+    in flight on other threads are coalesced: the caller joins the existing
+    stream and receives all of its chunks instead of opening a second one.
+    Closing the generator before it is exhausted closes the underlying LLM
+    stream once no other caller is still reading it, which aborts the
+    in-flight HTTP request; partial responses are never cached.
+    
+    Args:
+        prompt: Prompt template to render
+        llm: Chat model to stream from
+        variables: Template variables
+        name: Call-site label, e.g. "customer_acquisition.create_promotion_campaign"
+        hedge: Interactive call: when hedging is enabled, open a second stream
+            if the first chunk is slow and keep whichever stream starts first
+    
+    Yields:
+        Response text chunks as they arrive
+    """
+    llm, tier = model_router.route(llm, name)
+    messages = prompt.format_messages(**variables)
+    started = time.perf_counter()
+    
+    def open_response():
+        return _stream_response(llm, tier, messages, variables, name, hedge, started)
+    
+    if not settings.openai.single_flight:
+        yield from open_response()
+        return
+    
+    chunks, shared = single_flight.stream(LLMResponseCache.make_key(messages, llm), open_response)
+    if not shared:
+        yield from chunks
+        return
+    
+    error: Optional[BaseException] = None
+    try:
+        yield from chunks
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        # The caller that opened the stream records usage and caches the result
+        llm_metrics.record(name, 0, 0, _elapsed_ms(started), "coalesced", error=error, tier=tier)
+
+
+def _stream_response(
+    llm: Any,
+    tier: str,
+    messages: List[Any],
+    variables: Dict[str, Any],
+    name: str,
+    hedge: bool,
+    started: float
+) -> Iterator[str]:
+    """Stream one rendered prompt from the cache or the LLM (the body of stream_prompt)"""
+    cache = get_llm_cache()
+    cache_status = "disabled" if cache is None else "miss"
+    if cache is not None:
+        key = cache.make_key(messages, llm)
+        cached = cache.get(key, name)
+        if cached is not None:
+            llm_metrics.record(name, 0, 0, _elapsed_ms(started), "hit", tier=tier)
+            yield cached
+            return
+    
+    semantic = get_semantic_cache(name)
+    if semantic is not None:
+        match = semantic.get(name, variables, llm)
+        if match is not None:
+            llm_metrics.record(name, 0, 0, _elapsed_ms(started), "semantic_hit", tier=tier)
+            yield match[0]
+            return
+    
+    chunks = []
+    usage = None
+    error: Optional[BaseException] = None
+    limiter = get_rate_limiter(llm) if settings.rate_limit.enabled else None
+    reserved = _request_tokens(messages)
+    
+    def open_stream(cancel: Optional[threading.Event] = None):
+        """Acquire the limiter, start the stream and wait for its first chunk"""
+        if limiter is not None:
+            limiter.acquire(reserved)
+        opened_at = time.perf_counter()
+        opened = llm.stream(messages)
+        try:
+            return opened, next(opened, None), opened_at
+        except Exception as e:
+            opened.close()
+            if limiter is not None:
+                limiter.release(_elapsed_ms(opened_at), throttled=is_rate_limited(e))
+            raise
+    
+    def discard(result):
+        """Close a hedged stream that lost the race to the first chunk"""
+        opened, first, opened_at = result
+        opened.close()
+        text = first.content if first is not None else ""
+        prompt_tokens, completion_tokens = usage_from_response(None, messages, text)
+        if limiter is not None:
+            limiter.release(_elapsed_ms(opened_at), reserved, prompt_tokens + completion_tokens)
+        llm_metrics.record(
+            name, prompt_tokens, completion_tokens, _elapsed_ms(opened_at), cache_status,
+            error=CancelledError(), tier=tier
+        )
+    
+    stream = None
+    sent = time.perf_counter()
+    try:
+        if hedge and settings.hedging.enabled:
+            (stream, first, sent), _ = hedging_policy.run(name, open_stream, discard, kind="stream")
+        else:
+            stream, first, sent = open_stream()
+            if hedge:
+                # Baseline for the hedging on/off time-to-first-chunk comparison
+                hedging_policy.record(name, _elapsed_ms(sent), False, kind="stream")
+        
+        for chunk in itertools.chain([first] if first is not None else [], stream):
+            if getattr(chunk, 'usage_metadata', None):
+                usage = chunk
+            text = chunk.content if hasattr(chunk, 'content') else str(chunk)
+            if text:
+                chunks.append(text)
+                yield text
+    except BaseException as e:
+        # Includes GeneratorExit when the consumer stops the stream early
+        error = e
+        raise
+    finally:
+        prompt_tokens, completion_tokens = usage_from_response(usage, messages, "".join(chunks))
+        if stream is not None:
+            # A stream that failed to open has already released the limiter
+            stream.close()
+            if limiter is not None:
+                limiter.release(
+                    _elapsed_ms(sent),
+                    reserved,
+                    prompt_tokens + completion_tokens,
+                    throttled=error is not None and is_rate_limited(error)
+                )
+        llm_metrics.record(
+            name, prompt_tokens, completion_tokens, _elapsed_ms(started), cache_status,
+            error=error, tier=tier
+        )
+    
+    if cache is not None:
+        cache.set(key, "".join(chunks), name)
+    if semantic is not None:
+        semantic.set(name, variables, llm, "".join(chunks))
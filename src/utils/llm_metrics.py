@@ -0,0 +1,294 @@
+"""
+LLM Call Metrics
+Per-call latency, token and cost instrumentation for every prompt sent to the LLM
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import CancelledError
+from dataclasses import dataclass, asdict
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from ..config.settings import settings
+
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = [50, 100, 250, 500, 1000, 2000, 5000, 10000, 30000]
+
+
+@dataclass
+class LLMCallRecord:
+    """A single LLM call"""
+    module: str
+    method: str
+    prompt_tokens: int
+    completion_tokens: int
+    latency_ms: float
+    cache_status: str
+    tier: str
+    cost: float
+    status: str
+    timestamp: float
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for text the provider did not report usage for"""
+    return max(1, len(text) // 4) if text else 0
+
+
+def usage_from_response(response: Any, messages: List[Any], text: str) -> Tuple[int, int]:
+    """
+    Get prompt/completion token counts for a response
+
+    Uses the provider's reported usage when present and falls back to a
+    characters-per-token estimate otherwise.
+
+    Returns:
+        (prompt_tokens, completion_tokens)
+    """
+    usage = getattr(response, "usage_metadata", None)
+    if usage:
+        return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+
+    token_usage = (getattr(response, "response_metadata", None) or {}).get("token_usage")
+    if token_usage:
+        return token_usage.get("prompt_tokens", 0), token_usage.get("completion_tokens", 0)
+
+    prompt_text = "".join(str(getattr(m, "content", m)) for m in messages)
+    return estimate_tokens(prompt_text), estimate_tokens(text)
+
+
+def estimate_cost(prompt_tokens: int, completion_tokens: int, tier: str = "quality") -> float:
+    """Estimated USD cost of a call at the configured per-1K token prices for its model tier"""
+    if tier == "fast":
+        prompt_price = settings.routing.fast_prompt_cost_per_1k
+        completion_price = settings.routing.fast_completion_cost_per_1k
+    else:
+        prompt_price = settings.llm_metrics.prompt_cost_per_1k
+        completion_price = settings.llm_metrics.completion_cost_per_1k
+    return prompt_tokens / 1000 * prompt_price + completion_tokens / 1000 * completion_price
+
+
+class LLMMetrics:
+    """
+    Process-wide LLM call recorder
+
+    The most recent calls are kept in a fixed-size ring buffer; totals and a
+    latency histogram are aggregated per call site ("module.method") for the
+    lifetime of the process so they survive the buffer wrapping around.
+    """
+
+    def __init__(self, buffer_size: int = 1000):
+        self.buffer_size = buffer_size
+        self._records: Deque[LLMCallRecord] = deque(maxlen=buffer_size)
+        self._aggregates: Dict[str, Dict[str, Any]] = {}
+        self._tier_aggregates: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        name: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        latency_ms: float,
+        cache_status: str,
+        error: Optional[BaseException] = None,
+        tier: str = "quality"
+    ) -> LLMCallRecord:
+        """
+        Record one LLM call
+
+        Args:
+            name: Call-site label, e.g. "customer_acquisition.create_promotion_campaign"
+            prompt_tokens: Prompt tokens sent (0 for cache hits)
+            completion_tokens: Completion tokens received (0 for cache hits)
+            latency_ms: Wall time of the call
+            cache_status: "hit", "semantic_hit", "miss", "disabled" or "coalesced" (shared an in-flight call)
+            error: Exception raised by the call, if any (GeneratorExit marks a cancelled stream)
+            tier: Model tier the call was routed to
+
+        Returns:
+            The stored record
+        """
+        module, _, method = name.partition(".")
+        shared = cache_status in ("hit", "semantic_hit", "coalesced")
+        cost = 0.0 if shared else estimate_cost(prompt_tokens, completion_tokens, tier)
+        record = LLMCallRecord(
+            module=module,
+            method=method,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            latency_ms=round(latency_ms, 2),
+            cache_status=cache_status,
+            tier=tier,
+            cost=round(cost, 6),
+            status=self._status(error),
+            timestamp=time.time(),
+            error=(str(error) or type(error).__name__) if error is not None else None
+        )
+
+        with self._lock:
+            self._records.append(record)
+            aggregate = self._aggregates.get(name)
+            if aggregate is None:
+                aggregate = {
+                    "calls": 0,
+                    "errors": 0,
+                    "cache_hits": 0,
+                    "coalesced": 0,
+                    "prompt_tokens": 0,
+                    "completion_tokens": 0,
+                    "cost": 0.0,
+                    "total_latency_ms": 0.0,
+                    "max_latency_ms": 0.0,
+                    "latency_histogram": [0] * (len(LATENCY_BUCKETS_MS) + 1)
+                }
+                self._aggregates[name] = aggregate
+
+            aggregate["calls"] += 1
+            aggregate["errors"] += 1 if record.status == "error" else 0
+            aggregate["cache_hits"] += 1 if cache_status in ("hit", "semantic_hit") else 0
+            aggregate["coalesced"] += 1 if cache_status == "coalesced" else 0
+            aggregate["prompt_tokens"] += prompt_tokens
+            aggregate["completion_tokens"] += completion_tokens
+            aggregate["cost"] += cost
+            aggregate["total_latency_ms"] += latency_ms
+            aggregate["max_latency_ms"] = max(aggregate["max_latency_ms"], latency_ms)
+            aggregate["latency_histogram"][self._bucket(latency_ms)] += 1
+
+            tier_aggregate = self._tier_aggregates.setdefault(tier, {
+                "calls": 0,
+                "llm_calls": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "cost": 0.0,
+                "total_latency_ms": 0.0
+            })
+            tier_aggregate["calls"] += 1
+            tier_aggregate["llm_calls"] += 0 if shared else 1
+            tier_aggregate["prompt_tokens"] += prompt_tokens
+            tier_aggregate["completion_tokens"] += completion_tokens
+            tier_aggregate["cost"] += cost
+            tier_aggregate["total_latency_ms"] += latency_ms
+
+        return record
+
+    @staticmethod
+    def _status(error: Optional[BaseException]) -> str:
+        """Outcome label for a call; a closed stream or a losing hedge counts as cancelled"""
+        if error is None:
+            return "success"
+        if isinstance(error, (GeneratorExit, CancelledError)):
+            return "cancelled"
+        return "error"
+
+    @staticmethod
+    def _bucket(latency_ms: float) -> int:
+        """Index of the histogram bucket a latency falls into"""
+        for index, upper in enumerate(LATENCY_BUCKETS_MS):
+            if latency_ms <= upper:
+                return index
+        return len(LATENCY_BUCKETS_MS)
+
+    @staticmethod
+    def _percentile(values: List[float], percentile: float) -> float:
+        """Nearest-rank percentile of a list of values"""
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        rank = max(0, min(len(ordered) - 1, int(round(percentile / 100 * len(ordered))) - 1))
+        return round(ordered[rank], 2)
+
+    def get_recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Get the most recent calls, newest first"""
+        with self._lock:
+            records = list(self._records)[-limit:]
+        return [r.to_dict() for r in reversed(records)]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get aggregated metrics per call site and per model tier plus overall totals"""
+        with self._lock:
+            aggregates = {name: dict(a) for name, a in self._aggregates.items()}
+            tier_aggregates = {tier: dict(a) for tier, a in self._tier_aggregates.items()}
+            latencies: Dict[str, List[float]] = {}
+            tier_latencies: Dict[str, List[float]] = {}
+            for r in self._records:
+                name = f"{r.module}.{r.method}" if r.method else r.module
+                latencies.setdefault(name, []).append(r.latency_ms)
+                # Per-tier percentiles only cover calls that reached a model
+                if r.cache_status not in ("hit", "semantic_hit", "coalesced"):
+                    tier_latencies.setdefault(r.tier, []).append(r.latency_ms)
+
+        labels = [f"<={upper}ms" for upper in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        by_call_site = {}
+        for name, a in aggregates.items():
+            recent = latencies.get(name, [])
+            by_call_site[name] = {
+                "calls": a["calls"],
+                "errors": a["errors"],
+                "cache_hits": a["cache_hits"],
+                "coalesced": a["coalesced"],
+                "prompt_tokens": a["prompt_tokens"],
+                "completion_tokens": a["completion_tokens"],
+                "cost": round(a["cost"], 4),
+                "avg_latency_ms": round(a["total_latency_ms"] / a["calls"], 2),
+                "p50_latency_ms": self._percentile(recent, 50),
+                "p95_latency_ms": self._percentile(recent, 95),
+                "max_latency_ms": round(a["max_latency_ms"], 2),
+                "latency_histogram": dict(zip(labels, a["latency_histogram"]))
+            }
+
+        by_tier = {}
+        for tier, a in sorted(tier_aggregates.items()):
+            recent = tier_latencies.get(tier, [])
+            by_tier[tier] = {
+                "calls": a["calls"],
+                "llm_calls": a["llm_calls"],
+                "prompt_tokens": a["prompt_tokens"],
+                "completion_tokens": a["completion_tokens"],
+                "cost": round(a["cost"], 4),
+                "avg_cost_per_call": round(a["cost"] / a["llm_calls"], 6) if a["llm_calls"] else 0.0,
+                "avg_latency_ms": round(a["total_latency_ms"] / a["calls"], 2),
+                "p50_latency_ms": self._percentile(recent, 50),
+                "p95_latency_ms": self._percentile(recent, 95)
+            }
+
+        calls = sum(a["calls"] for a in aggregates.values())
+        return {
+            "total_calls": calls,
+            "total_errors": sum(a["errors"] for a in aggregates.values()),
+            "total_cache_hits": sum(a["cache_hits"] for a in aggregates.values()),
+            "total_coalesced": sum(a["coalesced"] for a in aggregates.values()),
+            "total_prompt_tokens": sum(a["prompt_tokens"] for a in aggregates.values()),
+            "total_completion_tokens": sum(a["completion_tokens"] for a in aggregates.values()),
+            "total_cost": round(sum(a["cost"] for a in aggregates.values()), 4),
+            "total_latency_ms": round(sum(a["total_latency_ms"] for a in aggregates.values()), 2),
+            "buffered_calls": min(calls, self.buffer_size),
+            # Heaviest call sites (total wall time) first
+            "by_call_site": dict(sorted(
+                by_call_site.items(),
+                key=lambda item: aggregates[item[0]]["total_latency_ms"],
+                reverse=True
+            )),
+            "by_tier": by_tier
+        }
+
+    def reset(self):
+        """Drop all recorded calls and aggregates"""
+        with self._lock:
+            self._records.clear()
+            self._aggregates.clear()
+            self._tier_aggregates.clear()
+
+
+# Global metrics recorder shared by all agents and modules
+llm_metrics = LLMMetrics(buffer_size=settings.llm_metrics.buffer_size)
+
+
+def get_llm_metrics() -> LLMMetrics:
+    """Get the process-wide LLM metrics recorder"""
+    return llm_metrics
@@ -0,0 +1,85 @@
+"""
+Model Router
+Maps each call site to a model tier (fast vs quality), with optional fallback under load
+"""
+import threading
+from typing import Any, Callable, Dict, Tuple
+
+from ..config.settings import settings
+from .rate_limiter import get_rate_limiter
+
+
+TIERS = ("quality", "fast")
+
+
+class ModelRouter:
+    """
+    Chooses the model tier for each LLM call
+
+    The tier comes from ``settings.routing.routes``: an exact
+    "<module>.<method>" entry wins over a "<module>" entry, and anything
+    unlisted uses the default tier. With fallback enabled, a call routed to
+    the quality tier goes to the fast tier instead while the quality
+    deployment's rate limiter has at least ``fallback_queue_depth`` callers
+    waiting.
+    """
+
+    def __init__(self, get_client: Callable[[float, str], Any]):
+        self._get_client = get_client
+        self._lock = threading.Lock()
+        self.routed: Dict[str, int] = {tier: 0 for tier in TIERS}
+        self.fallbacks = 0
+
+    def tier_for(self, name: str) -> str:
+        """Configured tier for a call site"""
+        routes = settings.routing.routes
+        tier = routes.get(name) or routes.get(name.split(".", 1)[0]) or settings.routing.default_tier
+        return tier if tier in TIERS else "quality"
+
+    def _overloaded(self, llm: Any) -> bool:
+        """Whether the quality deployment has a backlog"""
+        if not settings.rate_limit.enabled:
+            return False
+        return get_rate_limiter(llm).queue_depth >= settings.routing.fallback_queue_depth
+
+    def route(self, llm: Any, name: str) -> Tuple[Any, str]:
+        """
+        Pick the client for a call
+
+        Args:
+            llm: The caller's client (the quality tier)
+            name: Call-site name, e.g. "agent.evaluate"
+
+        Returns:
+            (client, tier)
+        """
+        if not settings.routing.enabled:
+            return llm, "quality"
+
+        tier = self.tier_for(name)
+        fallback = False
+        if tier == "quality" and settings.routing.fallback_on_load and self._overloaded(llm):
+            tier = "fast"
+            fallback = True
+
+        with self._lock:
+            self.routed[tier] += 1
+            self.fallbacks += 1 if fallback else 0
+
+        if tier == "quality":
+            return llm, tier
+        temperature = getattr(llm, "temperature", None)
+        if temperature is None:
+            temperature = settings.openai.temperature
+        return self._get_client(temperature, tier), tier
+
+    def stats(self) -> Dict[str, Any]:
+        """Get routing counts per tier and the number of load fallbacks"""
+        with self._lock:
+            return {
+                "enabled": settings.routing.enabled,
+                "routes": dict(settings.routing.routes),
+                "default_tier": settings.routing.default_tier,
+                "routed": dict(self.routed),
+                "fallbacks": self.fallbacks
+            }
@@ -0,0 +1,103 @@
+"""
+Prompt Registry
+Process-wide registry of prompt templates, built once and shared by every module instance
+"""
+import functools
+import threading
+from typing import Any, Callable, Dict
+
+from langchain_core.prompts import ChatPromptTemplate
+
+
+class PromptRegistry:
+    """
+    Registry of named prompt template builders
+
+    Builders are registered when their class is defined and run at most once,
+    on first use (or all at once via ``precompile``). Every later request for
+    the same name returns the same template, so module instances created per
+    tenant or per request never re-parse their prompts.
+    """
+
+    def __init__(self):
+        self._builders: Dict[str, Callable[[], ChatPromptTemplate]] = {}
+        self._templates: Dict[str, ChatPromptTemplate] = {}
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.hits = 0
+
+    def register(self, name: str, builder: Callable[[], ChatPromptTemplate]):
+        """Register a template builder under a call-site name"""
+        self._builders[name] = builder
+
+    def get(self, name: str) -> ChatPromptTemplate:
+        """
+        Get the template registered under a name, building it on first use
+
+        Args:
+            name: Call-site name, e.g. "customer_acquisition.create_promotion_campaign"
+
+        Returns:
+            Shared prompt template
+        """
+        # Both counters are updated under the lock so stats() stays
+        # consistent when the scheduler's worker threads share the registry
+        with self._lock:
+            template = self._templates.get(name)
+            if template is None:
+                template = self._builders[name]()
+                self._templates[name] = template
+                self.builds += 1
+            else:
+                self.hits += 1
+            return template
+
+    def precompile(self) -> int:
+        """Build every registered template that has not been built yet"""
+        for name in list(self._builders):
+            self.get(name)
+        return len(self._templates)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get registry size and build/hit counters"""
+        with self._lock:
+            return {
+                "registered": len(self._builders),
+                "built": len(self._templates),
+                "builds": self.builds,
+                "hits": self.hits
+            }
+
+    def clear(self):
+        """Drop built templates so they are rebuilt on next use"""
+        with self._lock:
+            self._templates.clear()
+            self.builds = 0
+            self.hits = 0
+
+
+# Global registry shared by all agents and modules
+prompt_registry = PromptRegistry()
+
+
+def registered_prompt(name: str):
+    """
+    Decorator that routes a prompt builder through the shared registry
+
+    The decorated function is registered under ``name`` and replaced by a
+    lookup, so it is built once per process. Apply it beneath @staticmethod
+    on a module's ``_<method>_prompt`` builder.
+
+    Args:
+        name: Call-site name, e.g. "customer_acquisition.create_promotion_campaign"
+    """
+    def decorator(builder: Callable[[], ChatPromptTemplate]):
+        prompt_registry.register(name, builder)
+
+        @functools.wraps(builder)
+        def lookup() -> ChatPromptTemplate:
+            return prompt_registry.get(name)
+
+        return lookup
+
+    return decorator
@@ -0,0 +1,373 @@
+"""
+LLM Rate Limiter
+Client-side token buckets (requests/min and tokens/min) with AIMD adaptive concurrency, per deployment
+"""
+import asyncio
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from ..config.settings import settings
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """Whether an exception is an HTTP 429 from the LLM provider"""
+    if getattr(error, "status_code", None) == 429:
+        return True
+    response = getattr(error, "response", None)
+    if getattr(response, "status_code", None) == 429:
+        return True
+    return type(error).__name__ == "RateLimitError"
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Retry-After hint from a 429 response, if the provider sent one"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    value = headers.get("retry-after-ms")
+    if value is not None:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value is not None:
+        try:
+            return float(value)
+        except ValueError:
+            pass
+    return None
+
+
+class AdaptiveRateLimiter:
+    """
+    Rate limiter and concurrency governor for one LLM deployment
+
+    Two token buckets mirror the provider quota: one refilled at
+    ``requests_per_minute`` and one at ``tokens_per_minute``. Each holds ten
+    seconds' worth of quota, matching the window Azure OpenAI enforces; a
+    quota of None leaves that bucket unlimited. A request waits until both
+    buckets cover it and an in-flight slot is free.
+
+    The number of slots adapts AIMD-style: it grows by one per "round" of
+    successful calls under ``latency_target_ms``, shrinks by 10% on a slow
+    call and halves on a 429. A 429 also pauses the limiter for the
+    provider's Retry-After so queued callers back off together instead of
+    retrying in a storm.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: Optional[float],
+        tokens_per_minute: Optional[float],
+        max_concurrency: int = 16,
+        min_concurrency: int = 1,
+        latency_target_ms: float = 30000,
+        max_retries: int = 3
+    ):
+        self.name = name
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.latency_target_ms = latency_target_ms
+        self.max_retries = max_retries
+
+        self._request_capacity = max(1.0, requests_per_minute / 6) if requests_per_minute else float("inf")
+        self._token_capacity = max(1.0, tokens_per_minute / 6) if tokens_per_minute else float("inf")
+        self._requests = self._request_capacity
+        self._tokens = self._token_capacity
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+
+        self._limit = float(max_concurrency)
+        self._in_flight = 0
+        self._waiting = 0
+        self._cond = threading.Condition()
+        # Coroutines waiting in aacquire, woken from release like the condition's waiters
+        self._async_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+        self.acquired = 0
+        self.throttled = 0
+        self.retries = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of callers currently waiting for a slot or quota"""
+        return self._waiting
+
+    def _refill(self, now: float):
+        """Top up both buckets for the time elapsed (caller holds the lock)"""
+        elapsed = now - self._refilled_at
+        self._refilled_at = now
+        if self.requests_per_minute:
+            self._requests = min(self._request_capacity, self._requests + elapsed * self.requests_per_minute / 60)
+        if self.tokens_per_minute:
+            self._tokens = min(self._token_capacity, self._tokens + elapsed * self.tokens_per_minute / 60)
+
+    def _try_acquire(self, tokens: int) -> Optional[float]:
+        """
+        Take a slot and quota if available (caller holds the lock)
+
+        Returns:
+            0 when acquired, seconds until quota may be available, or None to
+            wait for an in-flight call to finish
+        """
+        now = time.monotonic()
+        self._refill(now)
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self._in_flight >= int(self._limit):
+            return None
+
+        # A single request larger than the bucket only has to wait for a full bucket
+        tokens = min(tokens, self._token_capacity)
+        wait = 0.0
+        if self.requests_per_minute:
+            wait = max(wait, (1 - self._requests) * 60 / self.requests_per_minute)
+        if self.tokens_per_minute:
+            wait = max(wait, (tokens - self._tokens) * 60 / self.tokens_per_minute)
+        if wait > 0:
+            return wait
+
+        if self.requests_per_minute:
+            self._requests -= 1
+        if self.tokens_per_minute:
+            self._tokens -= tokens
+        self._in_flight += 1
+        return 0
+
+    def _record_wait(self, started: float):
+        """Update wait-time counters (caller holds the lock)"""
+        waited_ms = (time.monotonic() - started) * 1000
+        self.acquired += 1
+        self.total_wait_ms += waited_ms
+        self.max_wait_ms = max(self.max_wait_ms, waited_ms)
+
+    def acquire(self, tokens: int):
+        """Block until a request of ``tokens`` estimated tokens may be sent"""
+        started = time.monotonic()
+        with self._cond:
+            self._waiting += 1
+            try:
+                while True:
+                    wait = self._try_acquire(tokens)
+                    if wait == 0:
+                        break
+                    self._cond.wait(timeout=wait)
+            finally:
+                self._waiting -= 1
+            self._record_wait(started)
+
+    async def aacquire(self, tokens: int):
+        """
+        Async version of acquire
+
+        Sleeps until the quota is due or, when all slots are taken, until
+        release wakes it, without blocking the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        with self._cond:
+            self._waiting += 1
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_acquire(tokens)
+                    if wait == 0:
+                        break
+                    # Registered under the lock so a release in between is not missed
+                    woken = loop.create_future()
+                    self._async_waiters.append((loop, woken))
+                try:
+                    await asyncio.wait_for(woken, timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            with self._cond:
+                self._waiting -= 1
+        with self._cond:
+            self._record_wait(started)
+
+    def _notify_all(self):
+        """Wake every thread and coroutine waiting to acquire (caller holds the lock)"""
+        self._cond.notify_all()
+        waiters, self._async_waiters = self._async_waiters, []
+        for loop, woken in waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, woken)
+            except RuntimeError:
+                # The waiter's event loop has closed
+                pass
+
+    def release(
+        self,
+        latency_ms: float,
+        reserved_tokens: int = 0,
+        used_tokens: Optional[int] = None,
+        throttled: bool = False,
+        retry_after: Optional[float] = None
+    ):
+        """
+        Return a slot and feed the outcome into the adaptive limit
+
+        Args:
+            latency_ms: Wall time of the call
+            reserved_tokens: Tokens taken from the bucket at acquire time
+            used_tokens: Actual tokens used, to settle the reservation
+            throttled: Whether the provider answered 429
+            retry_after: Provider's Retry-After hint in seconds
+        """
+        with self._cond:
+            self._in_flight -= 1
+            if used_tokens is not None:
+                # Settle the estimate; overspend leaves the bucket in debt
+                self._tokens = min(self._token_capacity, self._tokens + reserved_tokens - used_tokens)
+
+            if throttled:
+                self.throttled += 1
+                self._limit = max(self.min_concurrency, self._limit / 2)
+                self._paused_until = max(self._paused_until, time.monotonic() + (retry_after or 1.0))
+            elif latency_ms > self.latency_target_ms:
+                self._limit = max(self.min_concurrency, self._limit * 0.9)
+            else:
+                self._limit = min(self.max_concurrency, self._limit + 1 / self._limit)
+            self._notify_all()
+
+    def _backoff(self, attempt: int, error: BaseException) -> float:
+        """Seconds to wait before retrying a 429"""
+        return retry_after_seconds(error) or min(30.0, 2 ** attempt) * (0.5 + random.random() / 2)
+
+    def call(self, fn: Callable[[], Any], tokens: int) -> Any:
+        """
+        Run an LLM call under the limiter, retrying 429 responses
+
+        Args:
+            fn: The call to make
+            tokens: Estimated prompt plus completion tokens
+
+        Returns:
+            The call's result
+        """
+        attempt = 0
+        while True:
+            self.acquire(tokens)
+            started = time.monotonic()
+            try:
+                result = fn()
+            except Exception as e:
+                latency_ms = (time.monotonic() - started) * 1000
+                if not is_rate_limited(e):
+                    self.release(latency_ms)
+                    raise
+                self.release(latency_ms, throttled=True, retry_after=self._backoff(attempt, e))
+                if attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                self.retries += 1
+                continue
+            self.release((time.monotonic() - started) * 1000, tokens, _used_tokens(result))
+            return result
+
+    async def acall(self, fn: Callable[[], Awaitable[Any]], tokens: int) -> Any:
+        """Async version of call"""
+        attempt = 0
+        while True:
+            await self.aacquire(tokens)
+            started = time.monotonic()
+            try:
+                result = await fn()
+            except asyncio.CancelledError:
+                self.release((time.monotonic() - started) * 1000)
+                raise
+            except Exception as e:
+                latency_ms = (time.monotonic() - started) * 1000
+                if not is_rate_limited(e):
+                    self.release(latency_ms)
+                    raise
+                self.release(latency_ms, throttled=True, retry_after=self._backoff(attempt, e))
+                if attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                self.retries += 1
+                continue
+            self.release((time.monotonic() - started) * 1000, tokens, _used_tokens(result))
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue depth, wait time and adaptive limit"""
+        with self._cond:
+            self._refill(time.monotonic())
+            return {
+                "concurrency_limit": int(self._limit),
+                "in_flight": self._in_flight,
+                "queue_depth": self._waiting,
+                "acquired": self.acquired,
+                "throttled": self.throttled,
+                "retries": self.retries,
+                "avg_wait_ms": round(self.total_wait_ms / self.acquired, 2) if self.acquired else 0.0,
+                "max_wait_ms": round(self.max_wait_ms, 2),
+                "total_wait_ms": round(self.total_wait_ms, 2),
+                # None for an unlimited quota
+                "available_requests": round(self._requests, 2) if self.requests_per_minute else None,
+                "available_tokens": round(self._tokens, 2) if self.tokens_per_minute else None,
+                "paused_for_s": round(max(0.0, self._paused_until - time.monotonic()), 2)
+            }
+
+
+def _wake(woken: asyncio.Future):
+    """Resolve an aacquire waiter's future unless it already timed out"""
+    if not woken.done():
+        woken.set_result(None)
+
+
+def _used_tokens(result: Any) -> Optional[int]:
+    """Total tokens reported for a model response, if any"""
+    usage = getattr(result, "usage_metadata", None)
+    return usage.get("total_tokens") if usage else None
+
+
+_limiters: Dict[str, AdaptiveRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def limiter_key(llm: Any) -> str:
+    """Deployment a model client sends to, e.g. "azure-openai-chat:gpt-4o" """
+    deployment = (
+        getattr(llm, "deployment_name", None)
+        or getattr(llm, "model_name", None)
+        or type(llm).__name__
+    )
+    return f"{getattr(llm, '_llm_type', 'llm')}:{deployment}"
+
+
+def get_rate_limiter(llm: Any) -> AdaptiveRateLimiter:
+    """Get the shared limiter for the deployment an LLM client sends to"""
+    key = limiter_key(llm)
+    limiter = _limiters.get(key)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(key)
+            if limiter is None:
+                config = settings.rate_limit
+                limiter = AdaptiveRateLimiter(
+                    name=key,
+                    requests_per_minute=config.requests_per_minute,
+                    tokens_per_minute=config.tokens_per_minute,
+                    max_concurrency=config.max_concurrency,
+                    min_concurrency=config.min_concurrency,
+                    latency_target_ms=config.latency_target_ms,
+                    max_retries=config.max_retries
+                )
+                _limiters[key] = limiter
+    return limiter
+
+
+def get_rate_limiter_stats() -> Dict[str, Dict[str, Any]]:
+    """Get limiter metrics for every deployment seen so far"""
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {limiter.name: limiter.stats() for limiter in limiters}
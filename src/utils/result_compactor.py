@@ -0,0 +1,136 @@
+"""
+Result Compactor
+Reduces goal execution results to a short KPI digest for the evaluation prompt
+"""
+import threading
+from typing import Any, Dict, List, Tuple
+
+from .llm_metrics import estimate_tokens
+
+
+# Keys that identify or timestamp a record but say nothing about performance
+_NOISE_SUFFIXES = ("_id", "_at", "_date", "timestamp")
+# Container keys that only add nesting to the digest
+_TRANSPARENT_KEYS = {"deployment", "stats"}
+# Longest string value kept verbatim
+_MAX_TEXT_CHARS = 120
+
+
+class ResultCompactor:
+    """
+    Deterministic KPI digest of an execution result dict
+
+    The result is flattened to ``path=value`` lines. Identifiers, timestamps
+    and wrapper keys are dropped, duplicates are removed and long text is
+    truncated. Lines are then ranked by depth, numbers ahead of text and
+    lists at the same depth, so headline KPIs and status come first and
+    per-platform breakdowns last. Lines are emitted until the token budget
+    is reached. The same
+    input always produces the same digest, so exact-match caching of
+    evaluation prompts keeps working.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.original_tokens = 0
+        self.compact_tokens = 0
+
+    def _flatten(self, value: Any, path: Tuple[str, ...], out: List[Tuple[Tuple[str, ...], Any]]):
+        if isinstance(value, dict):
+            for key, child in value.items():
+                key = str(key)
+                if key.endswith(_NOISE_SUFFIXES):
+                    continue
+                self._flatten(child, path if key in _TRANSPARENT_KEYS else path + (key,), out)
+        else:
+            out.append((path, value))
+
+    @staticmethod
+    def _format(value: Any) -> str:
+        if isinstance(value, float):
+            return f"{value:g}"
+        if isinstance(value, (list, tuple)):
+            return ",".join(ResultCompactor._format(v) for v in value)
+        text = str(value)
+        return text if len(text) <= _MAX_TEXT_CHARS else text[:_MAX_TEXT_CHARS - 3] + "..."
+
+    @staticmethod
+    def _rank(path: Tuple[str, ...], value: Any) -> int:
+        """Sort key: shallow before deep, and at equal depth numbers before text before lists"""
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            penalty = 0
+        elif isinstance(value, (list, tuple)):
+            penalty = 2
+        else:
+            penalty = 1
+        return len(path) + penalty
+
+    def digest(self, results: Dict[str, Any], token_budget: int) -> str:
+        """
+        Build the KPI digest for a result dict
+
+        Args:
+            results: Execution result from a goal strategy
+            token_budget: Approximate maximum tokens for the digest
+
+        Returns:
+            One ``path=value`` line per KPI, most important first
+        """
+        flat: List[Tuple[Tuple[str, ...], Any]] = []
+        self._flatten(results, (), flat)
+
+        lines = []
+        seen = set()
+        for _, (path, value) in sorted(
+            enumerate(flat), key=lambda item: (self._rank(*item[1]), item[0])
+        ):
+            line = f"{'.'.join(path) or 'value'}={self._format(value)}"
+            if line not in seen:
+                seen.add(line)
+                lines.append(line)
+
+        kept = []
+        used = 0
+        for line in lines:
+            cost = estimate_tokens(line) + 1
+            if used + cost > token_budget:
+                break
+            kept.append(line)
+            used += cost
+        if len(kept) < len(lines):
+            kept.append(f"(+{len(lines) - len(kept)} lower-priority fields omitted)")
+        return "\n".join(kept)
+
+    def compact(self, results: Dict[str, Any], token_budget: int) -> Tuple[str, int]:
+        """
+        Digest results and record the tokens saved versus str(results)
+
+        Returns:
+            (digest, tokens_saved)
+        """
+        original = estimate_tokens(str(results))
+        digest = self.digest(results, token_budget)
+        compact = estimate_tokens(digest)
+        with self._lock:
+            self.calls += 1
+            self.original_tokens += original
+            self.compact_tokens += compact
+        return digest, max(0, original - compact)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get token savings across all compacted results"""
+        with self._lock:
+            saved = max(0, self.original_tokens - self.compact_tokens)
+            return {
+                "calls": self.calls,
+                "original_tokens": self.original_tokens,
+                "compact_tokens": self.compact_tokens,
+                "tokens_saved": saved,
+                "avg_tokens_saved": round(saved / self.calls, 1) if self.calls else 0.0,
+                "reduction": round(saved / self.original_tokens * 100, 2) if self.original_tokens else 0.0
+            }
+
+
+# Global compactor shared by all agents
+result_compactor = ResultCompactor()
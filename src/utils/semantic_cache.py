@@ -0,0 +1,251 @@
+"""
+Semantic LLM Cache
+Near-duplicate prompt cache: hashed bag-of-words vectors searched with a NumPy nearest-neighbour index
+"""
+import hashlib
+import json
+import math
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..config.settings import settings
+
+
+# Lower edges of the similarity histogram bins
+SIMILARITY_BINS = [0.0, 0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 0.98]
+
+_TOKEN_RE = re.compile(r"[a-z]+|\d+(?:\.\d+)?")
+_STOPWORDS = {"a", "an", "and", "at", "by", "for", "in", "of", "on", "or", "the", "to", "with"}
+
+
+class HashingVectorizer:
+    """
+    Local embedding of prompt variables using the hashing trick
+
+    Each variable (nested dicts are flattened into one field per leaf) is
+    embedded separately from its words, hashed into signed dimensions and
+    L2-normalised; a field whose tokens cancel out to a zero vector is skipped. The field vectors are then averaged and normalised, so the
+    dot product of two embeddings is roughly the mean per-field cosine
+    similarity: a short field such as the campaign type counts as much as a
+    long free-text one. Numbers are bucketed on a log scale (about a quarter
+    of a decade per bucket) so 5000 and 5200 produce the same token.
+    """
+
+    def __init__(self, dimensions: int = 1024):
+        self.dimensions = dimensions
+
+    @staticmethod
+    def _number_token(value: str) -> str:
+        number = float(value)
+        if number <= 0:
+            return "num:0"
+        return f"num:{round(math.log10(number) * 4)}"
+
+    @staticmethod
+    def _fields(variables: Dict[str, Any], prefix: str = "") -> List[Tuple[str, str]]:
+        """Flatten variables into (field, text) pairs"""
+        fields = []
+        for key, value in sorted(variables.items()):
+            field = f"{prefix}{key}"
+            if isinstance(value, dict):
+                fields.extend(HashingVectorizer._fields(value, f"{field}."))
+            elif isinstance(value, str):
+                fields.append((field, value))
+            else:
+                fields.append((field, json.dumps(value, sort_keys=True, default=str)))
+        return fields
+
+    def _tokens(self, text: str) -> List[str]:
+        tokens = []
+        for word in _TOKEN_RE.findall(text.lower()):
+            if word[0].isdigit():
+                tokens.append(self._number_token(word))
+            elif word not in _STOPWORDS:
+                # Crude plural folding: "customers" and "customer" match
+                tokens.append(word[:-1] if len(word) > 3 and word.endswith("s") else word)
+        return tokens
+
+    def _index(self, field: str, token: str) -> Tuple[int, float]:
+        digest = hashlib.md5(f"{field}\x00{token}".encode("utf-8")).digest()
+        bucket = int.from_bytes(digest[:4], "little") % self.dimensions
+        sign = 1.0 if digest[4] & 1 else -1.0
+        return bucket, sign
+
+    def transform(self, variables: Dict[str, Any]) -> np.ndarray:
+        """Embed a dict of prompt variables"""
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        field_vector = np.zeros(self.dimensions, dtype=np.float32)
+        for field, text in self._fields(variables):
+            field_vector[:] = 0
+            for token in self._tokens(text) or [""]:
+                bucket, sign = self._index(field, token)
+                field_vector[bucket] += sign
+            field_norm = np.linalg.norm(field_vector)
+            # Tokens hashed to one bucket with opposite signs can cancel out
+            if field_norm > 0:
+                vector += field_vector / field_norm
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+
+class _Index:
+    """Vector index for one partition; grows up to ``capacity`` then overwrites the oldest entry"""
+
+    def __init__(self, dimensions: int, capacity: int):
+        self.capacity = capacity
+        self.vectors = np.zeros((min(16, capacity), dimensions), dtype=np.float32)
+        self.responses: List[Optional[str]] = []
+        self.size = 0
+        self.next = 0
+
+    def search(self, query: np.ndarray) -> Tuple[int, float]:
+        """Index and cosine similarity of the nearest stored vector"""
+        scores = self.vectors[:self.size] @ query
+        best = int(np.argmax(scores))
+        return best, float(scores[best])
+
+    def add(self, vector: np.ndarray, response: str):
+        if self.size < self.capacity:
+            if self.size == len(self.vectors):
+                grown = np.zeros((min(self.size * 2, self.capacity), self.vectors.shape[1]), dtype=np.float32)
+                grown[:self.size] = self.vectors
+                self.vectors = grown
+            self.vectors[self.size] = vector
+            self.responses.append(response)
+            self.size += 1
+            return
+        self.vectors[self.next] = vector
+        self.responses[self.next] = response
+        self.next = (self.next + 1) % self.capacity
+
+
+class SemanticCache:
+    """
+    Cache that answers prompts whose variables are near-duplicates of earlier ones
+
+    Entries are partitioned by call site and model, so a hit always comes from
+    the same prompt template and model. Within a partition the prompt
+    variables are embedded with ``HashingVectorizer`` and the nearest stored
+    entry is returned if its cosine similarity is at least ``threshold``.
+    """
+
+    def __init__(self, threshold: float = 0.92, max_entries: int = 500, dimensions: int = 1024):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.vectorizer = HashingVectorizer(dimensions)
+        self._indexes: Dict[str, _Index] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.by_name: Dict[str, Dict[str, int]] = {}
+        self.similarity_histogram = [0] * len(SIMILARITY_BINS)
+
+    @staticmethod
+    def _partition(name: str, llm: Any) -> str:
+        model = json.dumps(getattr(llm, "_identifying_params", {}), sort_keys=True, default=str)
+        return f"{name}|{model}"
+
+    def _bin(self, similarity: float) -> int:
+        for index in range(len(SIMILARITY_BINS) - 1, -1, -1):
+            if similarity >= SIMILARITY_BINS[index]:
+                return index
+        return 0
+
+    def get(self, name: str, variables: Dict[str, Any], llm: Any) -> Optional[Tuple[str, float]]:
+        """
+        Find a cached response for near-identical variables
+
+        Returns:
+            (response, similarity) on a hit, otherwise None
+        """
+        query = self.vectorizer.transform(variables)
+        with self._lock:
+            counters = self.by_name.setdefault(name, {"hits": 0, "misses": 0})
+            index = self._indexes.get(self._partition(name, llm))
+            if index is None or index.size == 0 or not np.isfinite(query).all():
+                self.misses += 1
+                counters["misses"] += 1
+                return None
+
+            best, similarity = index.search(query)
+            self.similarity_histogram[self._bin(similarity)] += 1
+            if similarity >= self.threshold:
+                self.hits += 1
+                counters["hits"] += 1
+                return index.responses[best], similarity
+
+            self.misses += 1
+            counters["misses"] += 1
+            return None
+
+    def set(self, name: str, variables: Dict[str, Any], llm: Any, response: str):
+        """Store a response under the embedding of its variables"""
+        vector = self.vectorizer.transform(variables)
+        if not np.isfinite(vector).all():
+            # A NaN row would win every argmax in its partition
+            return
+        with self._lock:
+            partition = self._partition(name, llm)
+            index = self._indexes.get(partition)
+            if index is None:
+                index = _Index(self.vectorizer.dimensions, self.max_entries)
+                self._indexes[partition] = index
+            index.add(vector, response)
+
+    def clear(self):
+        """Drop every stored entry"""
+        with self._lock:
+            self._indexes.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit rates and the histogram of best-match similarities"""
+        with self._lock:
+            total = self.hits + self.misses
+            labels = [
+                f"{low:.2f}-{high:.2f}"
+                for low, high in zip(SIMILARITY_BINS, SIMILARITY_BINS[1:] + [1.0])
+            ]
+            return {
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total * 100, 2) if total > 0 else 0.0,
+                "entries": sum(index.size for index in self._indexes.values()),
+                "by_name": {name: dict(counts) for name, counts in self.by_name.items()},
+                "similarity_histogram": dict(zip(labels, self.similarity_histogram))
+            }
+
+
+_semantic_cache: Optional[SemanticCache] = None
+_semantic_cache_lock = threading.Lock()
+
+
+def get_semantic_cache(name: Optional[str] = None) -> Optional[SemanticCache]:
+    """
+    Get the process-wide semantic cache
+
+    Args:
+        name: Call-site name; when given, None is also returned for call sites
+            whose module is not listed in settings
+
+    Returns:
+        The shared cache, or None when semantic caching does not apply
+    """
+    global _semantic_cache
+    config = settings.semantic_cache
+    if not config.enabled:
+        return None
+    if name is not None and name.split(".", 1)[0] not in config.modules:
+        return None
+    if _semantic_cache is None:
+        with _semantic_cache_lock:
+            if _semantic_cache is None:
+                _semantic_cache = SemanticCache(
+                    threshold=config.threshold,
+                    max_entries=config.max_entries
+                )
+    return _semantic_cache
@@ -0,0 +1,244 @@
+"""
+Single-Flight Request Coalescing
+Concurrent identical LLM requests share one upstream call
+"""
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class _Call:
+    """An in-flight call that followers wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class _Stream:
+    """An in-flight stream whose chunks are replayed to every subscriber"""
+
+    def __init__(self, source: Iterator[Any]):
+        self.source = source
+        self.chunks: List[Any] = []
+        self.changed = threading.Condition()
+        self.pumping = False
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key
+
+    The first caller for a key (the leader) runs the call; anyone asking for
+    the same key while it is in flight waits for and receives the leader's
+    result or exception. Nothing is remembered once the call completes, so
+    this only removes duplicates that overlap in time.
+
+    Threads coalesce with threads and coroutines with coroutines on the same
+    event loop; the two paths do not wait on each other. Streams coalesce
+    through ``stream``: every subscriber receives every chunk of one upstream
+    stream, including chunks produced before it joined.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._async_calls: Dict[Tuple[int, str], asyncio.Future] = {}
+        self._streams: Dict[str, _Stream] = {}
+        self.issued = 0
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run ``fn`` once for all concurrent callers with the same key
+
+        Args:
+            key: Request fingerprint
+            fn: Call to run if no identical call is in flight
+
+        Returns:
+            (result, shared) where shared is True for coalesced callers
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.issued += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Async version of do: await ``fn`` once for all concurrent coroutines with the same key
+
+        Args:
+            key: Request fingerprint
+            fn: Coroutine function to await if no identical call is in flight
+
+        Returns:
+            (result, shared) where shared is True for coalesced callers
+        """
+        loop = asyncio.get_running_loop()
+        loop_key = (id(loop), key)
+        with self._lock:
+            future = self._async_calls.get(loop_key)
+            leader = future is None
+            if leader:
+                future = loop.create_future()
+                self._async_calls[loop_key] = future
+                self.issued += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            # Shield so a cancelled follower does not cancel the shared call
+            return await asyncio.shield(future), True
+
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an error nobody else waited for is not logged again
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                del self._async_calls[loop_key]
+        return result, False
+
+    def stream(self, key: str, open_stream: Callable[[], Iterator[Any]]) -> Tuple[Iterator[Any], bool]:
+        """
+        Share one upstream stream between all concurrent callers with the same key
+
+        The upstream is pulled by whichever subscriber first needs a chunk
+        nobody has fetched yet; the others wait for it. It is closed early
+        only once every subscriber has closed its iterator, so one caller
+        stopping does not cut off the rest. The returned iterator must be
+        iterated or closed.
+
+        Args:
+            key: Request fingerprint
+            open_stream: Creates the upstream iterator if no identical stream is in flight
+
+        Returns:
+            (chunks, shared) where shared is True for coalesced callers
+        """
+        with self._lock:
+            flight = self._streams.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Stream(open_stream())
+                self._streams[key] = flight
+                self.issued += 1
+            else:
+                self.coalesced += 1
+            flight.subscribers += 1
+        return self._subscribe(key, flight), not leader
+
+    def _subscribe(self, key: str, flight: _Stream) -> Iterator[Any]:
+        """Yield a shared stream's chunks from the start, pulling upstream when no one else is"""
+        index = 0
+        try:
+            while True:
+                with flight.changed:
+                    while index == len(flight.chunks) and not flight.done and flight.pumping:
+                        flight.changed.wait()
+                    pump = False
+                    if index < len(flight.chunks):
+                        chunk = flight.chunks[index]
+                        index += 1
+                    elif flight.done:
+                        if flight.error is not None:
+                            raise flight.error
+                        return
+                    else:
+                        flight.pumping = True
+                        pump = True
+                if pump:
+                    self._pump(key, flight)
+                    continue
+                yield chunk
+        finally:
+            with self._lock:
+                flight.subscribers -= 1
+                abandoned = flight.subscribers == 0 and not flight.done
+                if abandoned and self._streams.get(key) is flight:
+                    del self._streams[key]
+            if abandoned:
+                flight.source.close()
+
+    def _pump(self, key: str, flight: _Stream):
+        """Fetch the next upstream chunk for every subscriber"""
+        finished = False
+        try:
+            chunk = next(flight.source)
+        except StopIteration:
+            finished = True
+        except BaseException as e:
+            flight.error = e
+            finished = True
+        else:
+            flight.chunks.append(chunk)
+        finally:
+            if finished:
+                with self._lock:
+                    if self._streams.get(key) is flight:
+                        del self._streams[key]
+            with flight.changed:
+                flight.done = finished
+                flight.pumping = False
+                flight.changed.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get issued/coalesced counters"""
+        with self._lock:
+            total = self.issued + self.coalesced
+            return {
+                "issued": self.issued,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls) + len(self._async_calls) + len(self._streams),
+                "coalesce_rate": round(self.coalesced / total * 100, 2) if total > 0 else 0.0
+            }
+
+    def reset(self):
+        """Reset counters (in-flight calls are left alone)"""
+        with self._lock:
+            self.issued = 0
+            self.coalesced = 0
+
+
+# Global coalescer shared by all agents and modules
+single_flight = SingleFlight()
+
+
+def get_single_flight_stats() -> Dict[str, Any]:
+    """Get issued vs coalesced counts for LLM requests"""
+    return single_flight.stats()
@@ -0,0 +1,360 @@
+"""
+Tiered agent memory
+Byte-budgeted LRU hot tier with compressed spill of cold entries to local disk
+"""
+import atexit
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import uuid
+import weakref
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ..config.settings import settings
+
+
+_MISSING = object()
+
+
+class MemorySpillStore:
+    """
+    SQLite table of compressed entries spilled out of TieredMemory hot tiers
+
+    One file per process: entries are only meaningful to the objects that
+    spilled them, so the file is emptied when opened and removed at exit.
+    """
+
+    def __init__(self, path: str, compression_level: int = 6):
+        self.path = path
+        self.compression_level = compression_level
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS memory_spill (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )"""
+        )
+        self._conn.execute("DELETE FROM memory_spill")
+        self._conn.commit()
+        self.writes = 0
+        self.reads = 0
+        self.bytes_written = 0
+
+    def put(self, namespace: str, key: str, data: bytes):
+        """Store pickled bytes compressed"""
+        compressed = zlib.compress(data, self.compression_level)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO memory_spill (namespace, key, value, size) VALUES (?, ?, ?, ?)",
+                (namespace, key, compressed, len(data))
+            )
+            self._conn.commit()
+            self.writes += 1
+            self.bytes_written += len(compressed)
+
+    def take(self, namespace: str, key: str) -> Optional[bytes]:
+        """Remove an entry and return its pickled bytes, or None if absent"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM memory_spill WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("DELETE FROM memory_spill WHERE namespace = ? AND key = ?", (namespace, key))
+            self._conn.commit()
+            self.reads += 1
+        return zlib.decompress(row[0])
+
+    def read(self, namespace: str, key: str) -> Optional[bytes]:
+        """Get an entry's pickled bytes without removing it, or None if absent"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM memory_spill WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+        return zlib.decompress(row[0]) if row is not None else None
+
+    def delete(self, namespace: str, key: Optional[str] = None):
+        """Drop one entry, or every entry of a namespace"""
+        with self._lock:
+            if key is None:
+                self._conn.execute("DELETE FROM memory_spill WHERE namespace = ?", (namespace,))
+            else:
+                self._conn.execute("DELETE FROM memory_spill WHERE namespace = ? AND key = ?", (namespace, key))
+            self._conn.commit()
+
+    def keys(self, namespace: str) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute(
+                "SELECT key FROM memory_spill WHERE namespace = ?", (namespace,)
+            )]
+
+    def stats(self) -> Dict[str, Any]:
+        """Get entry counts and raw/compressed sizes on disk"""
+        with self._lock:
+            entries, raw, compressed = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(value)), 0) FROM memory_spill"
+            ).fetchone()
+            return {
+                "path": self.path,
+                "entries": entries,
+                "raw_bytes": raw,
+                "compressed_bytes": compressed,
+                "writes": self.writes,
+                "reads": self.reads
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class TieredMemory:
+    """
+    Key-value memory with a byte budget
+
+    Values live in an LRU hot tier whose size is measured as the length of
+    their pickle. When the hot tier goes over ``budget_bytes``, the least
+    recently used entries are pickled, compressed and moved to the spill
+    store; reading a spilled key with ``get`` loads it back into the hot
+    tier, while ``peek`` reads it without moving anything. Keys,
+    ``get``/``set`` semantics and the set of stored values are the same as a
+    dict's, but a value that was spilled comes back as a copy, so mutate a
+    value in place only while it is hot (or store it again afterwards).
+
+    Values that cannot be pickled, and values larger than the whole budget,
+    are pinned: they stay in memory outside the budget and are never
+    spilled, so they keep their identity and do not churn the hot tier.
+
+    Pickling a TieredMemory pickles every value, spilled ones included, in
+    LRU order; unpickling starts a new namespace in this process's spill
+    store and re-applies the budget.
+    """
+
+    def __init__(
+        self,
+        budget_bytes: int = 2 * 1024 * 1024,
+        spill_store: Optional[MemorySpillStore] = None,
+        namespace: Optional[str] = None
+    ):
+        self.budget_bytes = budget_bytes
+        self.namespace = namespace or uuid.uuid4().hex
+        self._spill = spill_store
+        self._lock = threading.RLock()
+        self._hot: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._cold: Dict[str, int] = {}
+        # Values kept out of the budget, with their pickled size (None if unpicklable)
+        self._pinned: Dict[str, Tuple[Any, Optional[int]]] = {}
+        self.hot_bytes = 0
+        self.hits = 0
+        self.spill_hits = 0
+        self.spill_peeks = 0
+        self.spills = 0
+        if spill_store is not None:
+            # Free the disk entries when the owning agent goes away
+            weakref.finalize(self, spill_store.delete, self.namespace)
+
+    def _evict(self):
+        """Spill least recently used entries until the hot tier fits the budget"""
+        while self.hot_bytes > self.budget_bytes and self._hot and self._spill is not None:
+            key, (value, size) = self._hot.popitem(last=False)
+            self._spill.put(self.namespace, key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+            self.hot_bytes -= size
+            self._cold[key] = size
+            self.spills += 1
+
+    @staticmethod
+    def _measure(value: Any) -> Optional[int]:
+        """Pickled size of a value, or None if it cannot be pickled"""
+        try:
+            return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return None
+
+    def set(self, key: str, value: Any):
+        """Store a value, replacing any previous one"""
+        size = self._measure(value)
+        with self._lock:
+            self._remove(key)
+            if size is None or size > self.budget_bytes:
+                self._pinned[key] = (value, size)
+                return
+            self._hot[key] = (value, size)
+            self.hot_bytes += size
+            self._evict()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a value, loading it back from the spill store if it went cold"""
+        with self._lock:
+            entry = self._hot.get(key)
+            if entry is not None:
+                self._hot.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            entry = self._pinned.get(key)
+            if entry is not None:
+                self.hits += 1
+                return entry[0]
+            if key not in self._cold:
+                return default
+            data = self._spill.take(self.namespace, key)
+            size = self._cold.pop(key)
+            if data is None:
+                return default
+            value = pickle.loads(data)
+            self._hot[key] = (value, size)
+            self.hot_bytes += size
+            self.spill_hits += 1
+            self._evict()
+            return value
+
+    def peek(self, key: str, default: Any = None) -> Any:
+        """
+        Get a value for read-only use without changing the tiers
+
+        A hot value keeps its LRU position and a spilled value is decoded
+        from disk but stays spilled, so reading many cold entries (e.g. to
+        serialize them) does not evict and re-spill the rest of the memory.
+        """
+        with self._lock:
+            entry = self._hot.get(key)
+            if entry is None:
+                entry = self._pinned.get(key)
+            if entry is not None:
+                self.hits += 1
+                return entry[0]
+            if key not in self._cold:
+                return default
+            data = self._spill.read(self.namespace, key)
+            if data is None:
+                return default
+            self.spill_peeks += 1
+        return pickle.loads(data)
+
+    def _remove(self, key: str) -> bool:
+        entry = self._hot.pop(key, _MISSING)
+        if entry is not _MISSING:
+            self.hot_bytes -= entry[1]
+            return True
+        if self._pinned.pop(key, _MISSING) is not _MISSING:
+            return True
+        if self._cold.pop(key, None) is not None:
+            self._spill.delete(self.namespace, key)
+            return True
+        return False
+
+    def delete(self, key: str) -> bool:
+        """Remove a key from both tiers; returns whether it existed"""
+        with self._lock:
+            return self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._hot.clear()
+            self._cold.clear()
+            self._pinned.clear()
+            self.hot_bytes = 0
+            if self._spill is not None:
+                self._spill.delete(self.namespace)
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return list(self._hot) + list(self._pinned) + list(self._cold)
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any):
+        self.set(key, value)
+
+    def __delitem__(self, key: str):
+        if not self.delete(key):
+            raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._hot or key in self._pinned or key in self._cold
+
+    def __len__(self) -> int:
+        return len(self._hot) + len(self._pinned) + len(self._cold)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __getstate__(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = [
+                (key, pickle.loads(self._spill.read(self.namespace, key)))
+                for key in self._cold
+            ]
+            entries.extend((key, value) for key, (value, _) in self._pinned.items())
+            entries.extend((key, value) for key, (value, _) in self._hot.items())
+            return {"budget_bytes": self.budget_bytes, "spilled": self._spill is not None, "entries": entries}
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__init__(
+            budget_bytes=state["budget_bytes"],
+            spill_store=get_spill_store() if state["spilled"] else None
+        )
+        for key, value in state["entries"]:
+            self.set(key, value)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get tier sizes and hit counts"""
+        with self._lock:
+            return {
+                "budget_bytes": self.budget_bytes,
+                "hot_entries": len(self._hot),
+                "hot_bytes": self.hot_bytes,
+                "cold_entries": len(self._cold),
+                "cold_bytes": sum(self._cold.values()),
+                "pinned_entries": len(self._pinned),
+                "pinned_bytes": sum(size for _, size in self._pinned.values() if size is not None),
+                "unmeasured_entries": sum(1 for _, size in self._pinned.values() if size is None),
+                "hits": self.hits,
+                "spill_hits": self.spill_hits,
+                "spill_peeks": self.spill_peeks,
+                "spills": self.spills
+            }
+
+
+_spill_store: Optional[MemorySpillStore] = None
+_spill_store_lock = threading.Lock()
+
+
+def _remove_spill_store(store: MemorySpillStore):
+    store.close()
+    try:
+        os.remove(store.path)
+    except OSError:
+        pass
+
+
+def get_spill_store() -> MemorySpillStore:
+    """Get this process's spill store, creating it on first use"""
+    global _spill_store
+    if _spill_store is None:
+        with _spill_store_lock:
+            if _spill_store is None:
+                directory = settings.memory.spill_dir or tempfile.gettempdir()
+                os.makedirs(directory, exist_ok=True)
+                _spill_store = MemorySpillStore(
+                    path=os.path.join(directory, f"agent_memory_{os.getpid()}.db"),
+                    compression_level=settings.memory.compression_level
+                )
+                atexit.register(_remove_spill_store, _spill_store)
+    return _spill_store
+
+
+def create_agent_memory() -> TieredMemory:
+    """Memory for one agent, sized from settings"""
+    return TieredMemory(budget_bytes=settings.memory.budget_bytes, spill_store=get_spill_store())
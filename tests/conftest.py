@@ -0,0 +1,13 @@
+"""
+Shared test setup: every agent under test talks to the offline fake LLM
+"""
+import os
+
+# Set before any src import reads the settings
+os.environ["LLM_PROVIDER"] = "fake"
+os.environ.setdefault("FAKE_LLM_LATENCY_MS", "0")
+os.environ.setdefault("FAKE_LLM_TOKENS_PER_SECOND", "1000000")
+os.environ.setdefault("FAKE_LLM_SLOW_RATE", "0")
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+os.environ.setdefault("SEMANTIC_CACHE_ENABLED", "false")
+os.environ.setdefault("GOAL_CHECKPOINT_ENABLED", "false")
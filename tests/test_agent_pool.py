@@ -0,0 +1,68 @@
+"""
+Tests for the agent pool's eviction and rehydration
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.agents import AgentPool, RetailMarketingAgent
+from src.agents.base_agent import Goal, GoalStatus, GoalType
+
+
+def _agent(name: str) -> RetailMarketingAgent:
+    agent = RetailMarketingAgent(name, store_type="grocery", agent_id=name)
+    agent.add_goal(Goal(GoalType.CUSTOMER_ACQUISITION, f"Attract shoppers to {name}", "100", "1 month"))
+    return agent
+
+
+def test_capacity_evicts_least_recently_used(tmp_path):
+    pool = AgentPool(max_agents=2, idle_ttl_seconds=3600, snapshot_dir=str(tmp_path))
+    for name in ("a", "b"):
+        pool.add(name, _agent(name))
+    # Using "a" makes "b" the least recently used
+    with pool.lease("a"):
+        pass
+    pool.add("c", _agent("c"))
+
+    assert pool.state("a") == "active"
+    assert pool.state("b") == "snapshotted"
+    assert pool.state("c") == "active"
+    assert pool.stats()["evictions"]["capacity"] == 1
+
+
+def test_idle_agent_is_restored_from_snapshot(tmp_path):
+    pool = AgentPool(idle_ttl_seconds=3600, snapshot_dir=str(tmp_path))
+    agent = _agent("store")
+    goal = agent.goals[0]
+    agent.execute(goal)
+    pool.add("store", agent)
+    pool.idle_ttl_seconds = 0
+
+    assert pool.sweep() == 1
+    assert pool.state("store") == "snapshotted"
+    assert pool.stats()["evictions"]["idle"] == 1
+
+    with pool.lease("store") as restored:
+        assert restored is not agent
+        assert restored.client_name == "store"
+        [restored_goal] = restored.goals
+        assert restored_goal.id == goal.id
+        assert restored_goal.status == GoalStatus.COMPLETED
+        assert restored_goal.results == goal.results
+        # Leased agents are never evicted
+        assert pool.sweep() == 0
+    assert pool.stats()["rehydrations"] == 1
+    # Released past the TTL, it is snapshotted again
+    assert pool.state("store") == "snapshotted"
+
+
+def test_snapshots_survive_a_new_pool(tmp_path):
+    pool = AgentPool(snapshot_dir=str(tmp_path))
+    pool.add("store", _agent("store"))
+    assert pool.flush() == 1
+
+    reopened = AgentPool(snapshot_dir=str(tmp_path))
+    assert reopened.state("store") == "snapshotted"
+    assert reopened.acquire("store").goals
+    assert reopened.acquire("missing") is None
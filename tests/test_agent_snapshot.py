@@ -0,0 +1,71 @@
+"""
+Tests for agent snapshots
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.agents import RetailMarketingAgent
+from src.agents.agent_snapshot import AgentSnapshotter, record_counts
+from src.agents.base_agent import Goal, GoalType
+
+
+def _agent() -> RetailMarketingAgent:
+    agent = RetailMarketingAgent("Test Store", store_type="grocery", agent_id="agent-1")
+    agent.add_goal(Goal(GoalType.CUSTOMER_ACQUISITION, "Attract shoppers", "100", "1 month"))
+    return agent
+
+
+def _send(agent: RetailMarketingAgent, count: int, campaign_id: str = "campaign-1"):
+    for i in range(count):
+        agent.deployment_service.email_service.send_email(
+            f"shopper{i}@example.com", f"Shopper {i}", "Offer", "Come in", campaign_id
+        )
+
+
+def test_save_load_round_trip(tmp_path):
+    agent = _agent()
+    _send(agent, 3)
+    snapshotter = AgentSnapshotter(str(tmp_path / "agent"), chunk_records=64)
+    result = snapshotter.save(agent)
+
+    restored = AgentSnapshotter(str(tmp_path / "agent")).load()
+    service = restored.deployment_service
+    assert result["full"]
+    assert record_counts(restored) == record_counts(agent)
+    assert [goal.id for goal in restored.goals] == [goal.id for goal in agent.goals]
+    assert service.customer_db.customers == agent.deployment_service.customer_db.customers
+    assert service.email_service.emails == agent.deployment_service.email_service.emails
+    # Rebuilt from the emails rather than written
+    assert len(service.email_service.get_campaign_emails("campaign-1")) == 3
+
+
+def test_second_save_writes_only_new_records(tmp_path):
+    agent = _agent()
+    _send(agent, 1)
+    snapshotter = AgentSnapshotter(str(tmp_path / "agent"), chunk_records=64)
+    first = snapshotter.save(agent)
+    _send(agent, 5)
+    second = snapshotter.save(agent)
+
+    assert not second["full"]
+    # The partial email chunk is written again with the new emails; customers are reused
+    assert second["records_written"] == 6
+    assert second["chunks_reused"] > 0
+    assert second["bytes_written"] < first["bytes_written"]
+    restored = AgentSnapshotter(str(tmp_path / "agent")).load()
+    assert record_counts(restored) == record_counts(agent)
+
+
+def test_delete_removes_snapshot(tmp_path):
+    snapshotter = AgentSnapshotter(str(tmp_path / "agent"))
+    snapshotter.save(_agent())
+    assert snapshotter.exists()
+
+    snapshotter.delete()
+    assert not snapshotter.exists()
+    with pytest.raises(FileNotFoundError):
+        snapshotter.load()
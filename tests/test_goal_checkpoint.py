@@ -0,0 +1,82 @@
+"""
+Tests for goal checkpoints and resuming an interrupted agent
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.agents import RetailMarketingAgent
+from src.agents import retail_marketing_agent
+from src.agents.base_agent import Goal, GoalStatus, GoalType
+from src.agents.goal_checkpoint import GoalCheckpointStore
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Checkpoint store in a temporary file, used by every agent the test creates"""
+    checkpoints = GoalCheckpointStore(path=str(tmp_path / "checkpoints.db"))
+    monkeypatch.setattr(retail_marketing_agent, "get_checkpoint_store", lambda: checkpoints)
+    return checkpoints
+
+
+def _agent(agent_id: str = "agent-1") -> RetailMarketingAgent:
+    return RetailMarketingAgent("Test Store", store_type="grocery", agent_id=agent_id)
+
+
+def test_resume_skips_evaluated_goals(store, monkeypatch):
+    agent = _agent()
+    finished = Goal(GoalType.CUSTOMER_ACQUISITION, "Attract shoppers", "100", "1 month")
+    interrupted = Goal(GoalType.DIGITAL_PRESENCE, "Grow followers", "500", "1 month")
+    agent.add_goal(finished)
+    agent.add_goal(interrupted)
+    agent.execute(finished)
+    # Interrupted after planning
+    agent._plan_stage(interrupted)
+
+    resumed = _agent()
+    assert [g.id for g in resumed.goals] == [interrupted.id]
+    assert resumed._resume_stage == {interrupted.id: "planned"}
+
+    def no_replanning(goal):
+        raise AssertionError("a planned goal was planned again")
+
+    monkeypatch.setattr(resumed, "plan", no_replanning)
+    report = resumed.execute()
+
+    assert report["goals_failed"] == 0
+    assert resumed.get_goal(interrupted.id).status == GoalStatus.COMPLETED
+    assert store.load("agent-1") == []
+
+
+def test_evaluated_goals_are_pruned(store):
+    agent = _agent()
+    goal = agent.set_goal("customer_acquisition", "100", "1 month")
+    assert store.stats("agent-1")["goals_by_stage"]["created"] == 1
+
+    agent.execute(goal)
+
+    stats = store.stats("agent-1")
+    assert sum(stats["goals_by_stage"].values()) == 0
+    assert stats["pruned"] == 1
+    assert store.load("agent-1") == []
+
+
+def test_aexecute_checkpoints_planned_stage(store, monkeypatch):
+    agent = _agent()
+    goal = Goal(GoalType.CUSTOMER_ACQUISITION, "Attract shoppers", "100", "1 month")
+    agent.add_goal(goal)
+
+    async def interrupted_execution(g):
+        await asyncio.sleep(0.2)
+        raise RuntimeError("worker restarted")
+
+    monkeypatch.setattr(agent, "_aexecute_goal_by_type", interrupted_execution)
+    asyncio.run(agent.aexecute())
+
+    [(saved, stage)] = store.load("agent-1")
+    assert stage == "planned"
+    assert saved.subtasks == agent.get_goal(goal.id).subtasks
@@ -0,0 +1,76 @@
+"""
+Tests for the pipelined goal executor
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.agents import RetailMarketingAgent
+from src.agents.base_agent import Goal, GoalStatus, GoalType
+
+
+def _agent_with_failing_plan(monkeypatch, failing: Goal) -> RetailMarketingAgent:
+    """Agent whose planner raises for one goal"""
+    agent = RetailMarketingAgent("Test Store", store_type="grocery")
+    plan = agent.plan
+
+    def failing_plan(goal):
+        if goal is failing:
+            raise RuntimeError("planner unavailable")
+        return plan(goal)
+
+    monkeypatch.setattr(agent, "plan", failing_plan)
+    return agent
+
+
+def test_failed_plan_cancels_dependent_goal(monkeypatch):
+    prerequisite = Goal(GoalType.CUSTOMER_ACQUISITION, "Attract shoppers", "100", "1 month")
+    dependent = Goal(
+        GoalType.DIGITAL_PRESENCE, "Grow followers", "500", "1 month",
+        depends_on=[prerequisite.id]
+    )
+    agent = _agent_with_failing_plan(monkeypatch, prerequisite)
+    agent.add_goal(prerequisite)
+    agent.add_goal(dependent)
+
+    report = agent.execute_pipelined()
+
+    assert prerequisite.status == GoalStatus.FAILED
+    assert dependent.status == GoalStatus.CANCELLED
+    assert "execution" not in dependent.results
+    assert report["goals_failed"] == 2
+    assert [r["status"] for r in report["results"]] == ["failed", "cancelled"]
+
+
+def test_failed_plan_cancels_goal_of_dependent_type(monkeypatch):
+    analytics = Goal(GoalType.ANALYTICS_INSIGHTS, "Understand churn", "report", "2 weeks")
+    retention = Goal(GoalType.CUSTOMER_RETENTION, "Win back lapsed customers", "50", "1 month", priority=5)
+    agent = _agent_with_failing_plan(monkeypatch, analytics)
+    agent.goal_scheduler.type_dependencies = {"customer_retention": ["analytics_insights"]}
+    agent.add_goal(retention)
+    agent.add_goal(analytics)
+
+    agent.execute_pipelined()
+
+    assert analytics.status == GoalStatus.FAILED
+    assert retention.status == GoalStatus.CANCELLED
+    assert "execution" not in retention.results
+
+
+def test_completed_prerequisite_lets_dependent_run():
+    agent = RetailMarketingAgent("Test Store", store_type="grocery")
+    prerequisite = Goal(GoalType.CUSTOMER_ACQUISITION, "Attract shoppers", "100", "1 month")
+    dependent = Goal(
+        GoalType.DIGITAL_PRESENCE, "Grow followers", "500", "1 month",
+        depends_on=[prerequisite.id]
+    )
+    agent.add_goal(dependent)
+    agent.add_goal(prerequisite)
+
+    report = agent.execute_pipelined()
+
+    assert [r["goal_id"] for r in report["results"]] == [prerequisite.id, dependent.id]
+    assert prerequisite.status == GoalStatus.COMPLETED
+    assert dependent.status == GoalStatus.COMPLETED
+    assert report["goals_failed"] == 0
@@ -0,0 +1,101 @@
+"""
+Tests for the dependency- and priority-aware goal scheduler
+"""
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.agents.base_agent import Goal, GoalStatus, GoalType
+from src.agents.goal_scheduler import GoalScheduler
+
+
+def _goal(goal_type: GoalType = GoalType.CUSTOMER_ACQUISITION, priority: int = 1, depends_on=None) -> Goal:
+    return Goal(goal_type, "Attract shoppers", "100", "1 month", priority=priority, depends_on=depends_on)
+
+
+def _recorder(fail=()):
+    """run_goal that records the order goals ran in and raises for the given goals"""
+    ran = []
+    lock = threading.Lock()
+
+    def run_goal(goal):
+        with lock:
+            ran.append(goal.id)
+        if goal in fail:
+            raise RuntimeError("deployment failed")
+        goal.update_status(GoalStatus.COMPLETED)
+        return {"goal_id": goal.id, "goal_type": goal.goal_type.value}
+
+    return run_goal, ran
+
+
+def test_failed_prerequisite_cancels_dependents():
+    prerequisite = _goal()
+    dependent = _goal(depends_on=[prerequisite.id])
+    transitive = _goal(depends_on=[dependent.id])
+    independent = _goal()
+    run_goal, ran = _recorder(fail=[prerequisite])
+
+    results = GoalScheduler(run_goal, max_workers=2).run([transitive, dependent, prerequisite, independent])
+
+    assert sorted(ran) == sorted([prerequisite.id, independent.id])
+    assert [r["status"] for r in results[:3]] == ["cancelled", "cancelled", "failed"]
+    assert results[1]["error"] == f"Dependency {prerequisite.id} did not complete"
+    assert prerequisite.status == GoalStatus.FAILED
+    assert dependent.status == GoalStatus.CANCELLED
+    assert transitive.status == GoalStatus.CANCELLED
+    assert independent.status == GoalStatus.COMPLETED
+
+
+def test_type_dependencies_run_prerequisite_types_first():
+    retention = _goal(GoalType.CUSTOMER_RETENTION, priority=5)
+    analytics = _goal(GoalType.ANALYTICS_INSIGHTS, priority=1)
+    run_goal, ran = _recorder()
+    scheduler = GoalScheduler(
+        run_goal, max_workers=1, type_dependencies={"customer_retention": ["analytics_insights"]}
+    )
+
+    scheduler.run([retention, analytics])
+
+    assert ran == [analytics.id, retention.id]
+
+
+def test_ready_goals_start_highest_priority_first():
+    goals = [_goal(priority=priority) for priority in (1, 3, 2, 3)]
+    run_goal, ran = _recorder()
+
+    results = GoalScheduler(run_goal, max_workers=1).run(goals)
+
+    # Ties go to the goal added first
+    assert ran == [goals[1].id, goals[3].id, goals[2].id, goals[0].id]
+    assert all("schedule" in r for r in results)
+
+
+def test_waiting_goals_age_past_higher_priorities():
+    scheduler = GoalScheduler(lambda goal: {}, aging_per_minute=1.0)
+    low, high = _goal(priority=1), _goal(priority=3)
+
+    # The low-priority goal has been ready for three minutes, the other just became ready
+    assert scheduler._effective_priority(low, 0.0, 180.0) > scheduler._effective_priority(high, 180.0, 180.0)
+
+
+def test_dispatch_order_respects_dependencies_then_priority():
+    prerequisite = _goal(priority=1)
+    dependent = _goal(priority=5, depends_on=[prerequisite.id])
+    other = _goal(priority=3)
+    scheduler = GoalScheduler(lambda goal: {})
+
+    assert scheduler.dispatch_order([dependent, prerequisite, other]) == [other, prerequisite, dependent]
+
+
+def test_dependency_cycle_is_rejected():
+    first = _goal()
+    second = _goal(depends_on=[first.id])
+    first.depends_on.append(second.id)
+
+    with pytest.raises(ValueError, match="cycle"):
+        GoalScheduler(lambda goal: {}).dependencies([first, second])
@@ -0,0 +1,89 @@
+"""
+Tests for the indexed goal store and the status report built on it
+"""
+import pickle
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.agents import RetailMarketingAgent
+from src.agents.base_agent import Goal, GoalStatus, GoalStore, GoalType
+
+
+def _goal(goal_type: GoalType = GoalType.CUSTOMER_ACQUISITION, priority: int = 1) -> Goal:
+    return Goal(goal_type, "Attract shoppers", "100", "1 month", priority=priority)
+
+
+def test_status_index_follows_status_changes():
+    store = GoalStore()
+    first, second, third = _goal(), _goal(), _goal()
+    for goal in (first, second, third):
+        store.add(goal)
+
+    third.update_status(GoalStatus.IN_PROGRESS)
+    first.update_status(GoalStatus.COMPLETED)
+
+    assert store.by_status(GoalStatus.PENDING) == [second]
+    assert store.by_status(GoalStatus.PENDING, GoalStatus.IN_PROGRESS) == [second, third]
+    assert store.by_status(GoalStatus.COMPLETED) == [first]
+    assert store.count(GoalStatus.PENDING, GoalStatus.IN_PROGRESS) == 2
+    assert store.status_counts()["completed"] == 1
+
+
+def test_priority_index_follows_priority_changes():
+    store = GoalStore()
+    low, high = _goal(priority=1), _goal(priority=3)
+    store.add(low)
+    store.add(high)
+
+    low.priority = 5
+
+    assert store.by_priority(4) == [low]
+    assert store.by_priority(1) == [low, high]
+    assert store.by_priority(6) == []
+
+
+def test_type_index_and_counts():
+    store = GoalStore()
+    acquisition = _goal(GoalType.CUSTOMER_ACQUISITION)
+    retention = _goal(GoalType.CUSTOMER_RETENTION)
+    store.add(acquisition)
+    store.add(retention)
+
+    assert store.by_type(GoalType.CUSTOMER_RETENTION) == [retention]
+    assert store.type_counts()["customer_acquisition"] == 1
+    assert store.type_counts()["digital_presence"] == 0
+
+
+def test_indexes_survive_pickling():
+    store = GoalStore()
+    goal = _goal()
+    store.add(goal)
+
+    restored = pickle.loads(pickle.dumps(store))
+    restored_goal = restored.get(goal.id)
+    restored_goal.update_status(GoalStatus.COMPLETED)
+    restored_goal.priority = 4
+
+    assert restored.by_status(GoalStatus.COMPLETED) == [restored_goal]
+    assert restored.by_priority(4) == [restored_goal]
+    assert goal.status == GoalStatus.PENDING
+
+
+def test_status_report_lists_a_window_but_counts_every_goal():
+    agent = RetailMarketingAgent("Test Store", store_type="grocery")
+    goals = [_goal() for _ in range(60)]
+    for goal in goals:
+        agent.add_goal(goal)
+    goals[0].update_status(GoalStatus.COMPLETED)
+
+    report = agent.get_status_report()
+    assert [g["id"] for g in report["goals"]] == [g.id for g in goals[-50:]]
+    assert report["total_goals"] == 60
+    assert report["completed_goals"] == 1
+    assert report["active_goals"] == 59
+    assert report["goals_by_type"]["customer_acquisition"] == 60
+
+    assert agent.get_status_report(max_goals=0)["goals"] == []
+    assert len(agent.get_status_report(max_goals=None)["goals"]) == 60
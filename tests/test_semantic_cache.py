@@ -0,0 +1,52 @@
+"""
+Tests for the semantic LLM cache
+"""
+import sys
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.utils.semantic_cache import HashingVectorizer, SemanticCache
+
+
+class _Model:
+    _identifying_params = {"model_name": "test"}
+
+
+# Both tokens of target_audience hash to one bucket with opposite signs
+CANCELLING = {"store_name": "Shop", "target_audience": "summer clearance"}
+
+
+def test_cancelling_field_gives_finite_embedding():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        vector = HashingVectorizer().transform(CANCELLING)
+
+    assert np.isfinite(vector).all()
+    assert abs(float(np.linalg.norm(vector)) - 1.0) < 1e-6
+
+
+def test_cancelling_field_does_not_break_exact_lookups():
+    cache = SemanticCache(threshold=0.99)
+    llm = _Model()
+    other = {"store_name": "Shop", "target_audience": "new customers in local area"}
+
+    cache.set("customer_acquisition.create_promotion_campaign", CANCELLING, llm, "clearance plan")
+    cache.set("customer_acquisition.create_promotion_campaign", other, llm, "local plan")
+
+    assert cache.get("customer_acquisition.create_promotion_campaign", other, llm)[0] == "local plan"
+    assert cache.get("customer_acquisition.create_promotion_campaign", CANCELLING, llm)[0] == "clearance plan"
+
+
+def test_non_finite_vectors_are_rejected():
+    cache = SemanticCache()
+    llm = _Model()
+    cache.set("agent.plan", {"goal": "x"}, llm, "plan")
+    cache.vectorizer.transform = lambda variables: np.full(cache.vectorizer.dimensions, np.nan, dtype=np.float32)
+
+    cache.set("agent.plan", {"goal": "y"}, llm, "other plan")
+    assert cache.get_stats()["entries"] == 1
+    assert cache.get("agent.plan", {"goal": "x"}, llm) is None
@@ -0,0 +1,104 @@
+"""
+Tests for the byte-budgeted tiered agent memory
+"""
+import pickle
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.agents.base_agent import Goal, GoalType
+from src.utils.tiered_memory import MemorySpillStore, TieredMemory
+
+
+@pytest.fixture
+def spill(tmp_path):
+    store = MemorySpillStore(str(tmp_path / "spill.db"))
+    yield store
+    store.close()
+
+
+def _value(index: int) -> dict:
+    """A value of roughly 1 KB when pickled"""
+    return {"index": index, "text": "x" * 1000}
+
+
+def test_cold_entries_spill_and_come_back(spill):
+    memory = TieredMemory(budget_bytes=4096, spill_store=spill)
+    for index in range(10):
+        memory.set(f"key{index}", _value(index))
+
+    stats = memory.stats()
+    assert stats["hot_bytes"] <= 4096
+    assert stats["cold_entries"] > 0
+    assert len(memory) == 10
+
+    assert memory.get("key0") == _value(0)
+    assert memory.stats()["spill_hits"] == 1
+    assert [memory[f"key{index}"]["index"] for index in range(10)] == list(range(10))
+
+
+def test_peek_does_not_promote_or_respill(spill):
+    memory = TieredMemory(budget_bytes=4096, spill_store=spill)
+    for index in range(10):
+        memory.set(f"key{index}", _value(index))
+    before = memory.stats()
+    writes = spill.writes
+
+    assert memory.peek("key0") == _value(0)
+    assert memory.peek("missing", "default") == "default"
+
+    after = memory.stats()
+    assert after["cold_entries"] == before["cold_entries"]
+    assert after["spill_peeks"] == 1
+    assert spill.writes == writes
+
+
+def test_unpicklable_and_oversized_values_are_pinned(spill):
+    memory = TieredMemory(budget_bytes=4096, spill_store=spill)
+    lock = threading.Lock()
+    large = "y" * 10000
+    memory.set("lock", lock)
+    memory.set("large", large)
+    for index in range(10):
+        memory.set(f"key{index}", _value(index))
+
+    assert memory.get("lock") is lock
+    assert memory.get("large") is large
+    stats = memory.stats()
+    assert stats["pinned_entries"] == 2
+    assert stats["unmeasured_entries"] == 1
+    assert stats["hot_bytes"] <= 4096
+
+
+def test_pickle_round_trip_keeps_spilled_values(spill):
+    memory = TieredMemory(budget_bytes=4096, spill_store=spill)
+    for index in range(10):
+        memory.set(f"key{index}", _value(index))
+
+    restored = pickle.loads(pickle.dumps(memory))
+
+    assert restored.namespace != memory.namespace
+    assert sorted(restored.keys()) == sorted(memory.keys())
+    assert restored.stats()["hot_bytes"] <= 4096
+    assert [restored[f"key{index}"] for index in range(10)] == [_value(index) for index in range(10)]
+
+
+def test_archived_goal_serializes_without_churning_memory(spill):
+    memory = TieredMemory(budget_bytes=4096, spill_store=spill)
+    goals = []
+    for index in range(10):
+        goal = Goal(GoalType.CUSTOMER_ACQUISITION, "Attract shoppers", "100", "1 month")
+        goal.add_result("execution", _value(index))
+        goal.archive_results(memory)
+        goals.append(goal)
+    writes = spill.writes
+
+    serialized = [goal.to_dict()["results"]["execution"]["index"] for goal in goals]
+
+    assert serialized == list(range(10))
+    assert spill.writes == writes
+    assert goals[0].results["execution"] == _value(0)